@@ -1,13 +1,19 @@
 import argparse
 import logging
 import sys
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 
 from config import Config
-from bangumi_client import BangumiClient
-from notion_service import NotionService
-from sync_manager import SyncManager
-from exceptions import ConfigError, BangumiAPIError, NotionAPIError, SyncError
+from metrics import get_metrics
+from exceptions import ConfigError, BangumiAPIError, NotionAPIError, SchemaError, SyncError, StateError, CacheError
+
+# requests、notion_client/httpx、asyncio和各同步模块只在真正同步时导入，
+# --help、--check-config和配置错误不需要为导入HTTP客户端付出启动时间
+if TYPE_CHECKING:
+    from bangumi_client import BangumiClient
+    from http_cache import HttpCache
+    from notion_service import NotionService
+    from target_runner import TargetResult, TargetRunner
 
 
 def setup_logging(log_level: str) -> None:
@@ -47,6 +53,36 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument('--dry-run', action='store_true', 
                       help='模拟运行，不实际修改Notion数据库')
     
+    parser.add_argument('--stream', action='store_true',
+                      help='流式同步，边下载Bangumi分页边写入Notion，降低内存占用和首次写入延迟')
+    
+    parser.add_argument('--full-resync', action='store_true',
+                      help='忽略本地状态缓存，全量扫描Notion数据库并重建状态')
+    
+    parser.add_argument('--resume', action='store_true',
+                      help='继续上次中途退出的同步，只执行同步计划中未完成的操作，不重新获取和对比数据')
+    
+    parser.add_argument('--engine', type=str, default=None, choices=['thread', 'async'],
+                      help='I/O引擎：thread使用线程池，async在单个事件循环中重叠Bangumi获取、Notion索引加载和写入，默认读取SYNC_ENGINE环境变量')
+    
+    parser.add_argument('--targets', type=str, default=None, metavar='FILE',
+                      help='多目标配置文件（JSON），在一个进程中同步多个用户和数据库，默认读取TARGETS_FILE环境变量')
+    
+    parser.add_argument('--metrics-file', type=str, default=None, metavar='FILE',
+                      help='运行结束时写入JSON格式的运行指标报告，默认读取METRICS_FILE环境变量')
+    
+    parser.add_argument('--daemon', action='store_true',
+                      help='常驻运行，按DAEMON_INTERVAL循环同步，客户端、连接和本地状态索引在周期之间保持，周期之间只增量获取')
+    
+    parser.add_argument('--interval', type=float, default=None, metavar='SECONDS',
+                      help='常驻运行时两个周期之间的间隔（秒），默认读取DAEMON_INTERVAL环境变量')
+    
+    parser.add_argument('--max-cycles', type=int, default=None, metavar='N',
+                      help='常驻运行时执行N个周期后退出，默认一直运行')
+    
+    parser.add_argument('--check-config', action='store_true',
+                      help='只验证配置（包括多目标配置文件）后退出，不导入HTTP客户端、不访问任何API')
+    
     parser.add_argument('--log-level', type=str, default='INFO', 
                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
                       help='设置日志级别')
@@ -54,6 +90,345 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def log_result(logger: logging.Logger, result: Dict[str, Any]) -> None:
+    """输出单个目标的同步结果统计
+    
+    Args:
+        logger: 日志记录器
+        result: SyncManager.sync返回的结果
+    """
+    logger.info(f"Bangumi追番总数: {result['total_bangumi_items']}")
+    logger.info(f"Notion现有记录: {result['total_notion_items']}")
+    logger.info(f"新增记录数: {result['add_count']}")
+    logger.info(f"更新记录数: {result['update_count']}")
+    logger.info(f"删除记录数: {result['delete_count']}")
+    if result['duplicate_count']:
+        logger.info(f"重复页面数: {result['duplicate_count']}")
+    logger.info(f"失败记录数: {result['failed_count']}")
+    
+    for failed in result['failed_operations']:
+        logger.error(f"操作失败: [{failed.index}] {failed.action} {failed.title}: {failed.error}")
+
+
+async def run_async(config: Config, args: argparse.Namespace, state_store, subject_cache,
+                    http_cache, journal, episode_cache) -> Dict[str, Any]:
+    """使用异步引擎执行单目标同步
+    
+    Args:
+        config: 配置
+        args: 命令行参数
+        state_store: 本地状态存储，可以为None
+        subject_cache: 条目详情缓存，可以为None
+        http_cache: Bangumi HTTP响应缓存，可以为None
+        journal: 同步计划日志，可以为None
+        episode_cache: 剧集列表缓存，可以为None
+        
+    Returns:
+        同步结果统计
+    """
+    from bangumi_client import AsyncBangumiClient
+    from notion_service import AsyncNotionService
+    from sync_manager import SyncManager
+    
+    async with create_bangumi_client(config, http_cache, AsyncBangumiClient) as bangumi_client, \
+            create_notion_service(config, AsyncNotionService) as notion_client:
+        sync_manager = SyncManager(bangumi_client, notion_client, config, state_store, subject_cache, journal,
+                                   episode_cache)
+        try:
+            return await sync_manager.sync_async(dry_run=args.dry_run, full_resync=args.full_resync)
+        finally:
+            log_pool_stats(logging.getLogger(__name__), bangumi_client, notion_client)
+
+
+def create_bangumi_client(config: Config, http_cache: Optional["HttpCache"],
+                          client_class: Optional[type] = None) -> "BangumiClient":
+    """按配置创建Bangumi客户端
+    
+    Args:
+        config: 配置
+        http_cache: Bangumi HTTP响应缓存，可以为None
+        client_class: BangumiClient或AsyncBangumiClient，默认为BangumiClient
+        
+    Returns:
+        Bangumi客户端
+    """
+    if client_class is None:
+        from bangumi_client import BangumiClient
+        client_class = BangumiClient
+    return client_class(requests_per_second=config.bangumi_rate_limit,
+                        page_size=config.bangumi_page_size,
+                        max_workers=config.bangumi_max_workers,
+                        http_cache=http_cache,
+                        # 多种条目类型同时获取，连接池按类型数放大
+                        pool_size=config.bangumi_pool_size or config.bangumi_max_workers * len(config.subject_types),
+                        http2=config.enable_http2,
+                        keepalive_expiry=config.http_keepalive_expiry)
+
+
+def create_notion_service(config: Config, service_class: Optional[type] = None) -> "NotionService":
+    """按配置创建Notion服务，连接池大小默认与并发写入数相同
+    
+    Args:
+        config: 配置
+        service_class: NotionService或AsyncNotionService，默认为NotionService
+        
+    Returns:
+        Notion服务
+    """
+    if service_class is None:
+        from notion_service import NotionService
+        service_class = NotionService
+    return service_class(config.notion_token, config.notion_database_id,
+                         requests_per_second=config.notion_rate_limit,
+                         fingerprint_property=config.notion_fingerprint_property,
+                         pool_size=config.notion_pool_size or config.notion_max_workers,
+                         http2=config.enable_http2,
+                         keepalive_expiry=config.http_keepalive_expiry)
+
+
+def log_pool_stats(logger: logging.Logger, bangumi_client: "BangumiClient", notion_client: "NotionService") -> None:
+    """输出本次运行的连接池统计
+    
+    Args:
+        logger: 日志记录器
+        bangumi_client: Bangumi客户端
+        notion_client: Notion服务
+    """
+    logger.info(f"Bangumi连接池: {bangumi_client.pool_stats().summary()}")
+    logger.info(f"Notion连接池: {notion_client.pool_stats().summary()}")
+
+
+def create_http_cache(config: Config) -> Optional["HttpCache"]:
+    """按配置创建Bangumi HTTP响应缓存
+    
+    Args:
+        config: 配置
+        
+    Returns:
+        HTTP响应缓存，未启用时返回None
+    """
+    if not config.enable_http_cache:
+        return None
+    from http_cache import HttpCache
+    return HttpCache(config.http_cache_file, {
+        "collections": config.http_cache_collections_ttl,
+        "subjects": config.http_cache_subjects_ttl
+    })
+
+
+def report_metrics(config: Optional[Config], logger: logging.Logger) -> None:
+    """输出按端点汇总的请求统计，并按配置写入运行指标报告
+    
+    Args:
+        config: 配置，加载失败时为None
+        logger: 日志记录器
+    """
+    metrics = get_metrics()
+    lines = metrics.summary_lines()
+    if lines:
+        logger.info("\n=== 请求统计 ===")
+        for line in lines:
+            logger.info(line)
+    if config is None:
+        return
+    try:
+        metrics.write(config.metrics_file, config.metrics_prometheus_file)
+    except OSError as e:
+        # 写入指标失败不影响同步结果
+        logger.warning(f"写入运行指标失败: {e}")
+
+
+def check_resume(config: Config, args: argparse.Namespace) -> None:
+    """检查--resume能否用于本次运行
+    
+    Args:
+        config: 配置
+        args: 命令行参数
+        
+    Raises:
+        ConfigError: 未启用同步计划日志，或使用了不记录同步计划的流式同步、异步引擎
+    """
+    if not args.resume:
+        return
+    if not config.enable_journal:
+        raise ConfigError("--resume需要启用ENABLE_JOURNAL")
+    if args.stream or config.sync_engine == 'async':
+        raise ConfigError("--resume只支持线程引擎的非流式同步")
+
+
+def check_daemon(config: Config, args: argparse.Namespace) -> None:
+    """检查--daemon能否用于本次运行
+    
+    Args:
+        config: 配置
+        args: 命令行参数
+        
+    Raises:
+        ConfigError: 使用了异步引擎（异步客户端绑定在单个事件循环上，无法跨周期复用），或参数无效
+    """
+    if not args.daemon:
+        if args.interval is not None or args.max_cycles is not None:
+            raise ConfigError("--interval和--max-cycles只能与--daemon一起使用")
+        return
+    if config.sync_engine == 'async':
+        raise ConfigError("--daemon只支持线程引擎")
+    if args.max_cycles is not None and args.max_cycles < 1:
+        raise ConfigError(f"无效的--max-cycles值: {args.max_cycles}，必须大于0")
+    if not config.enable_state:
+        logger = logging.getLogger(__name__)
+        logger.warning("未启用ENABLE_STATE，常驻同步的每个周期都会全量扫描Notion")
+
+
+def check_config(config: Config, args: argparse.Namespace, logger: logging.Logger) -> None:
+    """--check-config：验证配置和多目标配置文件后输出摘要，不导入HTTP客户端也不访问API
+    
+    Args:
+        config: 已通过验证的配置
+        args: 命令行参数
+        logger: 日志记录器
+        
+    Raises:
+        ConfigError: 多目标配置文件或命令行参数组合无效
+    """
+    check_resume(config, args)
+    check_daemon(config, args)
+    targets = config.load_targets() if config.targets_file else [config]
+    for target in targets:
+        logger.info(f"目标 {target.target_name or 'default'}: {target.bangumi_username} -> {target.notion_database_id}"
+                    f"（同步状态: {target.sync_status}，引擎: {target.sync_engine}）")
+    logger.info(f"配置有效，共 {len(targets)} 个目标")
+
+
+def run_targets(config: Config, args: argparse.Namespace, logger: logging.Logger) -> bool:
+    """多目标模式：同步配置文件中的所有目标并汇总结果
+    
+    Args:
+        config: 全局配置
+        args: 命令行参数
+        logger: 日志记录器
+        
+    Returns:
+        是否所有目标都同步成功
+    """
+    from target_runner import TargetRunner
+    
+    targets = config.load_targets()
+    runner = TargetRunner(config, targets)
+    results = runner.run(dry_run=args.dry_run, stream=args.stream, full_resync=args.full_resync, resume=args.resume)
+    
+    success = log_target_results(logger, runner, results)
+    runner.log_pool_stats()
+    return success
+
+
+def log_target_results(logger: logging.Logger, runner: "TargetRunner", results: List["TargetResult"]) -> bool:
+    """输出每个目标的同步结果和汇总
+    
+    Args:
+        logger: 日志记录器
+        runner: TargetRunner
+        results: TargetRunner.run返回的目标结果
+        
+    Returns:
+        是否所有目标都同步成功
+    """
+    for target_result in results:
+        logger.info(f"\n=== 目标 {target_result.name} 同步结果（耗时 {target_result.elapsed:.1f} 秒）===")
+        if target_result.error is not None:
+            logger.error(f"同步失败: {target_result.error}")
+        else:
+            log_result(logger, target_result.result)
+    
+    if runner.http_cache is not None:
+        logger.info(f"Bangumi HTTP缓存: {runner.http_cache.summary()}")
+    succeeded = sum(1 for target_result in results if target_result.success)
+    logger.info(f"\n=== 多目标同步汇总: 成功 {succeeded} 个，失败 {len(results) - succeeded} 个 ===")
+    return succeeded == len(results)
+
+
+def run_daemon(config: Config, args: argparse.Namespace, logger: logging.Logger) -> None:
+    """常驻模式：客户端、本地状态和缓存只创建一次，按间隔循环同步
+    
+    第一个周期完整获取Bangumi收藏，之后每DAEMON_FULL_FETCH_CYCLES个周期完整获取一次，
+    启用增量获取时其余周期只获取水位线之后更新的收藏；Notion索引来自本地状态在内存中的副本，
+    由每个周期的写入结果直接更新。--full-resync和--resume只作用于第一个周期。
+    
+    Args:
+        config: 配置
+        args: 命令行参数
+        logger: 日志记录器
+    """
+    from daemon import SyncDaemon
+    
+    daemon = SyncDaemon(args.interval or config.daemon_interval, config.daemon_jitter,
+                        config.daemon_full_fetch_cycles, args.max_cycles)
+    
+    if config.targets_file:
+        from target_runner import TargetRunner
+        
+        runner = TargetRunner(config, config.load_targets(), persistent=True)
+        # 各目标配置的增量获取开关，每个周期在此基础上决定是否完整获取
+        incremental = {id(target): target.incremental_fetch for target in runner.targets}
+        
+        def run_targets_cycle(cycle: int, full_fetch: bool) -> None:
+            get_metrics().reset()
+            for target in runner.targets:
+                target.incremental_fetch = incremental[id(target)] and not full_fetch
+            try:
+                results = runner.run(dry_run=args.dry_run, stream=args.stream,
+                                     full_resync=args.full_resync and cycle == 0, resume=args.resume and cycle == 0)
+                log_target_results(logger, runner, results)
+            finally:
+                report_metrics(config, logger)
+        
+        try:
+            daemon.run(run_targets_cycle)
+        finally:
+            runner.log_pool_stats()
+            runner.close()
+            for cache in (runner.subject_cache, runner.episode_cache, runner.http_cache):
+                if cache is not None:
+                    cache.close()
+        return
+    
+    from episode_cache import EpisodeCache
+    from state_store import StateStore
+    from subject_cache import SubjectCache
+    from sync_journal import SyncJournal
+    from sync_manager import SyncManager
+    
+    state_store = StateStore(config.state_file) if config.enable_state else None
+    journal = SyncJournal(config.journal_file) if config.enable_journal else None
+    subject_cache = SubjectCache(config.subject_cache_file, config.subject_cache_finished_ttl_days,
+                                 config.subject_cache_airing_ttl_hours) if config.enable_enrich else None
+    episode_cache = EpisodeCache(config.episode_cache_file) if config.enable_episodes else None
+    http_cache = create_http_cache(config)
+    bangumi_client = create_bangumi_client(config, http_cache)
+    notion_client = create_notion_service(config)
+    incremental = config.incremental_fetch
+    
+    def run_cycle(cycle: int, full_fetch: bool) -> None:
+        get_metrics().reset()
+        config.incremental_fetch = incremental and not full_fetch
+        try:
+            sync_manager = SyncManager(bangumi_client, notion_client, config, state_store, subject_cache, journal,
+                                       episode_cache)
+            result = sync_manager.sync(dry_run=args.dry_run, stream=args.stream,
+                                       full_resync=args.full_resync and cycle == 0, resume=args.resume and cycle == 0)
+            get_metrics().record_sync(config.target_name or "default", result)
+            log_result(logger, result)
+        finally:
+            report_metrics(config, logger)
+    
+    try:
+        daemon.run(run_cycle)
+    finally:
+        log_pool_stats(logger, bangumi_client, notion_client)
+        for store in (state_store, journal, subject_cache, episode_cache, http_cache):
+            if store is not None:
+                store.close()
+
+
 def main() -> None:
     """主函数"""
     # 解析命令行参数
@@ -66,32 +441,77 @@ def main() -> None:
     logger.info("启动bangumi2notion同步工具")
     logger.debug(f"命令行参数: {args}")
     
+    config = None
     try:
         # 加载配置
-        config = Config()
+        config = Config(targets_file=args.targets)
+        if args.engine:
+            config.sync_engine = args.engine
+        if args.metrics_file:
+            config.metrics_file = args.metrics_file
         logger.debug(f"加载配置成功: {config}")
+        check_resume(config, args)
+        check_daemon(config, args)
         
-        # 初始化客户端
-        bangumi_client = BangumiClient()
-        notion_client = NotionService(config.notion_token, config.notion_database_id)
+        if args.check_config:
+            check_config(config, args, logger)
+            sys.exit(0)
         
-        # 初始化同步管理器
-        sync_manager = SyncManager(bangumi_client, notion_client, config)
+        if args.daemon:
+            run_daemon(config, args, logger)
+            logger.info("bangumi2notion同步工具执行完成")
+            sys.exit(0)
         
-        # 执行同步
-        result = sync_manager.sync(dry_run=args.dry_run)
+        if config.targets_file:
+            success = run_targets(config, args, logger)
+            logger.info("bangumi2notion同步工具执行完成")
+            sys.exit(0 if success else 1)
+        
+        import asyncio
+        from episode_cache import EpisodeCache
+        from state_store import StateStore
+        from subject_cache import SubjectCache
+        from sync_journal import SyncJournal
+        from sync_manager import SyncManager
+        
+        # 初始化本地状态存储、同步计划日志、条目详情缓存和剧集列表缓存
+        state_store = StateStore(config.state_file) if config.enable_state else None
+        journal = SyncJournal(config.journal_file) if config.enable_journal else None
+        subject_cache = SubjectCache(config.subject_cache_file, config.subject_cache_finished_ttl_days,
+                                     config.subject_cache_airing_ttl_hours) if config.enable_enrich else None
+        episode_cache = EpisodeCache(config.episode_cache_file) if config.enable_episodes else None
+        http_cache = create_http_cache(config)
+        
+        if config.sync_engine == 'async':
+            # 异步引擎始终边获取边写入，--stream不再需要
+            result = asyncio.run(run_async(config, args, state_store, subject_cache, http_cache, journal,
+                                           episode_cache))
+        else:
+            # 初始化客户端
+            bangumi_client = create_bangumi_client(config, http_cache)
+            notion_client = create_notion_service(config)
+            
+            # 初始化同步管理器
+            sync_manager = SyncManager(bangumi_client, notion_client, config, state_store, subject_cache, journal,
+                                       episode_cache)
+            
+            # 执行同步
+            try:
+                result = sync_manager.sync(dry_run=args.dry_run, stream=args.stream, full_resync=args.full_resync,
+                                           resume=args.resume)
+            finally:
+                log_pool_stats(logger, bangumi_client, notion_client)
         
         # 输出同步结果
+        get_metrics().record_sync(config.target_name or "default", result)
         logger.info("\n=== 同步结果统计 ===")
-        logger.info(f"Bangumi追番总数: {result['total_bangumi_items']}")
-        logger.info(f"Notion现有记录: {result['total_notion_items']}")
-        logger.info(f"新增记录数: {result['add_count']}")
-        logger.info(f"更新记录数: {result['update_count']}")
-        logger.info(f"删除记录数: {result['delete_count']}")
+        log_result(logger, result)
+        if http_cache is not None:
+            logger.info(f"Bangumi HTTP缓存: {http_cache.summary()}")
         logger.info("==================")
         
         logger.info("bangumi2notion同步工具执行完成")
-        sys.exit(0)
+        sys.exit(1 if result['failed_count'] else 0)
         
     except ConfigError as e:
         logger.error(f"配置错误: {e}")
@@ -99,18 +519,31 @@ def main() -> None:
     except BangumiAPIError as e:
         logger.error(f"Bangumi API错误: {e}")
         sys.exit(1)
+    except SchemaError as e:
+        logger.error(f"Notion数据库结构错误: {e}")
+        sys.exit(1)
     except NotionAPIError as e:
         logger.error(f"Notion API错误: {e}")
         sys.exit(1)
     except SyncError as e:
         logger.error(f"同步错误: {e}")
         sys.exit(1)
+    except StateError as e:
+        logger.error(f"本地状态错误: {e}")
+        sys.exit(1)
+    except CacheError as e:
+        logger.error(f"本地缓存错误: {e}")
+        sys.exit(1)
     except KeyboardInterrupt:
         logger.info("程序被用户中断")
         sys.exit(0)
     except Exception as e:
         logger.error(f"发生意外错误: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        # 常驻模式在每个周期结束时已经输出
+        if not args.check_config and not args.daemon:
+            report_metrics(config, logger)
 
 
 if __name__ == "__main__":
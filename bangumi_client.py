@@ -1,44 +1,187 @@
+import asyncio
+import threading
+import httpx
 import requests
-import time
 import logging
-from typing import Dict, List, Optional, Any
-from exceptions import BangumiAPIError
-from constants import BangumiConstants
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Generator, Iterator, List, Optional, Any, Set, Tuple
+from urllib.parse import urlparse
+from exceptions import BangumiAPIError, SyncCancelledError
+from constants import BangumiConstants, EpisodeConstants, HttpPoolConstants
+from http_cache import CachedResponse, HttpCache
+from http_pool import PoolStats, create_httpx_client, create_session, session_stats
+from metrics import endpoint_label
+from rate_limiter import RetryPolicy, async_call_with_retry, call_with_retry, get_token_bucket
 
 logger = logging.getLogger(__name__)
 
+# 单个API请求：(端点, 参数)
+Request = Tuple[str, Dict[str, Any]]
 
-class BangumiClient:
-    """Bangumi API客户端"""
+# 请求计划：每一步产出一批可以并发发送的请求，接收按相同顺序排列的响应，结束时返回结果。
+# 分页、合并和一致性检查都在计划中完成，同步和异步客户端只负责发送请求。
+RequestPlan = Generator[List[Request], List[Dict[str, Any]], Any]
+
+
+class BaseBangumiClient:
+    """Bangumi API客户端的公共部分：配置、限速、重试策略和HTTP响应缓存
+
+    BangumiClient和AsyncBangumiClient都继承此类，各自只实现发送请求的方法；
+    请求的构造、分页计划和数据解析由本模块中的函数完成。
+    """
+
+    # 没有HTTP状态码时视为可重试的异常类型
+    RETRYABLE_EXCEPTIONS: Tuple[type, ...] = ()
 
     def __init__(self,
                  timeout: int = BangumiConstants.DEFAULT_TIMEOUT,
                  retry_count: int = BangumiConstants.DEFAULT_RETRY_COUNT,
-                 retry_delay: int = BangumiConstants.DEFAULT_RETRY_DELAY):
+                 retry_delay: int = BangumiConstants.DEFAULT_RETRY_DELAY,
+                 requests_per_second: float = BangumiConstants.DEFAULT_REQUESTS_PER_SECOND,
+                 page_size: int = BangumiConstants.DEFAULT_LIMIT,
+                 max_workers: int = BangumiConstants.DEFAULT_MAX_WORKERS,
+                 http_cache: Optional[HttpCache] = None,
+                 pool_size: Optional[int] = None,
+                 http2: bool = True,
+                 keepalive_expiry: float = HttpPoolConstants.DEFAULT_KEEPALIVE_EXPIRY):
         """初始化客户端
 
         Args:
             timeout: 请求超时时间（秒）
             retry_count: 请求失败重试次数
             retry_delay: 初始重试延迟（秒）
+            requests_per_second: 每秒最多发起的请求数，0表示不限制
+            page_size: 分页获取追番记录时每页的条数
+            max_workers: 并发获取分页的最大线程数，1表示逐页串行获取
+            http_cache: 持久化的HTTP响应缓存，为None时每次都完整请求
+            pool_size: 连接池大小，为None时与max_workers相同；多个目标共享客户端时应相应增大
+            http2: 异步客户端在安装了h2时是否使用HTTP/2
+            keepalive_expiry: 异步客户端空闲长连接的保持时间（秒）
         """
         self.base_url = BangumiConstants.BASE_URL
         self.timeout = timeout
         self.retry_count = retry_count
         self.retry_delay = retry_delay
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.http_cache = http_cache
+        self.pool_size = pool_size or max_workers
+        self.http2 = http2
+        self.keepalive_expiry = keepalive_expiry
+        self._pool_stats = PoolStats()
+
+        self.bucket = get_token_bucket(urlparse(self.base_url).netloc, requests_per_second,
+                                       BangumiConstants.DEFAULT_BURST)
+        self.retry_policy = RetryPolicy(
+            retry_count,
+            retry_delay,
+            retryable_exceptions=self.RETRYABLE_EXCEPTIONS
+        )
+
+        self.session = self._create_session()
 
-        self.session = requests.Session()
-        self.session.headers.update({
+    def _create_session(self) -> Any:
+        """创建HTTP会话，由子类实现"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {
             "User-Agent": BangumiConstants.USER_AGENT,
             "Accept": "application/json"
-        })
-    
-    def _request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        }
+
+    @staticmethod
+    def _check_cancelled(cancel: Optional[threading.Event]) -> None:
+        """取消信号已设置时抛出SyncCancelledError"""
+        if cancel is not None and cancel.is_set():
+            raise SyncCancelledError("Bangumi数据获取已取消")
+
+    def parse_collection_data(self, collection: Dict[str, Any]) -> Dict[str, Any]:
+        """解析收藏数据，见模块函数parse_collection_data"""
+        return parse_collection_data(collection)
+
+    def _fresh_response(self, endpoint: str,
+                        params: Optional[Dict[str, Any]]) -> Tuple[Optional[CachedResponse], Optional[Dict[str, Any]]]:
+        """查找请求对应的缓存响应
+
+        Returns:
+            (缓存响应, 新鲜期内可直接使用的响应数据)，没有缓存时均为None
+        """
+        cached = self._cached_response(endpoint, params)
+        if cached is not None and self.http_cache.is_fresh(cached, endpoint):
+            logger.debug(f"使用缓存响应: {cached.key}")
+            return cached, cached.data()
+        return cached, None
+
+    def _read_response(self, endpoint: str, params: Optional[Dict[str, Any]],
+                       response: Any, cached: Optional[CachedResponse]) -> Dict[str, Any]:
+        """处理HTTP响应：304时使用缓存，否则检查状态码、解析并缓存响应
+
+        requests和httpx的响应对象接口相同，两种客户端共用此方法。
+        """
+        if response.status_code == 304 and cached is not None:
+            return self._revalidated(cached)
+        response.raise_for_status()
+        data = response.json()
+        self._cache_response(endpoint, params, response.headers, response.text)
+        return data
+
+    def _cached_response(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[CachedResponse]:
+        """读取请求对应的缓存响应，未启用缓存时返回None"""
+        if self.http_cache is None:
+            return None
+        return self.http_cache.get(HttpCache.cache_key(f"{self.base_url}{endpoint}", params))
+
+    def _revalidated(self, cached: CachedResponse) -> Dict[str, Any]:
+        """服务端返回304时刷新缓存并返回缓存的响应"""
+        logger.debug(f"响应未变化，使用缓存: {cached.key}")
+        self.http_cache.touch(cached.key)
+        return cached.data()
+
+    def _cache_response(self, endpoint: str, params: Optional[Dict[str, Any]],
+                        headers: Any, body: str) -> None:
+        """保存可以重新验证或仍有新鲜期的响应"""
+        if self.http_cache is None:
+            return
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified or self.http_cache.ttl(endpoint) > 0:
+            key = HttpCache.cache_key(f"{self.base_url}{endpoint}", params)
+            self.http_cache.put(key, etag, last_modified, body)
+
+    def _collections_plan(self, username: str, since: Optional[str],
+                          subject_type: str) -> RequestPlan:
+        """根据是否增量获取选择收藏的请求计划"""
+        if since:
+            return updated_collections_plan(username, self.page_size, since, subject_type)
+        return collections_plan(username, self.page_size, subject_type)
+
+
+class BangumiClient(BaseBangumiClient):
+    """Bangumi API客户端"""
+
+    RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def _create_session(self) -> requests.Session:
+        """创建HTTP会话，连接池大小与并发数匹配"""
+        return create_session(self.pool_size, self._headers())
+
+    def pool_stats(self) -> PoolStats:
+        """返回连接池统计"""
+        return session_stats(self.session)
+
+    def _request(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                 cached: Optional[CachedResponse] = None) -> Dict[str, Any]:
         """发送API请求
 
         Args:
             endpoint: API端点
             params: 请求参数
+            cached: 已过期的缓存响应，存在时发送条件请求
 
         Returns:
             响应数据
@@ -47,22 +190,22 @@ class BangumiClient:
             BangumiAPIError: API请求失败
         """
         url = f"{self.base_url}{endpoint}"
-        
+
         try:
             logger.debug(f"发送请求: {url}, 参数: {params}")
             response = self.session.get(
                 url,
                 params=params,
+                headers=cached.conditional_headers() if cached else None,
                 timeout=self.timeout
             )
-            response.raise_for_status()
-            return response.json()
+            return self._read_response(endpoint, params, response, cached)
         except requests.exceptions.RequestException as e:
             logger.error(f"API请求失败: {e}")
             raise BangumiAPIError(f"Bangumi API请求失败: {url}", e) from e
-    
+
     def _retry_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """带重试的请求
+        """带限速和重试的请求，新鲜期内的缓存直接返回，不占用令牌
 
         Args:
             endpoint: API端点
@@ -72,118 +215,747 @@ class BangumiClient:
             响应数据
 
         Raises:
-            BangumiAPIError: 多次重试后请求仍然失败
+            BangumiAPIError: 遇到不可重试的错误或多次重试后请求仍然失败
         """
-        for attempt in range(self.retry_count):
+        cached, data = self._fresh_response(endpoint, params)
+        if data is not None:
+            return data
+        return call_with_retry(self._request, endpoint, params, cached,
+                               bucket=self.bucket,
+                               policy=self.retry_policy,
+                               description=endpoint,
+                               endpoint=endpoint_label("bangumi", endpoint))
+
+    def _fetch(self, request: Request, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """发送单个请求，取消信号已设置时不再发送"""
+        self._check_cancelled(cancel)
+        return self._retry_request(*request)
+
+    def _fetch_batch(self, batch: List[Request],
+                     cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """按max_workers并发发送一批请求，按请求顺序返回响应"""
+        if len(batch) == 1 or self.max_workers <= 1:
+            return [self._fetch(request, cancel) for request in batch]
+        logger.debug(f"并发发送 {len(batch)} 个请求，并发数: {self.max_workers}")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bangumi-fetch") as pool:
+            # map按提交顺序返回结果，保证分页顺序确定
+            return list(pool.map(lambda request: self._fetch(request, cancel), batch))
+
+    def _run_plan(self, plan: RequestPlan, cancel: Optional[threading.Event] = None) -> Any:
+        """执行请求计划，返回计划的结果"""
+        try:
+            batch = next(plan)
+            while True:
+                batch = plan.send(self._fetch_batch(batch, cancel))
+        except StopIteration as stop:
+            return stop.value
+
+    def _fetch_each(self, subject_ids: List[int], fetch: Callable[[int], Any], what: str,
+                    cancel: Optional[threading.Event] = None) -> Dict[int, Any]:
+        """并发获取每个条目的数据，单个条目失败只记录警告"""
+        def fetch_one(subject_id: int) -> Any:
+            self._check_cancelled(cancel)
             try:
-                return self._request(endpoint, params)
+                return fetch(subject_id)
             except BangumiAPIError as e:
-                if attempt == self.retry_count - 1:
-                    raise
-                
-                delay = self.retry_delay * (2 ** attempt)
-                logger.warning(f"请求失败，将在 {delay} 秒后重试 ({attempt + 1}/{self.retry_count})")
-                time.sleep(delay)
-        
-        # 理论上不会执行到这里
-        raise BangumiAPIError(f"多次重试后请求仍然失败: {endpoint}")
-    
-    def get_user_collections(self, username: str) -> List[Dict[str, Any]]:
+                logger.warning(f"获取{what}失败，跳过: {subject_id}: {e}")
+                return None
+
+        logger.info(f"获取 {len(subject_ids)} 个条目的{what}，并发数: {self.max_workers}")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bangumi-subject") as pool:
+            results = list(pool.map(fetch_one, subject_ids))
+        return successful_results(subject_ids, results)
+
+    def get_user_collections(self, username: str, since: Optional[str] = None,
+                             cancel: Optional[threading.Event] = None,
+                             subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE,
+                             inconsistent: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
         """获取用户追番记录
 
+        先获取第一页得到总数，再按max_workers并发获取其余分页。
+        若获取期间记录在分页之间发生移动（总数变化或出现重复/缺失），
+        会重新获取一次；仍不一致时按subject_id去重并保持offset顺序，保证结果确定。
+
         Args:
             username: Bangumi用户名
+            since: 增量获取的时间水位线（ISO格式），只获取此后更新过的记录
+            cancel: 取消信号，设置后尚未发送的分页请求不再发送
+            subject_type: 条目类型，如anime、book
+            inconsistent: 重试后分页数据仍不一致时加入subject_type，此时结果可能缺少记录，不能用于判断删除
 
         Returns:
             用户追番记录列表
         """
-        logger.info(f"开始获取 {username} 的Bangumi追番记录")
-
-        endpoint = f"/users/{username}/collections"
-        params = {
-            "type": BangumiConstants.ANIME_TYPE,
-            "limit": BangumiConstants.DEFAULT_LIMIT,
-            "offset": 0
-        }
-        
-        collections = []
-        total = 0
-        page = 0
-        
-        while True:
-            page += 1
-            logger.debug(f"获取第 {page} 页追番记录")
-            
-            data = self._retry_request(endpoint, params)
-            page_collections = data.get("data", [])
-            collections.extend(page_collections)
-            
-            # 获取总数
-            if not total:
-                total = data.get("total", 0)
-                logger.info(f"总共找到 {total} 条追番记录")
-            
-            # 检查是否还有更多数据
-            offset = params["offset"] + params["limit"]
-            if offset >= total or not page_collections:
-                break
-                
-            params["offset"] = offset
-        
-        logger.info(f"成功获取 {username} 的 {len(collections)} 条追番记录")
+        collections, consistent = self._run_plan(self._collections_plan(username, since, subject_type), cancel)
+        report_consistency(consistent, subject_type, inconsistent)
         return collections
-    
+
+    def iter_collection_pages(self, username: str, since: Optional[str] = None,
+                              cancel: Optional[threading.Event] = None,
+                              subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE,
+                              inconsistent: Optional[Set[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """以生成器方式逐页获取并解析追番记录
+
+        后续分页最多提前max_workers页并发获取，按offset顺序产出，
+        使调用方可以在下载剩余分页的同时处理已到达的数据。
+        增量获取只需要少量分页，获取完成后一次产出。
+        已产出的分页无法重新获取，分页数据不一致时只能通过inconsistent报告，见CollectionStream。
+
+        Args:
+            username: Bangumi用户名
+            since: 增量获取的时间水位线（ISO格式），只获取此后更新过的记录
+            cancel: 取消信号，设置后尚未发送的分页请求不再发送
+            subject_type: 条目类型，如anime、book
+            inconsistent: 分页数据不一致时加入subject_type，在生成器结束时报告
+
+        Yields:
+            每页解析后的追番记录列表
+        """
+        if since:
+            collections = self.get_user_collections(username, since, cancel, subject_type, inconsistent)
+            yield parse_collection_page({"data": collections}, set())
+            return
+
+        stream = CollectionStream(username, self.page_size, subject_type)
+        parsed, remaining = stream.start(self._fetch(stream.first_request(), cancel))
+        yield parsed
+
+        remaining = iter(remaining)
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bangumi-fetch")
+        try:
+            pending = deque(pool.submit(self._fetch, request, cancel)
+                            for request in islice(remaining, self.max_workers))
+            while pending:
+                page = pending.popleft().result()
+                for request in islice(remaining, 1):
+                    pending.append(pool.submit(self._fetch, request, cancel))
+                yield stream.accept(page)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        report_consistency(stream.finish(), subject_type, inconsistent)
+
     def get_subject_detail(self, subject_id: int) -> Dict[str, Any]:
         """获取番剧详细信息
-        
+
         Args:
             subject_id: 番剧ID
-            
+
         Returns:
             番剧详细信息
         """
         logger.debug(f"获取番剧详情: {subject_id}")
-        endpoint = f"/subjects/{subject_id}"
-        return self._retry_request(endpoint)
-    
-    def parse_collection_data(self, collection: Dict[str, Any]) -> Dict[str, Any]:
-        """解析收藏数据
+        return self._retry_request(*subject_request(subject_id))
+
+    def get_subject_details(self, subject_ids: List[int],
+                            cancel: Optional[threading.Event] = None) -> Dict[int, Dict[str, Any]]:
+        """并发获取多个条目的详情，最多max_workers个请求同时进行
+
+        单个条目获取失败（如条目已删除）只记录警告，不影响其他条目。
 
         Args:
-            collection: 原始收藏数据
+            subject_ids: 条目ID列表
+            cancel: 取消信号，设置后尚未发送的请求不再发送
 
         Returns:
-            解析后的收藏数据
+            获取成功的条目详情，key为subject_id
         """
-        subject = collection.get("subject", {})
-        collection_info = collection.get("collection", {})
+        return self._fetch_each(subject_ids, self.get_subject_detail, "番剧详情", cancel)
+
+    def get_subject_episodes(self, subject_id: int) -> List[Dict[str, Any]]:
+        """获取条目的全部正片剧集，超过一页时逐页获取
 
-        watch_status = collection_info.get("status")
-        status = BangumiConstants.WATCHING_STATUS_MAP.get(watch_status)
+        Args:
+            subject_id: 条目ID
 
-        air_status = subject.get("air_status")
-        air_status_text = BangumiConstants.AIR_STATUS_MAP.get(air_status)
+        Returns:
+            /episodes返回的原始剧集列表
+        """
+        logger.debug(f"获取剧集列表: {subject_id}")
+        return self._run_plan(episodes_plan(subject_id))
 
-        cover = subject.get("images", {}).get("large")
-        if cover and cover.startswith("//"):
-            cover = f"https:{cover}"
+    def get_episodes(self, subject_ids: List[int],
+                     cancel: Optional[threading.Event] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """并发获取多个条目的剧集列表，最多max_workers个条目同时进行
 
-        subject_id = subject.get("id")
-        bangumi_url = f"https://bangumi.tv/subject/{subject_id}" if subject_id else ""
+        单个条目获取失败只记录警告，不影响其他条目。
 
-        return {
-            "subject_id": subject_id,
-            "title": subject.get("name"),
-            "title_cn": subject.get("name_cn"),
-            "cover": cover,
-            "score": subject.get("score"),
-            "status": status,
-            "type": subject.get("type"),
-            "ep_status": collection_info.get("ep_status", 0),
-            "total_episodes": subject.get("eps"),
-            "air_date": subject.get("air_date"),
-            "end_date": subject.get("end_date"),
-            "official_site": subject.get("official_site"),
-            "bangumi_url": bangumi_url,
-            "air_status": air_status_text
+        Args:
+            subject_ids: 条目ID列表
+            cancel: 取消信号，设置后尚未开始的条目不再获取
+
+        Returns:
+            获取成功的原始剧集列表，key为subject_id
+        """
+        return self._fetch_each(subject_ids, self.get_subject_episodes, "剧集列表", cancel)
+
+
+class AsyncBangumiClient(BaseBangumiClient):
+    """基于httpx.AsyncClient的异步Bangumi API客户端
+
+    公开方法与BangumiClient相同，只是发送请求的方法为协程；
+    令牌桶与同步客户端共享，两种客户端同时使用时总速率仍受限制。
+    """
+
+    RETRYABLE_EXCEPTIONS = (httpx.TransportError,)
+
+    def _create_session(self) -> httpx.AsyncClient:
+        """创建异步HTTP会话，连接池大小与并发数匹配"""
+        return create_httpx_client(self.pool_size, self._pool_stats, asynchronous=True, http2=self.http2,
+                                   keepalive_expiry=self.keepalive_expiry,
+                                   headers=self._headers(), timeout=self.timeout)
+
+    def pool_stats(self) -> PoolStats:
+        """返回连接池统计"""
+        return self._pool_stats
+
+    async def __aenter__(self) -> "AsyncBangumiClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭HTTP会话"""
+        await self.session.aclose()
+
+    async def _request(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                       cached: Optional[CachedResponse] = None) -> Dict[str, Any]:
+        """发送API请求
+
+        Args:
+            endpoint: API端点
+            params: 请求参数
+            cached: 已过期的缓存响应，存在时发送条件请求
+
+        Returns:
+            响应数据
+
+        Raises:
+            BangumiAPIError: API请求失败
+        """
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            logger.debug(f"发送请求: {url}, 参数: {params}")
+            response = await self.session.get(url, params=params,
+                                              headers=cached.conditional_headers() if cached else None)
+            return self._read_response(endpoint, params, response, cached)
+        except httpx.HTTPError as e:
+            logger.error(f"API请求失败: {e}")
+            raise BangumiAPIError(f"Bangumi API请求失败: {url}", e) from e
+
+    async def _retry_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """带限速和重试的请求，新鲜期内的缓存直接返回，不占用令牌"""
+        cached, data = self._fresh_response(endpoint, params)
+        if data is not None:
+            return data
+        return await async_call_with_retry(self._request, endpoint, params, cached,
+                                           bucket=self.bucket,
+                                           policy=self.retry_policy,
+                                           description=endpoint,
+                                           endpoint=endpoint_label("bangumi", endpoint))
+
+    async def _fetch(self, request: Request, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """发送单个请求，取消信号已设置时不再发送"""
+        self._check_cancelled(cancel)
+        return await self._retry_request(*request)
+
+    async def _fetch_batch(self, batch: List[Request],
+                           cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """最多max_workers个请求同时进行地发送一批请求，按请求顺序返回响应"""
+        if len(batch) == 1:
+            return [await self._fetch(batch[0], cancel)]
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch(request: Request) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._fetch(request, cancel)
+
+        logger.debug(f"并发发送 {len(batch)} 个请求，并发数: {self.max_workers}")
+        return list(await asyncio.gather(*(fetch(request) for request in batch)))
+
+    async def _run_plan(self, plan: RequestPlan, cancel: Optional[threading.Event] = None) -> Any:
+        """执行请求计划，返回计划的结果"""
+        try:
+            batch = next(plan)
+            while True:
+                batch = plan.send(await self._fetch_batch(batch, cancel))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _fetch_each(self, subject_ids: List[int], fetch: Callable[[int], Any], what: str,
+                          cancel: Optional[threading.Event] = None) -> Dict[int, Any]:
+        """并发获取每个条目的数据，单个条目失败只记录警告"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch_one(subject_id: int) -> Any:
+            async with semaphore:
+                self._check_cancelled(cancel)
+                try:
+                    return await fetch(subject_id)
+                except BangumiAPIError as e:
+                    logger.warning(f"获取{what}失败，跳过: {subject_id}: {e}")
+                    return None
+
+        logger.info(f"获取 {len(subject_ids)} 个条目的{what}，并发数: {self.max_workers}")
+        results = await asyncio.gather(*(fetch_one(subject_id) for subject_id in subject_ids))
+        return successful_results(subject_ids, results)
+
+    async def get_user_collections(self, username: str, since: Optional[str] = None,
+                                   cancel: Optional[threading.Event] = None,
+                                   subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE,
+                                   inconsistent: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """获取用户追番记录，行为与BangumiClient.get_user_collections一致"""
+        collections, consistent = await self._run_plan(self._collections_plan(username, since, subject_type), cancel)
+        report_consistency(consistent, subject_type, inconsistent)
+        return collections
+
+    async def iter_collection_pages(self, username: str, since: Optional[str] = None,
+                                    cancel: Optional[threading.Event] = None,
+                                    subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE,
+                                    inconsistent: Optional[Set[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """以异步生成器方式逐页获取并解析追番记录，行为与BangumiClient.iter_collection_pages一致"""
+        if since:
+            collections = await self.get_user_collections(username, since, cancel, subject_type, inconsistent)
+            yield parse_collection_page({"data": collections}, set())
+            return
+
+        stream = CollectionStream(username, self.page_size, subject_type)
+        parsed, remaining = stream.start(await self._fetch(stream.first_request(), cancel))
+        yield parsed
+
+        remaining = iter(remaining)
+        pending = deque(asyncio.ensure_future(self._fetch(request, cancel))
+                        for request in islice(remaining, self.max_workers))
+        try:
+            while pending:
+                page = await pending.popleft()
+                for request in islice(remaining, 1):
+                    pending.append(asyncio.ensure_future(self._fetch(request, cancel)))
+                yield stream.accept(page)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        report_consistency(stream.finish(), subject_type, inconsistent)
+
+    async def get_subject_detail(self, subject_id: int) -> Dict[str, Any]:
+        """获取番剧详细信息"""
+        logger.debug(f"获取番剧详情: {subject_id}")
+        return await self._retry_request(*subject_request(subject_id))
+
+    async def get_subject_details(self, subject_ids: List[int],
+                                  cancel: Optional[threading.Event] = None) -> Dict[int, Dict[str, Any]]:
+        """并发获取多个条目的详情，最多max_workers个请求同时进行"""
+        return await self._fetch_each(subject_ids, self.get_subject_detail, "番剧详情", cancel)
+
+    async def get_subject_episodes(self, subject_id: int) -> List[Dict[str, Any]]:
+        """获取条目的全部正片剧集，超过一页时逐页获取"""
+        logger.debug(f"获取剧集列表: {subject_id}")
+        return await self._run_plan(episodes_plan(subject_id))
+
+    async def get_episodes(self, subject_ids: List[int],
+                           cancel: Optional[threading.Event] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """并发获取多个条目的剧集列表，最多max_workers个条目同时进行"""
+        return await self._fetch_each(subject_ids, self.get_subject_episodes, "剧集列表", cancel)
+
+
+def collection_request(username: str, offset: int, page_size: int,
+                       subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE) -> Request:
+    """构造获取单页追番记录的请求，返回(端点, 参数)"""
+    endpoint = f"/users/{username}/collections"
+    params = {
+        "subject_type": BangumiConstants.SUBJECT_TYPE_MAP[subject_type],
+        "limit": page_size,
+        "offset": offset
+    }
+    logger.debug(f"获取{subject_type}收藏: offset={offset}, limit={page_size}")
+    return endpoint, params
+
+
+def subject_request(subject_id: int) -> Request:
+    """构造获取条目详情的请求，返回(端点, 参数)"""
+    return f"/subjects/{subject_id}", None
+
+
+def episodes_request(subject_id: int, offset: int) -> Request:
+    """构造获取单页正片剧集的请求，返回(端点, 参数)"""
+    params = {
+        "subject_id": subject_id,
+        "type": EpisodeConstants.MAIN_EPISODE_TYPE,
+        "limit": EpisodeConstants.PAGE_LIMIT,
+        "offset": offset
+    }
+    return "/episodes", params
+
+
+def remaining_offsets(first_page: Dict[str, Any], page_size: int) -> List[int]:
+    """根据第一页的总数计算其余分页的偏移量，第一页为空时不再翻页"""
+    if not first_page.get("data"):
+        return []
+    return list(range(page_size, first_page.get("total", 0), page_size))
+
+
+def collections_plan(username: str, page_size: int,
+                     subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE) -> RequestPlan:
+    """获取一种条目类型全部收藏的请求计划
+
+    先获取第一页得到总数，再一次发出其余分页的请求。若获取期间记录在分页之间
+    发生移动（总数变化或出现重复/缺失），会重新获取；仍不一致时按subject_id
+    去重并保持offset顺序，保证结果确定。
+
+    Args:
+        username: Bangumi用户名
+        page_size: 每页的条数
+        subject_type: 条目类型，如anime、book
+
+    Returns:
+        计划的结果为(原始追番记录列表, 分页数据是否一致)
+    """
+    logger.info(f"开始获取 {username} 的Bangumi {subject_type} 收藏")
+
+    for attempt in range(1, BangumiConstants.PAGINATION_CONSISTENCY_RETRIES + 2):
+        first_page = (yield [collection_request(username, 0, page_size, subject_type)])[0]
+        logger.info(f"总共找到 {first_page.get('total', 0)} 条追番记录")
+
+        pages = [first_page]
+        offsets = remaining_offsets(first_page, page_size)
+        if offsets:
+            logger.debug(f"获取剩余 {len(offsets)} 页追番记录")
+            pages += yield [collection_request(username, offset, page_size, subject_type) for offset in offsets]
+
+        collections, consistent = merge_collection_pages(pages)
+        if consistent:
+            break
+        if attempt <= BangumiConstants.PAGINATION_CONSISTENCY_RETRIES:
+            logger.warning(f"检测到追番记录在分页获取期间发生变化，重新获取 ({attempt}/{BangumiConstants.PAGINATION_CONSISTENCY_RETRIES})")
+        else:
+            logger.warning("追番记录分页数据仍不一致，已按subject_id去重")
+
+    logger.info(f"成功获取 {username} 的 {len(collections)} 条 {subject_type} 收藏")
+    return collections, consistent
+
+
+def updated_collections_plan(username: str, page_size: int, since: str,
+                             subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE) -> RequestPlan:
+    """增量获取收藏的请求计划，按更新时间从新到旧逐页获取，遇到早于水位线的记录即停止翻页
+
+    Bangumi收藏接口默认按updated_at倒序返回，因此无需获取剩余分页。
+
+    Args:
+        username: Bangumi用户名
+        page_size: 每页的条数
+        since: 时间水位线（ISO格式）
+        subject_type: 条目类型
+
+    Returns:
+        计划的结果为(更新时间不早于水位线的原始追番记录, True)，增量获取不检查分页一致性
+    """
+    logger.info(f"开始增量获取 {username} 在 {since} 之后更新的Bangumi {subject_type} 收藏")
+    mark = parse_timestamp(since)
+    collections = []
+    offset = 0
+    while True:
+        page = (yield [collection_request(username, offset, page_size, subject_type)])[0]
+        updated, reached_mark = filter_updated(page, mark)
+        collections.extend(updated)
+
+        offset += page_size
+        if reached_mark or not page.get("data") or offset >= page.get("total", 0):
+            logger.debug(f"增量获取在 offset={offset} 处停止")
+            break
+
+    logger.info(f"成功增量获取 {username} 的 {len(collections)} 条 {subject_type} 收藏")
+    return collections, True
+
+
+def episodes_plan(subject_id: int) -> RequestPlan:
+    """获取条目全部正片剧集的请求计划，超过一页时逐页获取
+
+    Returns:
+        计划的结果为/episodes返回的原始剧集列表
+    """
+    episodes = []
+    while True:
+        page = (yield [episodes_request(subject_id, len(episodes))])[0]
+        data = page.get("data") or []
+        episodes.extend(data)
+        if not data or len(episodes) >= page.get("total", 0):
+            return episodes
+
+
+def filter_updated(page: Dict[str, Any], mark: datetime) -> Tuple[List[Dict[str, Any]], bool]:
+    """筛选分页中更新时间不早于水位线的记录
+
+    Returns:
+        (水位线之后更新的记录, 是否已到达水位线)
+    """
+    updated = []
+    for collection in page.get("data", []):
+        updated_at = parse_timestamp(collection.get("updated_at"))
+        if updated_at is not None and updated_at < mark:
+            return updated, True
+        updated.append(collection)
+    return updated, False
+
+
+def merge_collection_pages(pages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], bool]:
+    """合并分页结果并检查一致性
+
+    Args:
+        pages: 按offset顺序排列的分页响应
+
+    Returns:
+        (去重后的追番记录列表, 分页数据是否一致)
+    """
+    total = pages[0].get("total", 0)
+    consistent = all(page.get("total", 0) == total for page in pages)
+
+    collections = []
+    seen = set()
+    for page in pages:
+        for collection in page.get("data", []):
+            key = collection_key(collection)
+            if key in seen:
+                consistent = False
+                continue
+            seen.add(key)
+            collections.append(collection)
+
+    if len(collections) != total:
+        consistent = False
+    return collections, consistent
+
+
+def parse_collection_page(page: Dict[str, Any], seen: set) -> List[Dict[str, Any]]:
+    """解析单页追番记录，跳过已出现过的记录"""
+    parsed = []
+    for collection in page.get("data", []):
+        key = collection_key(collection)
+        if key in seen:
+            continue
+        seen.add(key)
+        parsed.append(parse_collection_data(collection))
+    return parsed
+
+
+def collection_key(collection: Dict[str, Any]) -> Any:
+    """返回收藏记录的唯一标识"""
+    return collection.get("subject", {}).get("id") or collection.get("subject_id")
+
+
+def report_consistency(consistent: bool, subject_type: str, inconsistent: Optional[Set[str]]) -> None:
+    """分页数据不一致时将条目类型加入调用方提供的集合"""
+    if not consistent and inconsistent is not None:
+        inconsistent.add(subject_type)
+
+
+def successful_results(subject_ids: List[int], results: List[Any]) -> Dict[int, Any]:
+    """按subject_id整理并发获取的结果，去掉获取失败（为None）的条目"""
+    return {subject_id: result for subject_id, result in zip(subject_ids, results) if result is not None}
+
+
+class CollectionStream:
+    """流式获取一种条目类型收藏时的分页状态，与发送请求的方式无关
+
+    客户端先发送first_request，把响应交给start，得到第一页的解析结果和其余分页的请求；
+    再按offset顺序把其余分页的响应交给accept，最后调用finish。已产出的记录无法重新获取，
+    因此分页间移动的记录按subject_id去重；总数变化、出现重复或最终条数与总数不符时
+    consistent为False，说明可能漏掉了在分页之间移动的记录。
+    """
+
+    def __init__(self, username: str, page_size: int,
+                 subject_type: str = BangumiConstants.DEFAULT_SUBJECT_TYPE):
+        self.username = username
+        self.page_size = page_size
+        self.subject_type = subject_type
+        self.total = 0
+        self.count = 0
+        self.consistent = True
+        self._seen = set()
+
+    def first_request(self) -> Request:
+        """第一页的请求"""
+        logger.info(f"开始流式获取 {self.username} 的Bangumi {self.subject_type} 收藏")
+        return collection_request(self.username, 0, self.page_size, self.subject_type)
+
+    def start(self, first_page: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Request]]:
+        """处理第一页
+
+        Returns:
+            (第一页解析后的追番记录, 其余分页的请求)
+        """
+        self.total = first_page.get("total", 0)
+        logger.info(f"总共找到 {self.total} 条追番记录")
+        requests_ = [collection_request(self.username, offset, self.page_size, self.subject_type)
+                     for offset in remaining_offsets(first_page, self.page_size)]
+        return self.accept(first_page), requests_
+
+    def accept(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """处理后续分页，返回解析后的追番记录"""
+        if page.get("total", 0) != self.total:
+            logger.warning(f"检测到追番记录在分页获取期间发生变化: 总数 {self.total} -> {page.get('total', 0)}")
+            self.consistent = False
+        parsed = parse_collection_page(page, self._seen)
+        if len(parsed) != len(page.get("data", [])):
+            logger.warning(f"检测到追番记录在分页获取期间发生移动: 跳过 {len(page.get('data', [])) - len(parsed)} 条重复记录")
+            self.consistent = False
+        self.count += len(parsed)
+        return parsed
+
+    def finish(self) -> bool:
+        """全部分页处理完成
+
+        Returns:
+            分页数据是否一致
+        """
+        if self.count != self.total:
+            logger.warning(f"流式获取的追番记录数 {self.count} 与总数 {self.total} 不符")
+            self.consistent = False
+        logger.info(f"成功流式获取 {self.username} 的 {self.count} 条 {self.subject_type} 收藏")
+        return self.consistent
+
+
+def parse_collection_data(collection: Dict[str, Any]) -> Dict[str, Any]:
+    """解析收藏数据
+
+    Args:
+        collection: 原始收藏数据
+
+    Returns:
+        解析后的收藏数据
+    """
+    subject = collection.get("subject", {})
+    collection_info = collection.get("collection", {})
+
+    watch_status = collection_info.get("status")
+    status = BangumiConstants.WATCHING_STATUS_MAP.get(watch_status)
+
+    air_status = subject.get("air_status")
+    air_status_text = BangumiConstants.AIR_STATUS_MAP.get(air_status)
+
+    cover = subject.get("images", {}).get("large")
+    if cover and cover.startswith("//"):
+        cover = f"https:{cover}"
+
+    subject_id = subject.get("id")
+    bangumi_url = f"https://bangumi.tv/subject/{subject_id}" if subject_id else ""
+
+    return {
+        "subject_id": subject_id,
+        "title": subject.get("name"),
+        "title_cn": subject.get("name_cn"),
+        "cover": cover,
+        "score": subject.get("score"),
+        "status": status,
+        "type": subject.get("type"),
+        "ep_status": collection_info.get("ep_status", 0),
+        "total_episodes": subject.get("eps"),
+        "air_date": subject.get("air_date"),
+        "end_date": subject.get("end_date"),
+        "official_site": subject.get("official_site"),
+        "bangumi_url": bangumi_url,
+        "air_status": air_status_text,
+        "updated_at": collection.get("updated_at")
+    }
+
+
+def parse_subject_detail(detail: Dict[str, Any]) -> Dict[str, Any]:
+    """从条目详情中提取补充字段
+
+    Args:
+        detail: /subjects/{id}返回的条目详情
+
+    Returns:
+        补充字段：标签、制作公司、评分人数和简介
+    """
+    # Notion多选选项名中不能包含逗号
+    tags = [tag.get("name", "").replace(",", " ").strip() for tag in detail.get("tags") or []]
+    tags = list(dict.fromkeys(tag for tag in tags if tag))[:BangumiConstants.MAX_TAGS]
+
+    studio = None
+    for item in detail.get("infobox") or []:
+        if item.get("key") in BangumiConstants.STUDIO_INFOBOX_KEYS:
+            value = item.get("value")
+            if isinstance(value, list):
+                value = "、".join(entry.get("v", "") for entry in value if entry.get("v"))
+            studio = value or None
+            break
+
+    return {
+        "tags": tags,
+        "studio": studio,
+        "rating_count": (detail.get("rating") or {}).get("total"),
+        "summary": (detail.get("summary") or "").strip() or None
+    }
+
+
+def parse_episodes(episodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """从剧集列表中提取需要缓存的字段，按集数排序
+
+    Args:
+        episodes: /episodes返回的原始剧集列表
+
+    Returns:
+        剧集列表，每项包含集数、标题和播出日期
+    """
+    parsed = [
+        {
+            "sort": episode.get("sort"),
+            "name": episode.get("name_cn") or episode.get("name") or None,
+            "airdate": episode.get("airdate") or None
         }
+        for episode in episodes
+        if episode.get("type", EpisodeConstants.MAIN_EPISODE_TYPE) == EpisodeConstants.MAIN_EPISODE_TYPE
+    ]
+    return sorted(parsed, key=lambda episode: episode["sort"] or 0)
+
+
+def episode_progress(episodes: List[Dict[str, Any]], ep_status: int) -> Dict[str, Any]:
+    """根据剧集列表和已观看集数生成剧集同步字段
+
+    收藏只记录已观看的正片集数，这里按集数顺序将前ep_status集视为已观看。
+
+    Args:
+        episodes: parse_episodes返回的剧集列表
+        ep_status: 已观看集数
+
+    Returns:
+        剧集同步字段：每集一行的观看状态和播出日期，以及下一集未观看剧集的播出日期
+    """
+    lines = []
+    next_episode_date = None
+    for index, episode in enumerate(episodes):
+        watched = index < (ep_status or 0)
+        if not watched and next_episode_date is None:
+            next_episode_date = episode["airdate"]
+        mark = EpisodeConstants.WATCHED_MARK if watched else EpisodeConstants.UNWATCHED_MARK
+        sort = f"{episode['sort']:g}" if isinstance(episode["sort"], (int, float)) else "?"
+        line = f"{mark} 第{sort}话 {episode['airdate'] or '未定'}"
+        lines.append(f"{line} {episode['name']}" if episode["name"] else line)
+    return {
+        "episodes": "\n".join(lines) or None,
+        "next_episode_date": next_episode_date
+    }
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """解析Bangumi返回的ISO时间戳
+
+    Args:
+        value: ISO格式时间字符串，兼容结尾为Z的UTC时间
+
+    Returns:
+        带时区的datetime，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"无法解析时间戳: {value}")
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -0,0 +1,165 @@
+"""Notion索引加载基准测试
+
+对比全量查询（不带过滤器、返回全部属性）与按需查询（最大分页、只返回对比需要的属性、
+按观看状态在服务端过滤）在模拟的Notion API上传输的字节数和耗时。
+
+用法:
+    python -m benchmarks.bench_notion_index [--pages 2000] [--extra-properties 10] [--status watching]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import NotionConstants  # noqa: E402
+from notion_service import NotionService  # noqa: E402
+
+DATABASE_ID = "bench-database"
+STATUSES = list(NotionConstants.WATCHING_STATUS_MAP.values())
+
+
+def build_schema(extra_properties: int) -> Dict[str, Dict[str, Any]]:
+    """构造数据库属性定义，除同步用的属性外还包含用户自行添加的属性"""
+    schema = {
+        "标题": "title", "评分": "number", "观看状态": "select", "播出状态": "select",
+        "已观看集数": "number", "总集数": "number", "开播日期": "date", "完结日期": "date",
+        "Bangumi链接": "url", "最后更新时间": "date"
+    }
+    schema.update({f"笔记{i}": "rich_text" for i in range(extra_properties)})
+    return {name: {"id": f"p{i}", "name": name, "type": kind} for i, (name, kind) in enumerate(schema.items())}
+
+
+def build_value(kind: str, subject_id: int, name: str) -> Dict[str, Any]:
+    """构造单个属性值"""
+    if kind == "title":
+        text = f"番剧{subject_id}"
+        return {"title": [{"type": "text", "text": {"content": text, "link": None}, "plain_text": text,
+                           "annotations": {"bold": False, "italic": False, "color": "default"}, "href": None}]}
+    if kind == "number":
+        return {"number": subject_id % 13}
+    if kind == "select":
+        label = STATUSES[subject_id % len(STATUSES)] if name == "观看状态" else "放送中"
+        return {"select": {"id": f"s-{label}", "name": label, "color": "blue"}}
+    if kind == "date":
+        return {"date": {"start": "2024-01-01", "end": None, "time_zone": None}}
+    if kind == "url":
+        return {"url": f"{NotionConstants.BANGUMI_SUBJECT_URL}{subject_id}"}
+    text = f"{name} 的一段用户笔记，记录观看感想。" * 3
+    return {"rich_text": [{"type": "text", "text": {"content": text, "link": None}, "plain_text": text,
+                           "annotations": {"bold": False, "italic": False, "color": "default"}, "href": None}]}
+
+
+def build_pages(count: int, schema: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """构造模拟的Notion页面"""
+    pages = []
+    for subject_id in range(1, count + 1):
+        properties = {}
+        for name, prop in schema.items():
+            properties[name] = {"id": prop["id"], "type": prop["type"], **build_value(prop["type"], subject_id, name)}
+        pages.append({
+            "object": "page", "id": f"page-{subject_id}", "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": "2024-01-01T00:00:00.000Z", "archived": False,
+            "cover": {"type": "external", "external": {"url": f"https://lain.bgm.tv/pic/{subject_id}.jpg"}},
+            "parent": {"type": "database_id", "database_id": DATABASE_ID},
+            "url": f"https://www.notion.so/page-{subject_id}", "properties": properties
+        })
+    return pages
+
+
+class FakeNotionAPI:
+    """模拟Notion数据库查询接口，支持分页、filter_properties和观看状态过滤"""
+
+    def __init__(self, pages: List[Dict[str, Any]], schema: Dict[str, Dict[str, Any]]):
+        self.pages = pages
+        self.schema = schema
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if request.method == "GET":
+            return httpx.Response(200, json={"object": "database", "id": DATABASE_ID, "properties": self.schema})
+
+        body = json.loads(request.content or b"{}")
+        pages = self.pages
+        status = ((body.get("filter") or {}).get("select") or {}).get("equals")
+        if status:
+            pages = [page for page in pages if page["properties"]["观看状态"]["select"]["name"] == status]
+
+        start = int(body.get("start_cursor") or 0)
+        page_size = body.get("page_size") or 100
+        results = pages[start:start + page_size]
+
+        property_ids = set(request.url.params.get_list("filter_properties"))
+        if property_ids:
+            results = [
+                {**page, "properties": {name: value for name, value in page["properties"].items()
+                                        if value["id"] in property_ids}}
+                for page in results
+            ]
+
+        has_more = start + page_size < len(pages)
+        return httpx.Response(200, json={
+            "object": "list", "results": results, "has_more": has_more,
+            "next_cursor": str(start + page_size) if has_more else None
+        })
+
+
+def run(service: NotionService, api: FakeNotionAPI, label: str, **kwargs: Any) -> Dict[str, Any]:
+    """执行一次索引加载并统计请求数、字节数和耗时"""
+    received = [0]
+
+    def count_bytes(response: httpx.Response) -> None:
+        response.read()
+        received[0] += len(response.content)
+
+    service.client.client.event_hooks["response"] = [count_bytes]
+    service._property_ids = None
+    api.requests = 0
+
+    started = time.perf_counter()
+    items = service.get_existing_items(**kwargs)
+    elapsed = time.perf_counter() - started
+    return {"label": label, "items": len(items), "requests": api.requests,
+            "bytes": received[0], "seconds": elapsed}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Notion索引加载基准测试")
+    parser.add_argument("--pages", type=int, default=2000, help="数据库中的页面数")
+    parser.add_argument("--extra-properties", type=int, default=10, help="用户自行添加的属性数")
+    parser.add_argument("--status", default="watching", choices=list(NotionConstants.WATCHING_STATUS_MAP),
+                        help="模拟SYNC_STATUS的取值")
+    args = parser.parse_args(argv)
+
+    schema = build_schema(args.extra_properties)
+    api = FakeNotionAPI(build_pages(args.pages, schema), schema)
+    service = NotionService("bench-token", DATABASE_ID, requests_per_second=0)
+    service.client.client = httpx.Client(transport=httpx.MockTransport(api),
+                                         base_url=service.client.client.base_url,
+                                         headers=service.client.client.headers)
+
+    results = [
+        # 改动前的方式：不过滤，返回全部属性（Notion默认分页即为100条）
+        run(service, api, "全量查询"),
+        run(service, api, "属性投影", properties=NotionConstants.INDEX_PROPERTIES),
+        run(service, api, f"属性投影+状态过滤({args.status})", properties=NotionConstants.INDEX_PROPERTIES,
+            status=NotionConstants.WATCHING_STATUS_MAP[args.status]),
+    ]
+
+    base = results[0]
+    print(f"页面数: {args.pages}，额外属性数: {args.extra_properties}")
+    print(f"{'方式':<28}{'记录数':>8}{'请求数':>8}{'字节数':>14}{'耗时(s)':>10}{'字节节省':>10}")
+    for result in results:
+        saved = 1 - result["bytes"] / base["bytes"] if base["bytes"] else 0
+        print(f"{result['label']:<28}{result['items']:>8}{result['requests']:>8}"
+              f"{result['bytes']:>14,}{result['seconds']:>10.3f}{saved:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
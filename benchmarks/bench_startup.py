@@ -0,0 +1,128 @@
+"""启动耗时基准测试
+
+在子进程中多次运行bangumi2notion.py的几种不需要访问API的路径，取耗时中位数，
+并用 `python -X importtime` 统计导入bangumi2notion时耗时最多的模块，
+同时检查--help和--check-config没有导入HTTP客户端。
+
+用法:
+    python -m benchmarks.bench_startup [--runs 10] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "bangumi2notion.py")
+
+# 启动路径不应导入的模块
+HEAVY_MODULES = ["requests", "httpx", "notion_client", "asyncio", "sqlite3"]
+
+# 同步路径需要导入的全部模块，相当于改为延迟导入之前的启动开销
+FULL_IMPORT = "import bangumi2notion, target_runner, sync_manager, http_cache"
+
+COMMANDS = [
+    ("interpreter", ["-c", "pass"]),
+    ("--help", [SCRIPT, "--help"]),
+    ("--check-config", [SCRIPT, "--check-config", "--log-level", "WARNING"]),
+    ("full import", ["-c", FULL_IMPORT]),
+]
+
+
+def _environment() -> Dict[str, str]:
+    """子进程环境：必要配置使用占位值，并能导入仓库中的模块"""
+    env = dict(os.environ)
+    env.update({"BANGUMI_USERNAME": "bench", "NOTION_TOKEN": "bench-token", "NOTION_DATABASE_ID": "bench-database",
+                "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))})
+    env.pop("TARGETS_FILE", None)
+    return env
+
+
+def time_command(args: List[str], runs: int, env: Dict[str, str], cwd: str) -> Tuple[float, float]:
+    """运行命令多次，返回耗时的中位数和最小值（秒）"""
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, cwd=cwd, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), min(durations)
+
+
+def import_times(args: List[str], env: Dict[str, str], cwd: str) -> List[Tuple[str, int, int]]:
+    """用-X importtime运行命令，返回(模块, 嵌套深度, 累计耗时微秒)列表"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], env=env, cwd=cwd, check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), depth, int(cumulative)))
+    return modules
+
+
+def measure(runs: int = 10, top: int = 10) -> Dict[str, Any]:
+    """测量各启动路径的耗时、导入耗时最多的模块和启动路径导入的重量级模块
+
+    Args:
+        runs: 每个命令运行的次数
+        top: 列出的模块数
+
+    Returns:
+        测量结果
+    """
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as directory:
+        env = _environment()
+        commands = {name: dict(zip(("median_seconds", "min_seconds"), time_command(args, runs, env, directory)))
+                    for name, args in COMMANDS}
+
+        # 解释器启动时（site等）已经导入的模块不计入
+        startup = {module[0] for module in import_times(["-c", "pass"], env, directory)}
+        full = [module for module in import_times(["-c", FULL_IMPORT], env, directory) if module[0] not in startup]
+        heaviest = sorted((module for module in full if module[1] <= 1), key=lambda module: -module[2])[:top]
+
+        loaded = {}
+        for name, args in COMMANDS[1:3]:
+            modules = {module[0] for module in import_times(args, env, directory)}
+            loaded[name] = [module for module in HEAVY_MODULES if module in modules]
+
+    return {
+        "runs": runs,
+        "commands": commands,
+        "heaviest_imports": [{"module": name, "cumulative_ms": cumulative / 1000} for name, _, cumulative in heaviest],
+        "heavy_modules_loaded": loaded
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """输出测量结果"""
+    print(f"启动耗时（{report['runs']} 次运行）")
+    print(f"{'命令':<16}{'中位数(ms)':>12}{'最小值(ms)':>12}")
+    for name, timing in report["commands"].items():
+        print(f"{name:<16}{timing['median_seconds'] * 1000:>12.1f}{timing['min_seconds'] * 1000:>12.1f}")
+
+    print("同步时导入耗时最多的模块:")
+    for module in report["heaviest_imports"]:
+        print(f"  {module['module']:<24}{module['cumulative_ms']:>10.1f} ms")
+
+    for name, modules in report["heavy_modules_loaded"].items():
+        status = f"导入了 {', '.join(modules)}" if modules else "未导入HTTP客户端等重量级模块"
+        print(f"{name}: {status}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="每个命令运行的次数")
+    parser.add_argument("--top", type=int, default=10, help="列出导入耗时最多的模块数")
+    args = parser.parse_args(argv)
+    print_report(measure(args.runs, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""端到端同步基准测试
+
+在本地模拟的Bangumi和Notion服务上运行完整的SyncManager同步，
+依次测量以下场景的耗时、吞吐量、请求数和内存峰值：
+
+    initial  首次同步，所有记录都需要创建
+    steady   没有任何变化，使用本地状态跳过Notion扫描
+    changed  部分记录更新、新增和删除（数量由--change-ratio决定）
+    full     忽略本地状态，全量扫描Notion后对比（没有变化）
+
+每个规模使用新的模拟服务和临时状态文件，后面的场景依赖前面场景写入的数据，
+因此initial总是会运行。并发数、页大小等其他配置沿用环境变量。
+运行同步之前先用bench_startup测量命令行的启动耗时。
+
+用法:
+    python -m benchmarks.bench_sync [--items 100,1000,10000] [--latency 20] [--throttle-rate 0.02]
+                                    [--engine thread|async] [--stream] [--json results.json]
+                                    [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bangumi2notion import create_bangumi_client, create_notion_service  # noqa: E402
+from bangumi_client import AsyncBangumiClient  # noqa: E402
+from benchmarks import bench_startup  # noqa: E402
+from benchmarks.fake_servers import DATABASE_ID, USERNAME, FakeServers, FaultOptions  # noqa: E402
+from config import Config  # noqa: E402
+from episode_cache import EpisodeCache  # noqa: E402
+from metrics import get_metrics  # noqa: E402
+from notion_service import AsyncNotionService  # noqa: E402
+from state_store import StateStore  # noqa: E402
+from subject_cache import SubjectCache  # noqa: E402
+from sync_journal import SyncJournal  # noqa: E402
+from sync_manager import SyncManager  # noqa: E402
+
+SCENARIOS = ["initial", "steady", "changed", "full"]
+
+
+class RssSampler:
+    """在后台线程中定期读取常驻内存，记录运行期间的峰值
+
+    Linux上读取/proc/self/statm；其他平台退化为进程启动以来的最大常驻内存。
+    """
+
+    INTERVAL = 0.01
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "RssSampler":
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+
+def current_rss() -> int:
+    """返回当前常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss在Linux上的单位为KB，macOS上为字节
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def create_config(directory: str, args: argparse.Namespace) -> Config:
+    """创建指向临时文件的配置，其他配置沿用环境变量"""
+    os.environ.update({
+        "BANGUMI_USERNAME": USERNAME,
+        "NOTION_TOKEN": "bench-token",
+        "NOTION_DATABASE_ID": DATABASE_ID,
+        "STATE_FILE": os.path.join(directory, "state.db"),
+        "JOURNAL_FILE": os.path.join(directory, "journal.db"),
+        "HTTP_CACHE_FILE": os.path.join(directory, "http-cache.db"),
+        "SUBJECT_CACHE_FILE": os.path.join(directory, "subject-cache.db"),
+        "SYNC_ENGINE": args.engine,
+        "EPISODE_CACHE_FILE": os.path.join(directory, "episodes.db"),
+        "ENABLE_ENRICH": str(args.enrich).lower(),
+        "ENABLE_EPISODES": str(args.episodes).lower(),
+        "SUBJECT_TYPES": ",".join(args.types),
+        "ARCHIVE_DUPLICATES": str(args.duplicates > 0).lower()
+    })
+    # 默认不限速、不使用HTTP缓存，测量的是同步本身而不是令牌桶和缓存
+    os.environ.setdefault("NOTION_RATE_LIMIT", "0")
+    os.environ.setdefault("BANGUMI_RATE_LIMIT", "0")
+    os.environ.setdefault("ENABLE_HTTP_CACHE", "false")
+    return Config()
+
+
+def point_to(servers: FakeServers, bangumi_client: Any, notion_client: Any) -> None:
+    """将客户端的请求地址改为模拟服务"""
+    bangumi_client.base_url = f"{servers.bangumi_url}/v0"
+    notion_client.client.client.base_url = f"{servers.notion_url}/v1/"
+
+
+def run_scenario(servers: FakeServers, config: Config, args: argparse.Namespace, clients: Dict[str, Any],
+                 full_resync: bool) -> Dict[str, Any]:
+    """运行一次完整同步，返回结果统计和测量值"""
+    get_metrics().reset()
+    servers.reset_stats()
+    gc.collect()
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        state_store = StateStore(config.state_file) if config.enable_state else None
+        journal = SyncJournal(config.journal_file) if config.enable_journal else None
+        subject_cache = SubjectCache(config.subject_cache_file, config.subject_cache_finished_ttl_days,
+                                     config.subject_cache_airing_ttl_hours) if config.enable_enrich else None
+        episode_cache = EpisodeCache(config.episode_cache_file) if config.enable_episodes else None
+        try:
+            if config.sync_engine == "async":
+                result = asyncio.run(run_async(servers, config, state_store, subject_cache, journal, episode_cache,
+                                               full_resync))
+            else:
+                sync_manager = SyncManager(clients["bangumi"], clients["notion"], config, state_store,
+                                           subject_cache, journal, episode_cache)
+                result = sync_manager.sync(stream=args.stream, full_resync=full_resync)
+        finally:
+            for store in (state_store, journal, subject_cache, episode_cache):
+                if store is not None:
+                    store.close()
+        elapsed = time.perf_counter() - started
+
+    peak = None
+    if args.tracemalloc:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    requests = get_metrics().report()["requests"]
+    return {
+        "seconds": elapsed,
+        "add": result["add_count"],
+        "update": result["update_count"],
+        "delete": result["delete_count"],
+        "duplicates": result["duplicate_count"],
+        "failed": result["failed_count"],
+        "requests": {service: sum(stats["requests"] for endpoint, stats in requests.items()
+                                  if endpoint.startswith(service))
+                     for service in ("bangumi", "notion")},
+        "retries": sum(stats["retries"] for stats in requests.values()),
+        "throttled": sum(stats["throttled"] for stats in requests.values()),
+        "server": servers.stats(),
+        "peak_rss_bytes": sampler.peak,
+        "peak_bytes": peak,
+        "timings": result.get("timings", {})
+    }
+
+
+async def run_async(servers: FakeServers, config: Config, state_store: Optional[StateStore],
+                    subject_cache: Optional[SubjectCache], journal: Optional[SyncJournal],
+                    episode_cache: Optional[EpisodeCache], full_resync: bool) -> Dict[str, Any]:
+    """使用异步引擎同步，异步客户端绑定事件循环，每个场景重新创建"""
+    bangumi_client = create_bangumi_client(config, None, AsyncBangumiClient)
+    notion_client = create_notion_service(config, AsyncNotionService)
+    point_to(servers, bangumi_client, notion_client)
+    try:
+        sync_manager = SyncManager(bangumi_client, notion_client, config, state_store, subject_cache, journal,
+                                   episode_cache)
+        return await sync_manager.sync_async(full_resync=full_resync)
+    finally:
+        await bangumi_client.aclose()
+        await notion_client.aclose()
+
+
+def run_size(items: int, args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """在一个规模上依次运行各场景"""
+    bangumi_faults = FaultOptions(args.latency / 1000, args.jitter / 1000, args.throttle_rate, args.error_rate,
+                                  args.retry_after)
+    notion_faults = FaultOptions(args.notion_latency / 1000 if args.notion_latency is not None else args.latency / 1000,
+                                 args.jitter / 1000, args.throttle_rate, args.error_rate, args.retry_after,
+                                 args.lost_rate)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-sync-") as directory:
+        config = create_config(directory, args)
+        with FakeServers(items, bangumi_faults, notion_faults, args.seed,
+                         [config.notion_fingerprint_property] if config.notion_fingerprint_property else None,
+                         args.types) as servers:
+            clients = {}
+            if config.sync_engine != "async":
+                clients = {"bangumi": create_bangumi_client(config, None),
+                           "notion": create_notion_service(config)}
+                point_to(servers, clients["bangumi"], clients["notion"])
+
+            changes = max(1, int(items * args.change_ratio))
+            for scenario in SCENARIOS:
+                if scenario != "initial" and scenario not in args.scenarios:
+                    continue
+                if scenario == "changed":
+                    # 新增和删除各占变化量的十分之一
+                    servers.mutate(changed=changes, added=max(1, changes // 10), removed=max(1, changes // 10))
+                if scenario == "full" and args.duplicates:
+                    # 全量扫描时发现并归档重复页面
+                    servers.duplicate(args.duplicates)
+                result = run_scenario(servers, config, args, clients, full_resync=scenario == "full")
+                result["items"] = items
+                result["items_per_second"] = items / result["seconds"] if result["seconds"] else 0
+                operations = result["add"] + result["update"] + result["delete"]
+                result["operations_per_second"] = operations / result["seconds"] if result["seconds"] else 0
+                results[scenario] = result
+                print_row(items, scenario, result, args)
+    return results
+
+
+def print_header() -> None:
+    """输出结果表头"""
+    print(f"{'规模':>7} {'场景':<8}{'耗时(s)':>9}{'条/秒':>10}{'写入/秒':>9}{'新增':>7}{'更新':>7}{'删除':>7}{'重复':>7}"
+          f"{'失败':>5}{'Bangumi请求':>12}{'Notion请求':>11}{'重试':>6}{'限流':>6}{'RSS峰值(MB)':>12}{'分配峰值(MB)':>13}")
+
+
+def print_row(items: int, scenario: str, result: Dict[str, Any], args: argparse.Namespace) -> None:
+    """输出一个场景的结果"""
+    rss = result["peak_rss_bytes"] / 1024 / 1024
+    peak = f"{result['peak_bytes'] / 1024 / 1024:.1f}" if result["peak_bytes"] is not None else "-"
+    line = (f"{items:>7} {scenario:<8}{result['seconds']:>9.2f}{result['items_per_second']:>10.0f}"
+            f"{result['operations_per_second']:>9.0f}{result['add']:>7}{result['update']:>7}{result['delete']:>7}{result['duplicates']:>7}"
+            f"{result['failed']:>5}{result['requests']['bangumi']:>12}{result['requests']['notion']:>11}"
+            f"{result['retries']:>6}{result['throttled']:>6}{rss:>12.1f}{peak:>13}")
+    baseline = (args.baseline_results.get(str(items)) or {}).get(scenario) if args.baseline_results else None
+    if baseline:
+        line += f"  耗时x{result['seconds'] / baseline['seconds']:.2f}"
+        if baseline.get("peak_rss_bytes"):
+            line += f" RSSx{result['peak_rss_bytes'] / baseline['peak_rss_bytes']:.2f}"
+    print(line, flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="端到端同步基准测试")
+    parser.add_argument("--items", default="100,1000,10000",
+                        help="逗号分隔的收藏规模列表，如 100,1000,10000,50000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"逗号分隔的场景列表，可选 {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0, help="每个请求的延迟（毫秒）")
+    parser.add_argument("--notion-latency", type=float, default=None, help="Notion请求的延迟（毫秒），默认与--latency相同")
+    parser.add_argument("--jitter", type=float, default=0, help="随机增加的延迟上限（毫秒）")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="返回429的请求比例")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回500的请求比例")
+    parser.add_argument("--lost-rate", type=float, default=0,
+                        help="Notion处理完请求后仍返回500的比例，验证非幂等请求不会重复执行")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="429响应的Retry-After秒数")
+    parser.add_argument("--change-ratio", type=float, default=0.05, help="changed场景中更新的记录比例")
+    parser.add_argument("--engine", default="thread", choices=["thread", "async"], help="同步引擎")
+    parser.add_argument("--stream", action="store_true", help="使用流式同步（thread引擎）")
+    parser.add_argument("--enrich", action="store_true", help="启用条目详情补充")
+    parser.add_argument("--episodes", action="store_true", help="启用剧集同步")
+    parser.add_argument("--types", default="anime",
+                        help="同步的条目类型，逗号分隔；模拟收藏按这些类型轮流生成")
+    parser.add_argument("--duplicates", type=int, default=0,
+                        help="full场景之前在Notion中复制出的重复页面数，并启用ARCHIVE_DUPLICATES")
+    parser.add_argument("--seed", type=int, default=0, help="生成数据和注入故障的随机种子")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="用tracemalloc统计Python对象的分配峰值（会使运行变慢数倍，耗时不可与未启用时比较）")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="先测量启动耗时，每个命令运行的次数，为0时跳过")
+    parser.add_argument("--json", help="将结果写入JSON文件，可作为之后运行的--baseline")
+    parser.add_argument("--baseline", help="与之前--json写入的结果对比")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(sorted(unknown))}")
+    args.types = tuple(t.strip() for t in args.types.split(",") if t.strip())
+    sizes = [int(size) for size in args.items.split(",") if size.strip()]
+    args.baseline_results = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            args.baseline_results = json.load(f)["results"]
+
+    startup = None
+    if args.startup_runs > 0:
+        startup = bench_startup.measure(args.startup_runs)
+        bench_startup.print_report(startup)
+        print()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    print(f"引擎: {args.engine}{'（流式）' if args.stream else ''}，延迟: {args.latency:g} ms，"
+          f"429比例: {args.throttle_rate:g}，错误比例: {args.error_rate:g}，响应丢失比例: {args.lost_rate:g}")
+    print_header()
+
+    results = {str(size): run_size(size, args) for size in sizes}
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    maxrss_mb = maxrss / 1024 / 1024 if sys.platform == "darwin" else maxrss / 1024
+    print(f"进程最大常驻内存: {maxrss_mb:.1f} MB")
+
+    if args.json:
+        options = {key: value for key, value in vars(args).items() if key not in ("json", "baseline", "baseline_results")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "startup": startup, "max_rss_mb": round(maxrss_mb, 1),
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,601 @@
+"""本地模拟的Bangumi和Notion API服务
+
+在独立进程中启动两个HTTP服务，分别模拟Bangumi v0的收藏列表、条目详情接口，
+以及Notion的数据库查询、页面创建和更新接口，用于离线基准测试。
+每个服务可以单独配置响应延迟、429限流比例和5xx错误比例；
+/_bench/开头的管理接口不受延迟和故障注入影响，用于修改收藏数据和读取服务端统计。
+"""
+import copy
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import BangumiConstants, NotionConstants  # noqa: E402
+
+HOST = "127.0.0.1"
+USERNAME = "bench"
+DATABASE_ID = "bench-database"
+FIRST_SUBJECT_ID = 100000
+
+# 同步写入的属性及其类型，与SyncManager.map_bangumi_to_notion一致
+PROPERTY_TYPES = NotionConstants.PROPERTY_TYPES
+
+
+class FaultOptions:
+    """单个模拟服务的延迟和故障注入配置"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, throttle_rate: float = 0.0,
+                 error_rate: float = 0.0, retry_after: float = 0.1, lost_rate: float = 0.0):
+        """初始化配置
+
+        Args:
+            latency: 每个请求的固定延迟（秒）
+            jitter: 在固定延迟上增加的随机延迟上限（秒）
+            throttle_rate: 返回429的请求比例
+            error_rate: 返回500的请求比例
+            retry_after: 429响应中Retry-After的秒数
+            lost_rate: 处理完请求后仍返回500的比例，模拟服务端已生效但响应丢失
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.lost_rate = lost_rate
+
+    def __repr__(self) -> str:
+        return (f"FaultOptions(latency={self.latency}, jitter={self.jitter}, "
+                f"throttle_rate={self.throttle_rate}, error_rate={self.error_rate}, lost_rate={self.lost_rate})")
+
+
+class Route:
+    """一条路由：请求方法、路径正则和处理函数"""
+
+    def __init__(self, method: str, pattern: str, handler: Callable[..., Tuple[int, Any]], name: str,
+                 admin: bool = False):
+        """初始化路由
+
+        Args:
+            method: HTTP方法
+            pattern: 匹配路径的正则，命名分组作为参数传给处理函数
+            handler: 处理函数，参数为(查询参数, 请求体, 请求头, **路径参数)，返回(状态码, 响应数据)
+            name: 统计中使用的路由名称
+            admin: 是否为管理接口，管理接口不注入延迟和故障
+        """
+        self.method = method
+        self.pattern = re.compile(f"^{pattern}$")
+        self.handler = handler
+        self.name = name
+        self.admin = admin
+
+
+class FakeService:
+    """模拟服务的公共部分：路由分发、延迟和故障注入、按路由统计"""
+
+    def __init__(self, faults: FaultOptions, seed: int):
+        """初始化服务
+
+        Args:
+            faults: 延迟和故障注入配置
+            seed: 故障注入使用的随机种子
+        """
+        self.faults = faults
+        self.routes: List[Route] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.add_route("GET", "/_bench/stats", lambda *_: (200, self.get_stats()), "stats", admin=True)
+        self.add_route("POST", "/_bench/reset", lambda *_: (200, self.reset_stats()), "reset", admin=True)
+
+    def add_route(self, method: str, pattern: str, handler: Callable[..., Tuple[int, Any]], name: str,
+                  admin: bool = False) -> None:
+        """注册路由"""
+        self.routes.append(Route(method, pattern, handler, name, admin))
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """返回按路由统计的请求数、限流数和错误数"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.stats.items()}
+
+    def reset_stats(self) -> Dict[str, Any]:
+        """清空统计"""
+        with self._lock:
+            self.stats = {}
+        return {}
+
+    def _count(self, route: str, key: str) -> None:
+        """累加路由统计，调用方需持有_lock"""
+        stats = self.stats.setdefault(route, {"requests": 0, "throttled": 0, "errors": 0})
+        stats[key] += 1
+
+    def dispatch(self, method: str, path: str, query: Dict[str, List[str]], body: Any,
+                 headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        """分发请求
+
+        Returns:
+            (状态码, 响应数据, 额外响应头)，响应数据为None时不返回正文
+        """
+        for route in self.routes:
+            match = route.pattern.match(path)
+            if not match or route.method != method:
+                continue
+            if route.admin:
+                status, data = route.handler(query, body, headers, **match.groupdict())
+                return status, data, {}
+
+            with self._lock:
+                self._count(route.name, "requests")
+                roll = self._rng.random()
+                delay = self.faults.latency + self._rng.uniform(0, self.faults.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            if roll < self.faults.throttle_rate:
+                with self._lock:
+                    self._count(route.name, "throttled")
+                return 429, self.error_body(429, "rate_limited"), {"Retry-After": f"{self.faults.retry_after:g}"}
+            if roll < self.faults.throttle_rate + self.faults.error_rate:
+                with self._lock:
+                    self._count(route.name, "errors")
+                return 500, self.error_body(500, "internal_server_error"), {}
+
+            status, data = route.handler(query, body, headers, **match.groupdict())
+            if roll < self.faults.throttle_rate + self.faults.error_rate + self.faults.lost_rate:
+                with self._lock:
+                    self._count(route.name, "errors")
+                return 500, self.error_body(500, "internal_server_error"), {}
+            extra = {}
+            if isinstance(data, tuple):
+                data, extra = data
+            return status, data, extra
+        return 404, self.error_body(404, "object_not_found"), {}
+
+    @staticmethod
+    def error_body(status: int, code: str) -> Dict[str, Any]:
+        """构造错误响应"""
+        return {"object": "error", "status": status, "code": code, "message": f"fake {code}"}
+
+
+class FakeBangumi(FakeService):
+    """模拟Bangumi v0接口：按条目类型过滤、按更新时间倒序分页返回收藏，支持ETag条件请求"""
+
+    def __init__(self, items: int, faults: FaultOptions, seed: int, subject_types: Tuple[str, ...] = ("anime",)):
+        """初始化模拟的收藏数据
+
+        Args:
+            items: 收藏条目数
+            faults: 延迟和故障注入配置
+            seed: 生成数据和故障注入使用的随机种子
+            subject_types: 收藏条目轮流使用的条目类型
+        """
+        super().__init__(faults, seed)
+        self.subject_types = [BangumiConstants.SUBJECT_TYPE_MAP[subject_type] for subject_type in subject_types]
+        self._data_rng = random.Random(seed)
+        self._now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.version = 0
+        self.next_subject_id = FIRST_SUBJECT_ID
+        self.collections = [self._new_collection(self._now - timedelta(minutes=index)) for index in range(items)]
+        self.subjects = {collection["subject"]["id"]: collection["subject"] for collection in self.collections}
+
+        self.add_route("GET", r"/v0/users/(?P<username>[^/]+)/collections", self.list_collections, "collections")
+        self.add_route("GET", r"/v0/subjects/(?P<subject_id>\d+)", self.get_subject, "subjects")
+        self.add_route("GET", "/v0/episodes", self.list_episodes, "episodes")
+        self.add_route("POST", "/_bench/mutate", self.mutate, "mutate", admin=True)
+
+    def _new_collection(self, updated_at: datetime) -> Dict[str, Any]:
+        """生成一条收藏记录"""
+        rng = self._data_rng
+        subject_id = self.next_subject_id
+        self.next_subject_id += 1
+        subject_type = self.subject_types[subject_id % len(self.subject_types)]
+        eps = rng.choice([0, 12, 13, 24, 26, 52])
+        air_date = datetime(2000, 1, 1) + timedelta(days=rng.randrange(9000))
+        subject = {
+            "id": subject_id,
+            "name": f"Synthetic Anime {subject_id}",
+            "name_cn": f"合成番剧{subject_id}" if rng.random() < 0.8 else "",
+            "images": {"large": f"//lain.bgm.tv/pic/cover/l/{subject_id % 100:02d}/{subject_id}.jpg"},
+            "score": round(rng.uniform(4, 9.5), 1),
+            "eps": eps,
+            "air_date": air_date.strftime("%Y-%m-%d"),
+            "air_status": rng.choice(list(BangumiConstants.AIR_STATUS_MAP)),
+            "type": subject_type
+        }
+        return {
+            "subject": subject,
+            "subject_type": subject_type,
+            "collection": {"status": rng.choice(list(BangumiConstants.WATCHING_STATUS_MAP)),
+                           "ep_status": rng.randint(0, eps)},
+            "updated_at": updated_at.isoformat()
+        }
+
+    def list_collections(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                         username: str) -> Tuple[int, Any]:
+        """GET /v0/users/{username}/collections"""
+        limit = int(query.get("limit", [BangumiConstants.DEFAULT_LIMIT])[0])
+        offset = int(query.get("offset", [0])[0])
+        subject_type = int(query["subject_type"][0]) if "subject_type" in query else None
+        with self._lock:
+            etag = f'"{self.version}-{subject_type}-{offset}-{limit}"'
+            if headers.get("if-none-match") == etag:
+                return 304, (None, {"ETag": etag})
+            collections = self.collections if subject_type is None else \
+                [collection for collection in self.collections if collection["subject_type"] == subject_type]
+            page = {"data": collections[offset:offset + limit], "total": len(collections),
+                    "limit": limit, "offset": offset}
+        return 200, (page, {"ETag": etag})
+
+    def get_subject(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                    subject_id: str) -> Tuple[int, Any]:
+        """GET /v0/subjects/{subject_id}"""
+        subject = self.subjects.get(int(subject_id))
+        if subject is None:
+            return 404, self.error_body(404, "not_found")
+        tags = [{"name": f"标签{(subject['id'] + offset) % 50}", "count": 100 - offset} for offset in range(8)]
+        return 200, {
+            **subject,
+            "summary": f"{subject['name']} 的简介。" * 10,
+            "tags": tags,
+            "infobox": [{"key": BangumiConstants.STUDIO_INFOBOX_KEYS[0], "value": f"Studio {subject['id'] % 40}"}],
+            "rating": {"total": subject["id"] % 5000, "score": subject["score"]}
+        }
+
+    def list_episodes(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """GET /v0/episodes，每个条目按总集数生成每周播出一集的正片"""
+        subject = self.subjects.get(int(query.get("subject_id", [0])[0]))
+        if subject is None:
+            return 404, self.error_body(404, "not_found")
+        limit = int(query.get("limit", [100])[0])
+        offset = int(query.get("offset", [0])[0])
+        first = datetime.strptime(subject["air_date"], "%Y-%m-%d")
+        episodes = [
+            {"id": subject["id"] * 1000 + sort, "subject_id": subject["id"], "type": 0, "sort": sort, "ep": sort,
+             "name": f"Episode {sort}", "name_cn": f"第{sort}话",
+             "airdate": (first + timedelta(weeks=sort - 1)).strftime("%Y-%m-%d")}
+            for sort in range(offset + 1, min(subject["eps"], offset + limit) + 1)
+        ]
+        return 200, {"data": episodes, "total": subject["eps"], "limit": limit, "offset": offset}
+
+    def mutate(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """POST /_bench/mutate，修改、添加和删除收藏
+
+        请求体为{"changed": n, "added": n, "removed": n}，修改和添加的记录移到列表最前面，
+        与Bangumi按更新时间倒序返回一致。
+        """
+        body = body or {}
+        with self._lock:
+            rng = self._data_rng
+            self._now += timedelta(hours=1)
+            removed = min(body.get("removed", 0), len(self.collections))
+            for index in sorted(rng.sample(range(len(self.collections)), removed), reverse=True):
+                del self.collections[index]
+
+            changed = rng.sample(range(len(self.collections)), min(body.get("changed", 0), len(self.collections)))
+            moved = []
+            for index in sorted(changed, reverse=True):
+                collection = self.collections.pop(index)
+                info = collection["collection"]
+                eps = collection["subject"]["eps"]
+                info["ep_status"] = info["ep_status"] + 1 if not eps or info["ep_status"] < eps else 0
+                collection["updated_at"] = self._now.isoformat()
+                moved.append(collection)
+
+            added = [self._new_collection(self._now) for _ in range(body.get("added", 0))]
+            for collection in added:
+                self.subjects[collection["subject"]["id"]] = collection["subject"]
+            self.collections[:0] = added + moved
+            self.version += 1
+            return 200, {"total": len(self.collections), "changed": len(moved), "added": len(added),
+                         "removed": removed}
+
+
+class FakeNotion(FakeService):
+    """模拟Notion数据库：读取和更新数据库结构，查询（过滤、分页、filter_properties）、创建、更新和归档页面"""
+
+    def __init__(self, faults: FaultOptions, seed: int, extra_properties: Optional[List[str]] = None):
+        """初始化空数据库
+
+        Args:
+            faults: 延迟和故障注入配置
+            seed: 故障注入使用的随机种子
+            extra_properties: 额外的rich_text属性，如同步指纹属性
+        """
+        super().__init__(faults, seed)
+        types = {**PROPERTY_TYPES, **{name: "rich_text" for name in extra_properties or []}}
+        self.schema = {name: self._schema_property(f"p{index}", name, {kind: {}})
+                       for index, (name, kind) in enumerate(types.items())}
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self._views: Dict[str, List[Dict[str, Any]]] = {}
+
+        self.add_route("GET", r"/v1/databases/(?P<database_id>[^/]+)", self.get_database, "databases.retrieve")
+        self.add_route("PATCH", r"/v1/databases/(?P<database_id>[^/]+)", self.update_database, "databases.update")
+        self.add_route("POST", r"/v1/databases/(?P<database_id>[^/]+)/query", self.query_database,
+                       "databases.query")
+        self.add_route("POST", "/v1/pages", self.create_page, "pages.create")
+        self.add_route("PATCH", r"/v1/pages/(?P<page_id>[^/]+)", self.update_page, "pages.update")
+        self.add_route("POST", "/_bench/duplicate", self.duplicate, "duplicate", admin=True)
+
+    def get_database(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                     database_id: str) -> Tuple[int, Any]:
+        """GET /v1/databases/{database_id}"""
+        return 200, {"object": "database", "id": database_id, "properties": self.schema}
+
+    def update_database(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                        database_id: str) -> Tuple[int, Any]:
+        """PATCH /v1/databases/{database_id}，创建缺少的属性，合并select选项"""
+        with self._lock:
+            for name, change in ((body or {}).get("properties") or {}).items():
+                prop = self.schema.get(name)
+                if prop is None:
+                    self.schema[name] = self._schema_property(f"p{len(self.schema)}", name, change)
+                    continue
+                options = (change.get(prop["type"]) or {}).get("options")
+                if options is not None:
+                    existing = {option["name"] for option in prop[prop["type"]]["options"]}
+                    prop[prop["type"]]["options"].extend(
+                        {"id": uuid.uuid4().hex[:4], "color": "default", **option}
+                        for option in options if option["name"] not in existing)
+        return 200, {"object": "database", "id": database_id, "properties": self.schema}
+
+    @staticmethod
+    def _schema_property(property_id: str, name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """构造数据库结构中的一个属性，select和multi_select带有选项列表"""
+        kind, settings = next(iter(config.items()))
+        if kind in ("select", "multi_select"):
+            settings = {"options": [{"id": uuid.uuid4().hex[:4], "color": "default", **option}
+                                    for option in settings.get("options", [])]}
+        return {"id": property_id, "name": name, "type": kind, kind: settings}
+
+    def query_database(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                       database_id: str) -> Tuple[int, Any]:
+        """POST /v1/databases/{database_id}/query"""
+        body = body or {}
+        page_size = min(body.get("page_size") or 100, NotionConstants.MAX_PAGE_SIZE)
+        start = int(body.get("start_cursor") or 0)
+        with self._lock:
+            pages = self._view(body.get("filter"))
+        results = pages[start:start + page_size]
+
+        property_ids = set(query.get("filter_properties", []))
+        if property_ids:
+            results = [{**page, "properties": {name: value for name, value in page["properties"].items()
+                                               if value["id"] in property_ids}}
+                       for page in results]
+
+        has_more = start + page_size < len(pages)
+        return 200, {"object": "list", "results": results, "has_more": has_more,
+                     "next_cursor": str(start + page_size) if has_more else None}
+
+    def _view(self, filter: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """返回满足过滤条件的未归档页面，结果缓存到下次写入，调用方需持有_lock"""
+        key = json.dumps(filter, sort_keys=True, ensure_ascii=False)
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = [page for page in self.pages.values()
+                                       if not filter or self._matches(page, filter)]
+        return view
+
+    def _matches(self, page: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+        """判断页面是否满足过滤条件，支持or、and以及select、url的equals"""
+        if "or" in filter:
+            return any(self._matches(page, condition) for condition in filter["or"])
+        if "and" in filter:
+            return all(self._matches(page, condition) for condition in filter["and"])
+        value = page["properties"].get(filter.get("property"), {})
+        if "select" in filter:
+            return (value.get("select") or {}).get("name") == filter["select"].get("equals")
+        if "url" in filter:
+            return value.get("url") == filter["url"].get("equals")
+        return True
+
+    def _properties(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """为请求中的属性值补充属性ID和类型，与Notion返回的结构一致"""
+        result = {}
+        for name, value in properties.items():
+            prop = self.schema.get(name)
+            if prop is not None:
+                result[name] = {"id": prop["id"], "type": prop["type"], **value}
+        return result
+
+    def _empty_properties(self) -> Dict[str, Any]:
+        """新页面中未设置的属性，与Notion一样返回空值而不是省略"""
+        return {name: {"id": prop["id"], "type": prop["type"],
+                       prop["type"]: [] if prop["type"] in ("title", "rich_text", "multi_select") else None}
+                for name, prop in self.schema.items()}
+
+    def create_page(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """POST /v1/pages"""
+        body = body or {}
+        now = datetime.now(timezone.utc).isoformat()
+        page = {
+            "object": "page", "id": str(uuid.uuid4()), "created_time": now, "last_edited_time": now,
+            "archived": False, "cover": body.get("cover"), "parent": body.get("parent"),
+            "properties": {**self._empty_properties(), **self._properties(body.get("properties", {}))}
+        }
+        with self._lock:
+            self.pages[page["id"]] = page
+            self._views = {}
+        return 200, page
+
+    def update_page(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str],
+                    page_id: str) -> Tuple[int, Any]:
+        """PATCH /v1/pages/{page_id}，合并属性；archived为真时从数据库中移除"""
+        body = body or {}
+        with self._lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return 404, self.error_body(404, "object_not_found")
+            page["properties"].update(self._properties(body.get("properties", {})))
+            if "cover" in body:
+                page["cover"] = body["cover"]
+            page["last_edited_time"] = datetime.now(timezone.utc).isoformat()
+            if body.get("archived"):
+                page["archived"] = True
+                del self.pages[page_id]
+            self._views = {}
+        return 200, page
+
+    def duplicate(self, query: Dict[str, List[str]], body: Any, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """POST /_bench/duplicate，复制页面ID最小的若干个页面，模拟创建页面后中途退出留下的重复页面
+
+        请求体为{"count": n}，复制出的页面创建时间晚于原页面。
+        """
+        count = (body or {}).get("count", 0)
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            copies = [{**copy.deepcopy(self.pages[page_id]), "id": str(uuid.uuid4()), "created_time": now}
+                      for page_id in sorted(self.pages)[:count]]
+            for page in copies:
+                self.pages[page["id"]] = page
+            self._views = {}
+        return 200, {"duplicated": len(copies)}
+
+
+def _handler_class(service: FakeService) -> type:
+    """创建绑定到模拟服务的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        # 使用HTTP/1.1长连接，与真实API一样可以复用连接
+        protocol_version = "HTTP/1.1"
+        # 响应头和正文一起发送，避免Nagle算法与延迟确认叠加出约40ms的额外延迟
+        wbufsize = 1 << 16
+        disable_nagle_algorithm = True
+
+        def _handle(self) -> None:
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body = json.loads(raw) if raw else None
+            headers = {key.lower(): value for key, value in self.headers.items()}
+            status, data, extra = service.dispatch(self.command, url.path, parse_qs(url.query), body, headers)
+
+            content = json.dumps(data, ensure_ascii=False).encode() if data is not None else b""
+            self.send_response(status)
+            for key, value in extra.items():
+                self.send_header(key, value)
+            if data is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PATCH = _handle
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def _serve(items: int, bangumi_faults: FaultOptions, notion_faults: FaultOptions, seed: int,
+           extra_properties: List[str], subject_types: Tuple[str, ...], connection: Any) -> None:
+    """子进程入口：启动两个服务，把地址发回父进程后一直运行"""
+    servers = [
+        ThreadingHTTPServer((HOST, 0), _handler_class(FakeBangumi(items, bangumi_faults, seed, subject_types))),
+        ThreadingHTTPServer((HOST, 0), _handler_class(FakeNotion(notion_faults, seed + 1, extra_properties)))
+    ]
+    for server in servers:
+        server.daemon_threads = True
+        # 默认的监听队列只有5，并发连接较多时会被拒绝
+        server.request_queue_size = 128
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection.send([f"http://{HOST}:{server.server_address[1]}" for server in servers])
+    connection.recv()
+
+
+class FakeServers:
+    """在独立进程中运行的模拟服务
+
+    服务运行在单独的进程中，不与被测的同步代码争用GIL，也不计入被测进程的内存。
+
+    用法:
+        with FakeServers(items=1000) as servers:
+            servers.bangumi_url, servers.notion_url
+    """
+
+    def __init__(self, items: int, bangumi_faults: Optional[FaultOptions] = None,
+                 notion_faults: Optional[FaultOptions] = None, seed: int = 0,
+                 extra_properties: Optional[List[str]] = None, subject_types: Tuple[str, ...] = ("anime",)):
+        """初始化模拟服务配置
+
+        Args:
+            items: 模拟的收藏条目数
+            bangumi_faults: Bangumi服务的延迟和故障注入配置
+            notion_faults: Notion服务的延迟和故障注入配置
+            seed: 随机种子，相同的种子生成相同的数据和故障序列
+            extra_properties: Notion数据库中额外的rich_text属性，如同步指纹属性
+            subject_types: 收藏条目轮流使用的条目类型
+        """
+        self.items = items
+        self.bangumi_faults = bangumi_faults or FaultOptions()
+        self.notion_faults = notion_faults or FaultOptions()
+        self.seed = seed
+        self.extra_properties = extra_properties or []
+        self.subject_types = tuple(subject_types)
+        self.bangumi_url: Optional[str] = None
+        self.notion_url: Optional[str] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection = None
+        self._admin = httpx.Client(timeout=60)
+
+    def __enter__(self) -> "FakeServers":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """启动服务进程，等待服务就绪"""
+        self._connection, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, daemon=True,
+            args=(self.items, self.bangumi_faults, self.notion_faults, self.seed, self.extra_properties,
+                  self.subject_types, child)
+        )
+        self._process.start()
+        self.bangumi_url, self.notion_url = self._connection.recv()
+
+    def stop(self) -> None:
+        """停止服务进程"""
+        self._admin.close()
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def mutate(self, changed: int = 0, added: int = 0, removed: int = 0) -> Dict[str, Any]:
+        """修改、添加和删除Bangumi收藏记录"""
+        response = self._admin.post(f"{self.bangumi_url}/_bench/mutate",
+                                    json={"changed": changed, "added": added, "removed": removed})
+        response.raise_for_status()
+        return response.json()
+
+    def duplicate(self, count: int) -> Dict[str, Any]:
+        """在Notion数据库中复制出重复页面"""
+        response = self._admin.post(f"{self.notion_url}/_bench/duplicate", json={"count": count})
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """读取两个服务按路由统计的请求数、限流数和错误数"""
+        return {name: self._admin.get(f"{url}/_bench/stats").json()
+                for name, url in (("bangumi", self.bangumi_url), ("notion", self.notion_url))}
+
+    def reset_stats(self) -> None:
+        """清空两个服务的统计"""
+        for url in (self.bangumi_url, self.notion_url):
+            self._admin.post(f"{url}/_bench/reset").raise_for_status()
@@ -1,23 +1,76 @@
+import copy
+import json
 import os
+import re
 import logging
-from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
 from exceptions import ConfigError
-from constants import ConfigConstants
+from constants import ConfigConstants, NotionConstants, BangumiConstants, StateConstants, SubjectCacheConstants, \
+    HttpCacheConstants, HttpPoolConstants, JournalConstants, DaemonConstants, EpisodeConstants
 
 
 class Config:
     """配置管理类"""
 
-    def __init__(self):
-        """初始化配置"""
+    def __init__(self, targets_file: Optional[str] = None):
+        """初始化配置
+
+        Args:
+            targets_file: 多目标配置文件路径，为None时读取TARGETS_FILE环境变量
+        """
+        # 延迟导入，--help等不需要加载配置的路径不为此付出启动时间
+        from dotenv import load_dotenv
         load_dotenv()
 
+        self.target_name: Optional[str] = None
+        self.targets_file = targets_file or os.getenv('TARGETS_FILE') or None
+        self.max_parallel_targets = self._parse_int('MAX_PARALLEL_TARGETS', ConfigConstants.DEFAULT_MAX_PARALLEL_TARGETS)
         self.bangumi_username = os.getenv('BANGUMI_USERNAME')
         self.notion_token = os.getenv('NOTION_TOKEN')
         self.notion_database_id = os.getenv('NOTION_DATABASE_ID')
         self.log_level = os.getenv('LOG_LEVEL', ConfigConstants.DEFAULT_LOG_LEVEL).upper()
         self.enable_delete = self._parse_bool(os.getenv('ENABLE_DELETE', 'true'))
+        self.archive_duplicates = self._parse_bool(os.getenv('ARCHIVE_DUPLICATES', 'false'))
+        self.enable_schema_check = self._parse_bool(os.getenv('ENABLE_SCHEMA_CHECK', 'true'))
         self.sync_status = os.getenv('SYNC_STATUS', ConfigConstants.DEFAULT_SYNC_STATUS).lower()
+        self.notion_max_workers = self._parse_int('NOTION_MAX_WORKERS', NotionConstants.DEFAULT_MAX_WORKERS)
+        self.notion_rate_limit = self._parse_float('NOTION_RATE_LIMIT', NotionConstants.DEFAULT_REQUESTS_PER_SECOND)
+        self.bangumi_rate_limit = self._parse_float('BANGUMI_RATE_LIMIT', BangumiConstants.DEFAULT_REQUESTS_PER_SECOND)
+        self.bangumi_page_size = self._parse_int('BANGUMI_PAGE_SIZE', BangumiConstants.DEFAULT_LIMIT)
+        self.bangumi_max_workers = self._parse_int('BANGUMI_MAX_WORKERS', BangumiConstants.DEFAULT_MAX_WORKERS)
+        self.enable_state = self._parse_bool(os.getenv('ENABLE_STATE', 'true'))
+        self.state_file = os.getenv('STATE_FILE') or StateConstants.DEFAULT_STATE_FILE
+        self.state_resync_days = self._parse_int('STATE_RESYNC_DAYS', StateConstants.DEFAULT_RESYNC_DAYS)
+        self.enable_journal = self._parse_bool(os.getenv('ENABLE_JOURNAL', 'true'))
+        self.journal_file = os.getenv('JOURNAL_FILE') or JournalConstants.DEFAULT_JOURNAL_FILE
+        self.incremental_fetch = self._parse_bool(os.getenv('INCREMENTAL_FETCH', 'false'))
+        self.notion_fingerprint_property = os.getenv('NOTION_FINGERPRINT_PROPERTY') or None
+        self.sync_engine = (os.getenv('SYNC_ENGINE') or ConfigConstants.DEFAULT_ENGINE).lower()
+        self.enable_enrich = self._parse_bool(os.getenv('ENABLE_ENRICH', 'false'))
+        self.subject_cache_file = os.getenv('SUBJECT_CACHE_FILE') or SubjectCacheConstants.DEFAULT_CACHE_FILE
+        self.subject_cache_finished_ttl_days = self._parse_int('SUBJECT_CACHE_FINISHED_TTL_DAYS',
+                                                               SubjectCacheConstants.DEFAULT_FINISHED_TTL_DAYS)
+        self.subject_cache_airing_ttl_hours = self._parse_int('SUBJECT_CACHE_AIRING_TTL_HOURS',
+                                                              SubjectCacheConstants.DEFAULT_AIRING_TTL_HOURS)
+        self.enable_episodes = self._parse_bool(os.getenv('ENABLE_EPISODES', 'false'))
+        self.subject_types = self._parse_list(os.getenv('SUBJECT_TYPES') or ConfigConstants.DEFAULT_SUBJECT_TYPES)
+        self.episode_cache_file = os.getenv('EPISODE_CACHE_FILE') or EpisodeConstants.DEFAULT_CACHE_FILE
+        self.enable_http_cache = self._parse_bool(os.getenv('ENABLE_HTTP_CACHE', 'true'))
+        self.http_cache_file = os.getenv('HTTP_CACHE_FILE') or HttpCacheConstants.DEFAULT_CACHE_FILE
+        self.http_cache_collections_ttl = self._parse_int('HTTP_CACHE_COLLECTIONS_TTL',
+                                                          HttpCacheConstants.DEFAULT_COLLECTIONS_TTL)
+        self.http_cache_subjects_ttl = self._parse_int('HTTP_CACHE_SUBJECTS_TTL',
+                                                       HttpCacheConstants.DEFAULT_SUBJECTS_TTL)
+        self.metrics_file = os.getenv('METRICS_FILE') or None
+        self.metrics_prometheus_file = os.getenv('METRICS_PROMETHEUS_FILE') or None
+        # 连接池大小为0时按并发数自动确定
+        self.bangumi_pool_size = self._parse_int('BANGUMI_POOL_SIZE', 0)
+        self.notion_pool_size = self._parse_int('NOTION_POOL_SIZE', 0)
+        self.enable_http2 = self._parse_bool(os.getenv('ENABLE_HTTP2', 'true'))
+        self.http_keepalive_expiry = self._parse_float('HTTP_KEEPALIVE_EXPIRY', HttpPoolConstants.DEFAULT_KEEPALIVE_EXPIRY)
+        self.daemon_interval = self._parse_float('DAEMON_INTERVAL', DaemonConstants.DEFAULT_INTERVAL)
+        self.daemon_jitter = self._parse_float('DAEMON_JITTER', DaemonConstants.DEFAULT_JITTER)
+        self.daemon_full_fetch_cycles = self._parse_int('DAEMON_FULL_FETCH_CYCLES', DaemonConstants.DEFAULT_FULL_FETCH_CYCLES)
 
         self.validate()
 
@@ -27,17 +80,46 @@ class Config:
             return default
         return value.lower() in ['true', '1', 'yes', 'y']
 
+    def _parse_list(self, value: str) -> List[str]:
+        """解析逗号分隔的配置值，去除空项和重复项并保持顺序"""
+        items = [item.strip().lower() for item in value.split(',')]
+        return list(dict.fromkeys(item for item in items if item))
+
+    def _parse_int(self, name: str, default: int) -> int:
+        """解析整数配置值"""
+        value = os.getenv(name)
+        if value is None or value == '':
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ConfigError(f"无效的{name}值: {value}，必须为整数")
+
+    def _parse_float(self, name: str, default: float) -> float:
+        """解析浮点数配置值"""
+        value = os.getenv(name)
+        if value is None or value == '':
+            return float(default)
+        try:
+            return float(value)
+        except ValueError:
+            raise ConfigError(f"无效的{name}值: {value}，必须为数字")
+
     def validate(self) -> None:
         """验证配置完整性"""
-        required_fields = {
-            'BANGUMI_USERNAME': self.bangumi_username,
-            'NOTION_TOKEN': self.notion_token,
-            'NOTION_DATABASE_ID': self.notion_database_id
-        }
+        # 多目标模式下这些字段由目标配置文件提供，在load_targets中逐个验证
+        if not self.targets_file:
+            required_fields = {
+                'BANGUMI_USERNAME': self.bangumi_username,
+                'NOTION_TOKEN': self.notion_token,
+                'NOTION_DATABASE_ID': self.notion_database_id
+            }
 
-        missing_fields = [field_name for field_name, field_value in required_fields.items() if not field_value]
-        if missing_fields:
-            raise ConfigError(f"缺少必要的环境变量: {', '.join(missing_fields)}")
+            missing_fields = [field_name for field_name, field_value in required_fields.items() if not field_value]
+            if missing_fields:
+                if self.target_name:
+                    raise ConfigError(f"目标 {self.target_name} 缺少必要的配置: {', '.join(missing_fields)}")
+                raise ConfigError(f"缺少必要的环境变量: {', '.join(missing_fields)}")
 
         if self.log_level not in ConfigConstants.VALID_LOG_LEVELS:
             valid_levels = ', '.join(ConfigConstants.VALID_LOG_LEVELS)
@@ -47,13 +129,199 @@ class Config:
             valid_statuses = ', '.join(ConfigConstants.VALID_STATUSES)
             raise ConfigError(f"无效的SYNC_STATUS值: {self.sync_status}，有效值为: {valid_statuses}")
 
+        if self.notion_max_workers < 1:
+            raise ConfigError(f"无效的NOTION_MAX_WORKERS值: {self.notion_max_workers}，必须大于0")
+
+        if self.notion_rate_limit < 0:
+            raise ConfigError(f"无效的NOTION_RATE_LIMIT值: {self.notion_rate_limit}，不能为负数")
+
+        if self.bangumi_rate_limit < 0:
+            raise ConfigError(f"无效的BANGUMI_RATE_LIMIT值: {self.bangumi_rate_limit}，不能为负数")
+
+        if not 1 <= self.bangumi_page_size <= BangumiConstants.MAX_LIMIT:
+            raise ConfigError(f"无效的BANGUMI_PAGE_SIZE值: {self.bangumi_page_size}，有效范围为: 1-{BangumiConstants.MAX_LIMIT}")
+
+        if self.bangumi_max_workers < 1:
+            raise ConfigError(f"无效的BANGUMI_MAX_WORKERS值: {self.bangumi_max_workers}，必须大于0")
+
+        if self.state_resync_days < 0:
+            raise ConfigError(f"无效的STATE_RESYNC_DAYS值: {self.state_resync_days}，不能为负数")
+
+        if self.sync_engine not in ConfigConstants.VALID_ENGINES:
+            valid_engines = ', '.join(ConfigConstants.VALID_ENGINES)
+            raise ConfigError(f"无效的SYNC_ENGINE值: {self.sync_engine}，有效值为: {valid_engines}")
+
+        if not self.subject_types:
+            raise ConfigError("SUBJECT_TYPES不能为空")
+
+        invalid_types = [t for t in self.subject_types if t not in BangumiConstants.SUBJECT_TYPE_MAP]
+        if invalid_types:
+            valid_types = ', '.join(BangumiConstants.SUBJECT_TYPE_MAP)
+            raise ConfigError(f"无效的SUBJECT_TYPES值: {', '.join(invalid_types)}，有效值为: {valid_types}")
+
+        if self.max_parallel_targets < 1:
+            raise ConfigError(f"无效的MAX_PARALLEL_TARGETS值: {self.max_parallel_targets}，必须大于0")
+
+        if self.subject_cache_finished_ttl_days < 0:
+            raise ConfigError(f"无效的SUBJECT_CACHE_FINISHED_TTL_DAYS值: {self.subject_cache_finished_ttl_days}，不能为负数")
+
+        if self.subject_cache_airing_ttl_hours < 0:
+            raise ConfigError(f"无效的SUBJECT_CACHE_AIRING_TTL_HOURS值: {self.subject_cache_airing_ttl_hours}，不能为负数")
+
+        if self.http_cache_collections_ttl < 0:
+            raise ConfigError(f"无效的HTTP_CACHE_COLLECTIONS_TTL值: {self.http_cache_collections_ttl}，不能为负数")
+
+        if self.http_cache_subjects_ttl < 0:
+            raise ConfigError(f"无效的HTTP_CACHE_SUBJECTS_TTL值: {self.http_cache_subjects_ttl}，不能为负数")
+
+        if self.bangumi_pool_size < 0:
+            raise ConfigError(f"无效的BANGUMI_POOL_SIZE值: {self.bangumi_pool_size}，不能为负数")
+
+        if self.notion_pool_size < 0:
+            raise ConfigError(f"无效的NOTION_POOL_SIZE值: {self.notion_pool_size}，不能为负数")
+
+        if self.http_keepalive_expiry < 0:
+            raise ConfigError(f"无效的HTTP_KEEPALIVE_EXPIRY值: {self.http_keepalive_expiry}，不能为负数")
+
+        if self.daemon_interval <= 0:
+            raise ConfigError(f"无效的DAEMON_INTERVAL值: {self.daemon_interval}，必须大于0")
+
+        if not 0 <= self.daemon_jitter < 1:
+            raise ConfigError(f"无效的DAEMON_JITTER值: {self.daemon_jitter}，有效范围为: 0-1（不含1）")
+
+        if self.daemon_full_fetch_cycles < 1:
+            raise ConfigError(f"无效的DAEMON_FULL_FETCH_CYCLES值: {self.daemon_full_fetch_cycles}，必须大于0")
+
+    def load_targets(self) -> List["Config"]:
+        """读取多目标配置文件
+
+        文件为JSON格式，可以是目标列表，也可以是包含targets字段的对象。每个目标至少需要
+        bangumi_username和notion_database_id，未指定的字段沿用当前配置（环境变量）。
+
+        Returns:
+            每个目标对应的配置
+        """
+        try:
+            with open(self.targets_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ConfigError(f"读取目标配置文件失败: {self.targets_file}", e) from e
+
+        targets = data.get('targets') if isinstance(data, dict) else data
+        if not isinstance(targets, list) or not targets:
+            raise ConfigError(f"目标配置文件中没有目标: {self.targets_file}")
+
+        configs = [self.for_target(target) for target in targets]
+        names = [config.target_name for config in configs]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ConfigError(f"目标名称重复: {', '.join(duplicates)}")
+        return configs
+
+    def for_target(self, target: Dict[str, Any]) -> "Config":
+        """基于当前配置生成单个目标的配置
+
+        Args:
+            target: 目标配置文件中的一项
+
+        Returns:
+            该目标的配置
+        """
+        if not isinstance(target, dict):
+            raise ConfigError(f"无效的目标配置: {target}")
+        unknown = sorted(set(target) - set(ConfigConstants.TARGET_KEYS))
+        if unknown:
+            raise ConfigError(f"目标配置包含未知字段: {', '.join(unknown)}")
+
+        config = copy.copy(self)
+        config.targets_file = None
+        config.bangumi_username = target.get('bangumi_username')
+        config.notion_database_id = target.get('notion_database_id')
+        config.target_name = str(target.get('name') or config.bangumi_username)
+
+        # 令牌可以直接写在文件中，也可以指定从哪个环境变量读取
+        if target.get('notion_token_env'):
+            config.notion_token = os.getenv(target['notion_token_env'])
+        elif target.get('notion_token'):
+            config.notion_token = target['notion_token']
+
+        if 'sync_status' in target:
+            config.sync_status = str(target['sync_status']).lower()
+        if 'enable_delete' in target:
+            config.enable_delete = self._parse_bool(str(target['enable_delete']))
+        if 'archive_duplicates' in target:
+            config.archive_duplicates = self._parse_bool(str(target['archive_duplicates']))
+        if 'enable_schema_check' in target:
+            config.enable_schema_check = self._parse_bool(str(target['enable_schema_check']))
+        if 'incremental_fetch' in target:
+            config.incremental_fetch = self._parse_bool(str(target['incremental_fetch']))
+        if 'notion_fingerprint_property' in target:
+            config.notion_fingerprint_property = target['notion_fingerprint_property'] or None
+        if 'enable_enrich' in target:
+            config.enable_enrich = self._parse_bool(str(target['enable_enrich']))
+        if 'enable_episodes' in target:
+            config.enable_episodes = self._parse_bool(str(target['enable_episodes']))
+        if 'subject_types' in target:
+            # 可以写成列表，也可以与环境变量一样写成逗号分隔的字符串
+            subject_types = target['subject_types']
+            if isinstance(subject_types, list):
+                subject_types = ','.join(str(t) for t in subject_types)
+            config.subject_types = self._parse_list(str(subject_types))
+
+        # 每个目标使用独立的状态文件和同步计划日志
+        safe_name = re.sub(r'[^\w.-]', '_', config.target_name)
+        config.state_file = target.get('state_file') or os.path.join(
+            os.path.dirname(self.state_file), StateConstants.TARGET_STATE_FILE.format(name=safe_name))
+        config.journal_file = target.get('journal_file') or os.path.join(
+            os.path.dirname(self.journal_file), JournalConstants.TARGET_JOURNAL_FILE.format(name=safe_name))
+
+        config.validate()
+        return config
+
     def __str__(self) -> str:
         """返回配置字符串表示"""
         return f"Config(\n" \
+               f"  target_name: {self.target_name},\n" \
+               f"  targets_file: {self.targets_file},\n" \
+               f"  max_parallel_targets: {self.max_parallel_targets},\n" \
                f"  bangumi_username: {self.bangumi_username},\n" \
                f"  notion_token: {'***' if self.notion_token else None},\n" \
                f"  notion_database_id: {self.notion_database_id},\n" \
                f"  log_level: {self.log_level},\n" \
                f"  enable_delete: {self.enable_delete},\n" \
-               f"  sync_status: {self.sync_status}\n" \
+               f"  archive_duplicates: {self.archive_duplicates},\n" \
+               f"  enable_schema_check: {self.enable_schema_check},\n" \
+               f"  sync_status: {self.sync_status},\n" \
+               f"  notion_max_workers: {self.notion_max_workers},\n" \
+               f"  notion_rate_limit: {self.notion_rate_limit},\n" \
+               f"  bangumi_rate_limit: {self.bangumi_rate_limit},\n" \
+               f"  bangumi_page_size: {self.bangumi_page_size},\n" \
+               f"  bangumi_max_workers: {self.bangumi_max_workers},\n" \
+               f"  enable_state: {self.enable_state},\n" \
+               f"  state_file: {self.state_file},\n" \
+               f"  state_resync_days: {self.state_resync_days},\n" \
+               f"  enable_journal: {self.enable_journal},\n" \
+               f"  journal_file: {self.journal_file},\n" \
+               f"  incremental_fetch: {self.incremental_fetch},\n" \
+               f"  notion_fingerprint_property: {self.notion_fingerprint_property},\n" \
+               f"  sync_engine: {self.sync_engine},\n" \
+               f"  enable_enrich: {self.enable_enrich},\n" \
+               f"  enable_episodes: {self.enable_episodes},\n" \
+               f"  subject_types: {', '.join(self.subject_types)},\n" \
+               f"  subject_cache_file: {self.subject_cache_file},\n" \
+               f"  subject_cache_finished_ttl_days: {self.subject_cache_finished_ttl_days},\n" \
+               f"  subject_cache_airing_ttl_hours: {self.subject_cache_airing_ttl_hours},\n" \
+               f"  enable_http_cache: {self.enable_http_cache},\n" \
+               f"  http_cache_file: {self.http_cache_file},\n" \
+               f"  http_cache_collections_ttl: {self.http_cache_collections_ttl},\n" \
+               f"  http_cache_subjects_ttl: {self.http_cache_subjects_ttl},\n" \
+               f"  bangumi_pool_size: {self.bangumi_pool_size},\n" \
+               f"  notion_pool_size: {self.notion_pool_size},\n" \
+               f"  enable_http2: {self.enable_http2},\n" \
+               f"  http_keepalive_expiry: {self.http_keepalive_expiry},\n" \
+               f"  metrics_file: {self.metrics_file},\n" \
+               f"  metrics_prometheus_file: {self.metrics_prometheus_file},\n" \
+               f"  daemon_interval: {self.daemon_interval},\n" \
+               f"  daemon_jitter: {self.daemon_jitter},\n" \
+               f"  daemon_full_fetch_cycles: {self.daemon_full_fetch_cycles}\n" \
                f")"
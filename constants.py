@@ -10,6 +10,15 @@ class BangumiConstants:
     DEFAULT_RETRY_DELAY = 1
     USER_AGENT = "bangumi2notion/1.0.0"
     DEFAULT_LIMIT = 50
+    MAX_LIMIT = 100
+    DEFAULT_MAX_WORKERS = 4
+    PAGINATION_CONSISTENCY_RETRIES = 1
+    DEFAULT_REQUESTS_PER_SECOND = 5
+    DEFAULT_BURST = 5
+    # 条目详情中写入Notion的标签数上限
+    MAX_TAGS = 10
+    # 条目详情infobox中表示制作公司的字段
+    STUDIO_INFOBOX_KEYS = ("动画制作", "制作")
 
     WATCHING_STATUS_MAP = {
         1: "wish",
@@ -25,12 +34,68 @@ class BangumiConstants:
         3: "not_aired"
     }
 
-    ANIME_TYPE = 1
+    # 收藏接口subject_type参数的取值
+    SUBJECT_TYPE_MAP = {
+        "book": 1,
+        "anime": 2,
+        "music": 3,
+        "game": 4,
+        "real": 6
+    }
+    DEFAULT_SUBJECT_TYPE = "anime"
 
 
 class NotionConstants:
     """Notion相关常量"""
 
+    API_HOST = "api.notion.com"
+    MAX_PAGE_SIZE = 100
+    MAX_FILTER_CONDITIONS = 100
+    BANGUMI_SUBJECT_URL = "https://bangumi.tv/subject/"
+
+    # 加载Notion索引时需要的属性，封面属于页面本身始终返回
+    INDEX_PROPERTIES = ["标题", "评分", "观看状态", "播出状态", "已观看集数", "总集数",
+                        "开播日期", "完结日期", "Bangumi链接"]
+    # 条目详情补充的字段对应的属性，只有启用详情补充时才写入和加载
+    ENRICHED_PROPERTIES = {
+        "tags": "标签",
+        "studio": "制作公司",
+        "rating_count": "评分人数",
+        "summary": "简介"
+    }
+    # 剧集同步的字段对应的属性，只有启用剧集同步时才写入和加载
+    EPISODE_PROPERTIES = {
+        "episodes": "剧集",
+        "next_episode_date": "下集播出日期"
+    }
+    # 同步写入的属性及其类型，同步前的结构预检按此检查数据库
+    PROPERTY_TYPES = {
+        "标题": "title",
+        "评分": "number",
+        "观看状态": "select",
+        "播出状态": "select",
+        "已观看集数": "number",
+        "总集数": "number",
+        "开播日期": "date",
+        "完结日期": "date",
+        "Bangumi链接": "url",
+        "最后更新时间": "date",
+        "标签": "multi_select",
+        "制作公司": "rich_text",
+        "评分人数": "number",
+        "简介": "rich_text",
+        "剧集": "rich_text",
+        "下集播出日期": "date",
+        "类型": "select"
+    }
+    # 单个rich_text对象的最大字符数
+    MAX_TEXT_LENGTH = 2000
+    DEFAULT_MAX_WORKERS = 3
+    DEFAULT_REQUESTS_PER_SECOND = 3
+    DEFAULT_BURST = 3
+    DEFAULT_RETRY_COUNT = 5
+    DEFAULT_RETRY_DELAY = 1
+
     WATCHING_STATUS_MAP = {
         "wish": "想看",
         "watching": "在看",
@@ -45,6 +110,154 @@ class NotionConstants:
         "not_aired": "未播出"
     }
 
+    # 同步多种条目类型时写入的类型属性，只同步一种类型时不写入和加载
+    TYPE_PROPERTY = "类型"
+    # 数据库中可能不存在的索引属性，加载索引时缺少不告警
+    OPTIONAL_INDEX_PROPERTIES = [TYPE_PROPERTY]
+    SUBJECT_TYPE_MAP = {
+        "book": "书籍",
+        "anime": "动画",
+        "music": "音乐",
+        "game": "游戏",
+        "real": "三次元"
+    }
+
+
+class RateLimitConstants:
+    """限速与重试相关常量"""
+
+    # 可重试的HTTP状态码，其余4xx视为致命错误
+    RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+    # 服务端确定没有处理请求的HTTP状态码，非幂等请求（如创建页面）遇到这些状态码时可以直接重试
+    UNPROCESSED_STATUS_CODES = {429}
+    MAX_RETRY_DELAY = 60
+
+
+class StateConstants:
+    """本地状态存储相关常量"""
+
+    DEFAULT_STATE_FILE = ".bangumi2notion/state.db"
+    DEFAULT_RESYNC_DAYS = 7
+
+    META_LAST_FULL_SYNC = "last_full_sync"
+    META_NEEDS_FULL_RESYNC = "needs_full_resync"
+    META_HIGH_WATER_MARK = "bangumi_high_water_mark"
+    # 上次全量同步的条目类型，类型变化时水位线和状态不再覆盖全部记录，需要全量同步
+    META_SUBJECT_TYPES = "subject_types"
+    # 上次通过预检的数据库结构哈希（同步的属性及其在数据库中的实际结构），未变化时跳过对比
+    META_SCHEMA_HASH = "schema_hash"
+    # 多目标同步时每个目标单独的状态文件，位于STATE_FILE所在目录
+    TARGET_STATE_FILE = "state-{name}.db"
+
+
+class SubjectCacheConstants:
+    """条目详情缓存相关常量"""
+
+    DEFAULT_CACHE_FILE = ".bangumi2notion/subjects.db"
+    # 已完结条目的详情很少变化，缓存更久；其余条目较快过期以刷新评分人数等信息
+    DEFAULT_FINISHED_TTL_DAYS = 30
+    DEFAULT_AIRING_TTL_HOURS = 24
+    # SQLite单条语句的参数数量有限，按批查询
+    QUERY_BATCH_SIZE = 500
+
+
+class EpisodeConstants:
+    """剧集同步相关常量"""
+
+    DEFAULT_CACHE_FILE = ".bangumi2notion/episodes.db"
+    # /v0/episodes每页最多返回的剧集数
+    PAGE_LIMIT = 100
+    # 正片剧集的类型，SP、OP、ED等不参与进度计算
+    MAIN_EPISODE_TYPE = 0
+    # 剧集列表中已观看和未观看剧集的标记
+    WATCHED_MARK = "✓"
+    UNWATCHED_MARK = "·"
+    # SQLite单条语句的参数数量有限，按批查询
+    QUERY_BATCH_SIZE = 500
+    # 有剧集列表的条目类型，其余类型不请求剧集
+    SUBJECT_TYPES = ("anime", "real")
+
+
+class HttpPoolConstants:
+    """HTTP连接池相关常量"""
+
+    # requests会话为多少个主机分别保留连接池
+    POOL_HOSTS = 4
+    # 空闲长连接的保持时间（秒），需覆盖限速和重试退避造成的请求间隔
+    DEFAULT_KEEPALIVE_EXPIRY = 30
+
+
+class MetricsConstants:
+    """运行指标相关常量"""
+
+    # 请求延迟直方图的区间上界（秒）
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    PROMETHEUS_PREFIX = "bangumi2notion"
+    # 端点名称中需要去掉的高基数部分：(正则, 替换)
+    ENDPOINT_PATTERNS = (
+        (r"^/users/[^/]+/", "/users/{username}/"),
+        (r"/\d+(?=/|$)", "/{id}"),
+    )
+
+
+class JournalConstants:
+    """同步计划日志相关常量"""
+
+    DEFAULT_JOURNAL_FILE = ".bangumi2notion/journal.db"
+    # 多目标同步时每个目标单独的计划日志，位于JOURNAL_FILE所在目录
+    TARGET_JOURNAL_FILE = "journal-{name}.db"
+
+    META_CREATED_AT = "created_at"
+    META_DATABASE_ID = "database_id"
+    META_FULL_SCAN = "full_scan"
+    META_HIGH_WATER_MARK = "high_water_mark"
+    META_SUBJECT_TYPES = "subject_types"
+
+
+class DaemonConstants:
+    """常驻同步（--daemon）相关常量"""
+
+    # 两个周期之间的间隔（秒）
+    DEFAULT_INTERVAL = 600
+    # 间隔的随机抖动比例，避免多个实例在同一时刻请求API
+    DEFAULT_JITTER = 0.1
+    # 每隔多少个周期完整获取一次Bangumi收藏，其余周期只增量获取，完整获取才能发现删除的收藏
+    DEFAULT_FULL_FETCH_CYCLES = 12
+
+
+class HttpCacheConstants:
+    """Bangumi HTTP响应缓存相关常量"""
+
+    DEFAULT_CACHE_FILE = ".bangumi2notion/http_cache.db"
+    # 各类端点的新鲜期（秒），新鲜期内直接使用缓存，过期后带条件请求头重新验证。
+    # 追番列表默认每次都重新验证，避免分页数据与服务端不一致
+    DEFAULT_COLLECTIONS_TTL = 0
+    DEFAULT_SUBJECTS_TTL = 3600
+    # 端点类别与匹配的路径
+    ENDPOINT_FAMILIES = {
+        "collections": r"^/users/[^/]+/collections$",
+        "subjects": r"^/subjects/\d+$"
+    }
+    # 超过该天数未使用的缓存在打开时清理
+    MAX_AGE_DAYS = 30
+
+
+class FingerprintConstants:
+    """同步指纹相关常量"""
+
+    FIELD_HASH_LENGTH = 12
+    # 参与指纹计算的同步字段
+    FIELDS = ("title", "score", "status", "air_status", "ep_status", "total_episodes",
+              "air_date", "end_date", "bangumi_url", "cover")
+    # 条目详情补充的字段，只有启用详情补充时才参与指纹计算
+    ENRICHED_FIELDS = ("tags", "studio", "rating_count", "summary")
+    # 剧集同步的字段，只有启用剧集同步时才参与指纹计算
+    EPISODE_FIELDS = ("episodes", "next_episode_date")
+    # 同步多种条目类型时的类型字段，只同步一种类型时不参与指纹计算
+    TYPE_FIELD = "subject_type"
+    # Notion隐藏属性中的指纹过期但字段一致时，只需重写指纹本身
+    FINGERPRINT_FIELD = "fingerprint"
+
 
 class ConfigConstants:
     """配置相关常量"""
@@ -54,3 +267,13 @@ class ConfigConstants:
     DEFAULT_LOG_LEVEL = 'INFO'
     DEFAULT_SYNC_STATUS = 'all'
     DEFAULT_ENABLE_DELETE = True
+    DEFAULT_MAX_PARALLEL_TARGETS = 4
+    VALID_ENGINES = ['thread', 'async']
+    DEFAULT_ENGINE = 'thread'
+    DEFAULT_SUBJECT_TYPES = 'anime'
+
+    # 目标配置文件中每个目标允许的字段
+    TARGET_KEYS = ['name', 'bangumi_username', 'notion_token', 'notion_token_env', 'notion_database_id',
+                   'sync_status', 'enable_delete', 'archive_duplicates', 'enable_schema_check', 'state_file', 'incremental_fetch',
+                   'notion_fingerprint_property', 'enable_enrich', 'journal_file', 'enable_episodes',
+                   'subject_types']
@@ -0,0 +1,118 @@
+"""常驻同步模块
+
+--daemon模式下进程不退出，按配置的间隔循环执行同步周期。Bangumi/Notion客户端的连接池、
+本地状态（及其内存中的索引）和各类缓存在周期之间保持打开，每个周期不再重复支付
+解释器启动、导入、TLS握手和加载索引的开销；周期之间默认只增量获取Bangumi收藏。
+"""
+import logging
+import random
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SyncDaemon:
+    """同步周期调度器
+
+    按间隔（带随机抖动）调用同步周期函数，单个周期失败只记录错误，下个周期照常执行。
+    收到SIGTERM或SIGINT后等待当前周期结束再退出；再次收到SIGINT时立即中断。
+    """
+
+    def __init__(self, interval: float, jitter: float, full_fetch_cycles: int, max_cycles: Optional[int] = None):
+        """初始化调度器
+
+        Args:
+            interval: 两个周期开始之间的间隔（秒）
+            jitter: 间隔的随机抖动比例，实际间隔在interval*(1±jitter)之间
+            full_fetch_cycles: 每隔多少个周期完整获取一次Bangumi收藏，第一个周期总是完整获取
+            max_cycles: 最多执行的周期数，None表示一直运行
+        """
+        self.interval = interval
+        self.jitter = jitter
+        self.full_fetch_cycles = full_fetch_cycles
+        self.max_cycles = max_cycles
+        self.cycles = 0
+        self.failures = 0
+        self._stop = threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        """是否已请求停止"""
+        return self._stop.is_set()
+
+    def stop(self) -> None:
+        """请求在当前周期结束后停止"""
+        self._stop.set()
+
+    def is_full_fetch(self, cycle: int) -> bool:
+        """第cycle个周期（从0开始）是否完整获取Bangumi收藏"""
+        return cycle % self.full_fetch_cycles == 0
+
+    def next_delay(self, elapsed: float) -> float:
+        """计算距离下个周期开始还需等待的秒数
+
+        Args:
+            elapsed: 本周期已用的秒数
+
+        Returns:
+            等待秒数，周期耗时超过间隔时为0
+        """
+        interval = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        return max(interval - elapsed, 0.0)
+
+    def run(self, run_cycle: Callable[[int, bool], None]) -> None:
+        """循环执行同步周期，直到收到停止信号或达到max_cycles
+
+        Args:
+            run_cycle: 同步周期函数，参数为(周期序号, 是否完整获取Bangumi收藏)
+        """
+        previous = self._install_signal_handlers()
+        try:
+            logger.info(f"常驻同步已启动: 间隔 {self.interval:g} 秒（抖动 ±{self.jitter:.0%}），"
+                        f"每 {self.full_fetch_cycles} 个周期完整获取一次Bangumi收藏")
+            while not self.stopped:
+                cycle = self.cycles
+                full_fetch = self.is_full_fetch(cycle)
+                started = time.monotonic()
+                logger.info(f"=== 第 {cycle + 1} 个同步周期开始（{'完整获取' if full_fetch else '增量获取'}）===")
+                try:
+                    run_cycle(cycle, full_fetch)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"第 {cycle + 1} 个同步周期失败: {e}")
+                self.cycles += 1
+
+                elapsed = time.monotonic() - started
+                if self.max_cycles is not None and self.cycles >= self.max_cycles:
+                    break
+                delay = self.next_delay(elapsed)
+                logger.info(f"第 {cycle + 1} 个同步周期结束，耗时 {elapsed:.1f} 秒，{delay:.0f} 秒后开始下一个周期")
+                self._stop.wait(delay)
+        finally:
+            self._restore_signal_handlers(previous)
+        logger.info(f"常驻同步已停止: 共执行 {self.cycles} 个周期，失败 {self.failures} 个")
+
+    def _install_signal_handlers(self) -> dict:
+        """安装停止信号处理，只能在主线程中安装，返回原来的处理函数"""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        def handle(signum: int, frame) -> None:
+            if self.stopped and signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            logger.info(f"收到信号 {signal.Signals(signum).name}，当前周期结束后停止（再次按Ctrl+C立即中断）")
+            self.stop()
+
+        previous = {}
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous[signum] = signal.signal(signum, handle)
+        return previous
+
+    @staticmethod
+    def _restore_signal_handlers(previous: dict) -> None:
+        """恢复原来的信号处理函数"""
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
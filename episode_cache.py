@@ -0,0 +1,70 @@
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from constants import EpisodeConstants
+from sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+class EpisodeCache(SqliteStore):
+    """本地剧集列表缓存
+
+    使用SQLite按subject_id保存条目的正片剧集列表，以及获取时收藏的总集数和已观看集数。
+    总集数和已观看集数都没有变化的条目直接使用缓存；已完结条目的剧集列表不再变化，
+    缓存后不会再次获取。稳定状态下每次同步只需请求进度变化的连载中条目。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS episodes (
+            subject_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            eps INTEGER,
+            ep_status INTEGER NOT NULL,
+            finished INTEGER NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+    """
+    DESCRIPTION = "剧集列表缓存"
+
+    def get_many(self, progress: Dict[int, Tuple[Optional[int], int]]) -> Dict[int, List[Dict[str, Any]]]:
+        """读取仍然有效的缓存
+
+        Args:
+            progress: 条目当前的(总集数, 已观看集数)，key为subject_id
+
+        Returns:
+            可以直接使用的剧集列表，key为subject_id；已完结的条目总是有效，
+            其余条目只有总集数和已观看集数都与获取时相同才有效
+        """
+        rows = self._select_in(
+            "SELECT subject_id, data, eps, ep_status, finished FROM episodes WHERE subject_id IN ({placeholders})",
+            list(progress), batch_size=EpisodeConstants.QUERY_BATCH_SIZE
+        )
+        return {
+            subject_id: json.loads(data)
+            for subject_id, data, eps, ep_status, finished in rows
+            if finished or progress[subject_id] == (eps, ep_status)
+        }
+
+    def put_many(self, entries: List[Tuple[int, List[Dict[str, Any]], Optional[int], int, bool]]) -> None:
+        """写入缓存
+
+        Args:
+            entries: (subject_id, 剧集列表, 总集数, 已观看集数, 是否已完结)列表
+        """
+        now = time.time()
+        rows = [
+            (subject_id, json.dumps(episodes, ensure_ascii=False), eps, ep_status, int(finished), now)
+            for subject_id, episodes, eps, ep_status, finished in entries
+        ]
+        with self._writing() as conn:
+            conn.executemany(
+                "INSERT INTO episodes (subject_id, data, eps, ep_status, finished, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(subject_id) DO UPDATE SET data = excluded.data, eps = excluded.eps, "
+                "ep_status = excluded.ep_status, finished = excluded.finished, fetched_at = excluded.fetched_at",
+                rows
+            )
+        logger.debug(f"剧集列表缓存已更新: {len(rows)} 条记录")
@@ -29,6 +29,26 @@ class NotionAPIError(BaseError):
     pass
 
 
+class SchemaError(NotionAPIError):
+    """Notion数据库结构与同步的属性不兼容"""
+    pass
+
+
 class SyncError(BaseError):
     """同步过程错误"""
     pass
+
+
+class StateError(BaseError):
+    """本地状态存储错误"""
+    pass
+
+
+class SyncCancelledError(SyncError):
+    """同步被取消（另一个并发阶段失败时抛出）"""
+    pass
+
+
+class CacheError(BaseError):
+    """本地缓存错误"""
+    pass
@@ -0,0 +1,192 @@
+"""同步内容指纹模块
+
+将需要同步的字段规范化后计算指纹，Bangumi记录、Notion页面和本地状态使用同一套规则，
+对比时只需一次哈希比较；哈希不一致时再按字段哈希找出具体变化的字段。
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from constants import NotionConstants, FingerprintConstants
+
+
+class Fingerprint:
+    """同步内容指纹"""
+
+    __slots__ = ("digest", "field_hashes")
+
+    def __init__(self, digest: Optional[str], field_hashes: Optional[Dict[str, str]] = None):
+        """初始化指纹
+
+        Args:
+            digest: 整体内容哈希
+            field_hashes: 各字段的哈希，未知时为None
+        """
+        self.digest = digest
+        self.field_hashes = field_hashes
+
+    def __repr__(self) -> str:
+        return f"Fingerprint({self.digest})"
+
+
+def _normalize(value: Any) -> Any:
+    """规范化字段值，消除空值和数字类型带来的差异"""
+    if value == "" or value == []:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _hash(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def bangumi_fields(bangumi_item: Dict[str, Any]) -> Dict[str, Any]:
+    """提取Bangumi记录中需要同步的字段，取值与写入Notion的内容一致
+
+    Args:
+        bangumi_item: 解析后的Bangumi追番记录
+
+    Returns:
+        规范化后的字段字典
+    """
+    fields = {
+        "title": bangumi_item.get("title_cn") or bangumi_item.get("title"),
+        "score": bangumi_item.get("score"),
+        "status": NotionConstants.WATCHING_STATUS_MAP.get(bangumi_item.get("status"), "未知"),
+        "air_status": NotionConstants.AIR_STATUS_MAP.get(bangumi_item.get("air_status"), "未知"),
+        "ep_status": bangumi_item.get("ep_status", 0),
+        "total_episodes": bangumi_item.get("total_episodes"),
+        "air_date": bangumi_item.get("air_date"),
+        "end_date": bangumi_item.get("end_date"),
+        "bangumi_url": bangumi_item.get("bangumi_url"),
+        "cover": bangumi_item.get("cover")
+    }
+    # 条目详情补充的字段只在记录经过补充时参与对比
+    fields.update({name: bangumi_item[name] for name in FingerprintConstants.ENRICHED_FIELDS if name in bangumi_item})
+    # 剧集同步的字段同样只在获取到剧集列表时参与对比
+    fields.update({name: bangumi_item[name] for name in FingerprintConstants.EPISODE_FIELDS if name in bangumi_item})
+    # 条目类型只在同步多种类型时参与对比
+    if FingerprintConstants.TYPE_FIELD in bangumi_item:
+        fields[FingerprintConstants.TYPE_FIELD] = NotionConstants.SUBJECT_TYPE_MAP.get(
+            bangumi_item[FingerprintConstants.TYPE_FIELD], "未知")
+    for name in ("summary", "episodes"):
+        if fields.get(name):
+            fields[name] = fields[name][:NotionConstants.MAX_TEXT_LENGTH]
+    return {name: _normalize(value) for name, value in fields.items()}
+
+
+def notion_fields(page: Dict[str, Any]) -> Dict[str, Any]:
+    """提取Notion页面中已同步的字段
+
+    Args:
+        page: Notion页面原始数据
+
+    Returns:
+        规范化后的字段字典
+    """
+    props = page.get("properties", {})
+
+    def text(name: str, kind: str) -> Optional[str]:
+        items = (props.get(name) or {}).get(kind) or []
+        return "".join(item.get("plain_text") or item.get("text", {}).get("content", "") for item in items) or None
+
+    def number(name: str) -> Any:
+        return (props.get(name) or {}).get("number")
+
+    def select(name: str) -> Optional[str]:
+        return ((props.get(name) or {}).get("select") or {}).get("name")
+
+    def date(name: str) -> Optional[str]:
+        return ((props.get(name) or {}).get("date") or {}).get("start")
+
+    fields = {
+        "title": text("标题", "title"),
+        "score": number("评分"),
+        "status": select("观看状态"),
+        "air_status": select("播出状态"),
+        "ep_status": number("已观看集数"),
+        "total_episodes": number("总集数"),
+        "air_date": date("开播日期"),
+        "end_date": date("完结日期"),
+        "bangumi_url": (props.get("Bangumi链接") or {}).get("url"),
+        "cover": ((page.get("cover") or {}).get("external") or {}).get("url")
+    }
+    # 条目详情补充的属性只在页面返回了这些属性时参与对比
+    enriched = NotionConstants.ENRICHED_PROPERTIES
+    if enriched["tags"] in props:
+        fields["tags"] = [option.get("name") for option in props[enriched["tags"]].get("multi_select") or []]
+    if enriched["studio"] in props:
+        fields["studio"] = text(enriched["studio"], "rich_text")
+    if enriched["rating_count"] in props:
+        fields["rating_count"] = number(enriched["rating_count"])
+    if enriched["summary"] in props:
+        fields["summary"] = text(enriched["summary"], "rich_text")
+    episodes = NotionConstants.EPISODE_PROPERTIES
+    if episodes["episodes"] in props:
+        fields["episodes"] = text(episodes["episodes"], "rich_text")
+    if episodes["next_episode_date"] in props:
+        fields["next_episode_date"] = date(episodes["next_episode_date"])
+    if NotionConstants.TYPE_PROPERTY in props:
+        fields[FingerprintConstants.TYPE_FIELD] = select(NotionConstants.TYPE_PROPERTY)
+    return {name: _normalize(value) for name, value in fields.items()}
+
+
+def notion_stored_digest(page: Dict[str, Any], property_name: Optional[str]) -> Optional[str]:
+    """读取写入Notion隐藏属性中的指纹
+
+    Args:
+        page: Notion页面原始数据
+        property_name: 保存指纹的rich_text属性名，未配置时为None
+
+    Returns:
+        指纹字符串，不存在时返回None
+    """
+    if not property_name:
+        return None
+    items = (page.get("properties", {}).get(property_name) or {}).get("rich_text") or []
+    digest = "".join(item.get("plain_text") or item.get("text", {}).get("content", "") for item in items)
+    return digest or None
+
+
+def field_hash(value: Any) -> str:
+    """计算单个字段值的哈希，与指纹中的字段哈希一致
+
+    Args:
+        value: 字段值
+
+    Returns:
+        字段哈希
+    """
+    return _hash(_normalize(value))[:FingerprintConstants.FIELD_HASH_LENGTH]
+
+
+def compute(fields: Dict[str, Any]) -> Fingerprint:
+    """计算字段字典的指纹
+
+    Args:
+        fields: 规范化后的字段字典
+
+    Returns:
+        包含整体哈希和各字段哈希的指纹
+    """
+    field_hashes = {name: field_hash(value) for name, value in fields.items()}
+    return Fingerprint(_hash(field_hashes), field_hashes)
+
+
+def changed_fields(new: Fingerprint, old: Optional[Fingerprint]) -> List[str]:
+    """找出两个指纹之间变化的字段
+
+    Args:
+        new: Bangumi记录的指纹
+        old: Notion页面或本地状态的指纹
+
+    Returns:
+        变化的字段名列表；整体哈希一致时为空，旧指纹缺少字段哈希时返回全部字段
+    """
+    if old is not None and old.digest == new.digest:
+        return []
+    if old is None or not old.field_hashes:
+        return list(new.field_hashes)
+    return [name for name, value in new.field_hashes.items() if old.field_hashes.get(name) != value]
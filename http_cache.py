@@ -0,0 +1,158 @@
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+from constants import HttpCacheConstants
+from sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """一条缓存的HTTP响应"""
+
+    __slots__ = ("key", "etag", "last_modified", "body", "stored_at")
+
+    def __init__(self, key: str, etag: Optional[str], last_modified: Optional[str], body: str, stored_at: float):
+        """初始化缓存响应
+
+        Args:
+            key: 缓存键（URL和排序后的查询参数）
+            etag: 响应的ETag
+            last_modified: 响应的Last-Modified
+            body: 响应正文
+            stored_at: 写入或最近一次验证的时间戳
+        """
+        self.key = key
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.stored_at = stored_at
+
+    def data(self) -> Any:
+        """解析响应正文"""
+        return json.loads(self.body)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """返回重新验证时使用的条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def __repr__(self) -> str:
+        return f"CachedResponse({self.key}, {self.etag})"
+
+
+class HttpCache(SqliteStore):
+    """持久化的HTTP响应缓存
+
+    使用SQLite按URL保存响应正文、ETag和Last-Modified。新鲜期内的请求直接返回缓存，
+    过期后发送If-None-Match/If-Modified-Since，服务端返回304时使用本地正文。
+    新鲜期按端点类别（追番列表、条目详情）分别配置。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body TEXT NOT NULL,
+            stored_at REAL NOT NULL
+        );
+    """
+    DESCRIPTION = "HTTP缓存"
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, int]] = None):
+        """初始化HTTP缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            ttls: 各端点类别的新鲜期（秒），key为HttpCacheConstants.ENDPOINT_FAMILIES中的类别
+        """
+        self.ttls = ttls or {}
+        self._families = {name: re.compile(pattern)
+                          for name, pattern in HttpCacheConstants.ENDPOINT_FAMILIES.items()}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        super().__init__(path)
+
+    def _prepare(self) -> None:
+        """清理长期未使用的响应，避免缓存文件无限增长"""
+        cutoff = time.time() - HttpCacheConstants.MAX_AGE_DAYS * 86400
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE stored_at < ?", (cutoff,))
+
+    @staticmethod
+    def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """由URL和查询参数生成缓存键，参数按名称排序"""
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def ttl(self, endpoint: str) -> int:
+        """返回端点的新鲜期（秒），不属于任何类别的端点为0"""
+        for name, pattern in self._families.items():
+            if pattern.match(endpoint):
+                return self.ttls.get(name, 0)
+        return 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应，不存在时返回None
+        """
+        with self._reading() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return CachedResponse(key, *row) if row else None
+
+    def is_fresh(self, cached: CachedResponse, endpoint: str) -> bool:
+        """判断缓存是否仍在新鲜期内，新鲜时计为一次命中"""
+        fresh = time.time() - cached.stored_at < self.ttl(endpoint)
+        if fresh:
+            with self._lock:
+                self.hits += 1
+        return fresh
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str], body: str) -> None:
+        """写入响应
+
+        Args:
+            key: 缓存键
+            etag: 响应的ETag
+            last_modified: 响应的Last-Modified
+            body: 响应正文
+        """
+        with self._writing() as conn:
+            self.misses += 1
+            conn.execute(
+                "INSERT INTO responses (key, etag, last_modified, body, stored_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "body = excluded.body, stored_at = excluded.stored_at",
+                (key, etag, last_modified, body, time.time())
+            )
+
+    def touch(self, key: str) -> None:
+        """服务端返回304时刷新缓存的验证时间
+
+        Args:
+            key: 缓存键
+        """
+        with self._writing() as conn:
+            self.revalidated += 1
+            conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+
+    def summary(self) -> str:
+        """返回本次运行的缓存统计，用于日志"""
+        return f"新鲜命中 {self.hits} 次，304重新验证 {self.revalidated} 次，完整下载 {self.misses} 次"
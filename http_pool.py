@@ -0,0 +1,171 @@
+"""HTTP连接池模块
+
+为Bangumi（requests/httpx）和Notion（httpx）客户端创建与并发数匹配的连接池，
+保持长连接复用TCP/TLS连接，安装了h2时启用HTTP/2，并统计新建连接数与复用情况；
+每个响应的传输字节数记录到运行指标中。
+"""
+import importlib.util
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from constants import HttpPoolConstants
+from metrics import get_metrics
+
+
+class PoolStats:
+    """连接池统计：新建连接数与发出的请求数"""
+
+    def __init__(self, opened: int = 0, requests_sent: int = 0):
+        """初始化统计
+
+        Args:
+            opened: 新建的TCP连接数
+            requests_sent: 发出的请求数
+        """
+        self.opened = opened
+        self.requests = requests_sent
+        self._lock = threading.Lock()
+
+    def record_connection(self) -> None:
+        """记录一次新建连接"""
+        with self._lock:
+            self.opened += 1
+
+    def record_request(self) -> None:
+        """记录一次请求"""
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def reused(self) -> int:
+        """复用已有连接发出的请求数"""
+        return max(self.requests - self.opened, 0)
+
+    def summary(self) -> str:
+        """返回统计摘要，用于日志"""
+        ratio = self.reused / self.requests if self.requests else 0
+        return f"请求 {self.requests} 次，新建连接 {self.opened} 个，复用连接 {self.reused} 次（复用率 {ratio:.0%}）"
+
+    def __repr__(self) -> str:
+        return f"PoolStats(opened={self.opened}, requests={self.requests})"
+
+
+def http2_available() -> bool:
+    """httpx的HTTP/2支持依赖可选的h2包"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_session(pool_size: int, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """创建连接池大小与并发数匹配的requests会话
+
+    requests默认每个主机只保留10个连接，并发数超过时多出的连接用完即丢弃，
+    这里按并发数设置连接池大小，保证每个工作线程都能复用长连接。
+
+    Args:
+        pool_size: 每个主机保留的最大连接数
+        headers: 会话默认请求头
+
+    Returns:
+        requests会话
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HttpPoolConstants.POOL_HOSTS, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_record_requests_transfer)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def session_stats(session: requests.Session) -> PoolStats:
+    """从requests会话的urllib3连接池读取统计"""
+    stats = PoolStats()
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools[key]
+            stats.opened += pool.num_connections
+            stats.requests += pool.num_requests
+    return stats
+
+
+def create_httpx_client(pool_size: int,
+                        stats: PoolStats,
+                        asynchronous: bool = False,
+                        http2: bool = True,
+                        keepalive_expiry: float = HttpPoolConstants.DEFAULT_KEEPALIVE_EXPIRY,
+                        **kwargs: Any) -> Union[httpx.Client, httpx.AsyncClient]:
+    """创建连接池大小与并发数匹配的httpx客户端
+
+    Args:
+        pool_size: 最大连接数，同时也是保持的长连接数
+        stats: 连接池统计，通过httpcore的trace扩展记录新建连接和请求
+        asynchronous: 是否创建AsyncClient
+        http2: 是否在安装了h2时启用HTTP/2
+        keepalive_expiry: 空闲长连接的保持时间（秒）
+        **kwargs: 传给httpx客户端的其他参数
+
+    Returns:
+        httpx客户端
+    """
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                          keepalive_expiry=keepalive_expiry)
+    trace = _trace(stats)
+
+    if asynchronous:
+        async def async_trace(event_name: str, info: Dict[str, Any]) -> None:
+            trace(event_name, info)
+
+        async def attach_async_trace(request: httpx.Request) -> None:
+            request.extensions["trace"] = async_trace
+
+        async def record_async_transfer(response: httpx.Response) -> None:
+            await response.aread()
+            _record_httpx_transfer(response)
+
+        return httpx.AsyncClient(limits=limits, http2=http2 and http2_available(),
+                                 event_hooks={"request": [attach_async_trace], "response": [record_async_transfer]},
+                                 **kwargs)
+
+    def attach_trace(request: httpx.Request) -> None:
+        request.extensions["trace"] = trace
+
+    def record_transfer(response: httpx.Response) -> None:
+        response.read()
+        _record_httpx_transfer(response)
+
+    return httpx.Client(limits=limits, http2=http2 and http2_available(),
+                        event_hooks={"request": [attach_trace], "response": [record_transfer]}, **kwargs)
+
+
+def _record_requests_transfer(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """requests响应钩子：记录请求体和响应体的字节数"""
+    body = response.request.body
+    sent = len(body.encode() if isinstance(body, str) else body) if body else 0
+    # 钩子在读取响应体之前调用，先读取响应体；urllib3的tell()为线上读取的字节数，压缩响应为压缩后的大小
+    content = response.content
+    received = response.raw.tell() if hasattr(response.raw, "tell") else len(content)
+    get_metrics().record_transfer(response.url, sent, received)
+
+
+def _record_httpx_transfer(response: httpx.Response) -> None:
+    """记录httpx请求体和响应体的字节数"""
+    get_metrics().record_transfer(response.request.url, len(response.request.content), response.num_bytes_downloaded)
+
+
+def _trace(stats: PoolStats) -> Callable[[str, Dict[str, Any]], None]:
+    """创建httpcore的trace回调：建立TCP连接时计为新建连接，发送请求头时计为一次请求"""
+    def trace(event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            stats.record_connection()
+        elif event_name.endswith(".send_request_headers.started"):
+            stats.record_request()
+    return trace
@@ -0,0 +1,289 @@
+"""运行指标模块
+
+进程内统一记录各同步阶段耗时、按端点统计的请求数、延迟分布、重试与限流次数，
+以及按主机统计的传输字节数，运行结束时写入JSON报告或Prometheus文本格式。
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from constants import MetricsConstants
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointStats:
+    """单个端点的请求统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        # 每个区间的请求数，最后一项为超过最大上界的请求
+        self.buckets = [0] * (len(MetricsConstants.LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        """记录一次请求延迟"""
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        for index, bound in enumerate(MetricsConstants.LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def cumulative_buckets(self) -> Dict[str, int]:
+        """返回Prometheus风格的累计区间计数，key为上界"""
+        counts = {}
+        total = 0
+        for bound, count in zip(MetricsConstants.LATENCY_BUCKETS, self.buckets):
+            total += count
+            counts[_format_bound(bound)] = total
+        counts["+Inf"] = total + self.buckets[-1]
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为JSON报告中的结构"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rate_limit_wait_seconds": round(self.wait_seconds, 3),
+            "latency": {
+                "sum_seconds": round(self.latency_sum, 3),
+                "avg_seconds": round(self.latency_sum / self.requests, 3) if self.requests else 0,
+                "max_seconds": round(self.latency_max, 3),
+                "buckets": self.cumulative_buckets()
+            }
+        }
+
+
+class Metrics:
+    """线程安全的运行指标记录器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空已记录的指标，开始新的一次运行"""
+        with self._lock:
+            self.started_at = datetime.now()
+            self._started = time.monotonic()
+            self.endpoints: Dict[str, EndpointStats] = {}
+            self.transfer: Dict[str, Dict[str, int]] = {}
+            self.phases: Dict[str, Dict[str, float]] = {}
+            self.results: Dict[str, Dict[str, int]] = {}
+
+    def _endpoint(self, endpoint: str) -> EndpointStats:
+        """返回端点的统计对象，调用方需持有_lock"""
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_request(self, endpoint: str, seconds: float, wait: float = 0.0, error: bool = False) -> None:
+        """记录一次请求
+
+        Args:
+            endpoint: 端点名称
+            seconds: 请求耗时（秒），不含等待令牌的时间
+            wait: 发送前等待令牌的秒数
+            error: 请求是否失败
+        """
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.requests += 1
+            stats.errors += error
+            stats.wait_seconds += wait
+            stats.observe(seconds)
+
+    def record_retry(self, endpoint: str, throttled: bool) -> None:
+        """记录一次重试
+
+        Args:
+            endpoint: 端点名称
+            throttled: 是否因服务端限流（Retry-After）而重试
+        """
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.retries += 1
+            stats.throttled += throttled
+
+    def record_transfer(self, url: Any, sent: int, received: int) -> None:
+        """记录一次HTTP交换的传输字节数
+
+        Args:
+            url: 请求URL
+            sent: 请求体字节数
+            received: 响应体字节数（线上传输的字节数，压缩时为压缩后大小）
+        """
+        host = urlsplit(str(url)).hostname or "unknown"
+        with self._lock:
+            transfer = self.transfer.setdefault(host, {"responses": 0, "sent_bytes": 0, "received_bytes": 0})
+            transfer["responses"] += 1
+            transfer["sent_bytes"] += sent
+            transfer["received_bytes"] += received
+
+    def record_sync(self, target: str, result: Dict[str, Any]) -> None:
+        """记录一个目标的阶段耗时和操作数
+
+        Args:
+            target: 目标名称
+            result: SyncManager.sync返回的结果统计
+        """
+        with self._lock:
+            self.phases[target] = dict(result.get("timings", {}))
+            self.results[target] = {
+                "add": result["add_count"],
+                "update": result["update_count"],
+                "delete": result["delete_count"],
+                "duplicates": result["duplicate_count"],
+                "failed": result["failed_count"]
+            }
+
+    def report(self) -> Dict[str, Any]:
+        """生成JSON报告"""
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "finished_at": datetime.now().isoformat(),
+                "duration_seconds": round(time.monotonic() - self._started, 3),
+                "phases": {target: dict(timings) for target, timings in self.phases.items()},
+                "operations": {target: dict(counts) for target, counts in self.results.items()},
+                "requests": {endpoint: stats.to_dict() for endpoint, stats in sorted(self.endpoints.items())},
+                "transfer": {host: dict(transfer) for host, transfer in sorted(self.transfer.items())}
+            }
+
+    def prometheus(self) -> str:
+        """生成Prometheus文本格式，可供node_exporter的textfile collector采集"""
+        report = self.report()
+        prefix = MetricsConstants.PROMETHEUS_PREFIX
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, description: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value, *suffix in samples:
+                label_text = ",".join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+                sample_name = f"{prefix}_{name}{suffix[0] if suffix else ''}"
+                lines.append(f"{sample_name}{{{label_text}}} {value}" if label_text else f"{sample_name} {value}")
+
+        metric("run_duration_seconds", "gauge", "Wall time of the last run.",
+               [({}, report["duration_seconds"])])
+        metric("last_run_timestamp_seconds", "gauge", "Unix time when the last run finished.",
+               [({}, round(time.time(), 3))])
+        metric("phase_seconds", "gauge", "Wall time of each sync phase.",
+               [({"target": target, "phase": phase}, seconds)
+                for target, timings in report["phases"].items() for phase, seconds in timings.items()])
+        metric("operations", "gauge", "Notion write operations planned in the last run.",
+               [({"target": target, "action": action}, count)
+                for target, counts in report["operations"].items()
+                for action, count in counts.items() if action != "failed"])
+        metric("failed_operations", "gauge", "Notion write operations that failed in the last run.",
+               [({"target": target}, counts["failed"]) for target, counts in report["operations"].items()])
+
+        requests = report["requests"]
+        for name, key, description in (
+                ("requests_total", "requests", "HTTP requests sent, including retries."),
+                ("request_errors_total", "errors", "HTTP requests that failed."),
+                ("request_retries_total", "retries", "Requests retried after a retryable error."),
+                ("request_throttled_total", "throttled", "Retries caused by server-side rate limiting."),
+                ("rate_limit_wait_seconds_total", "rate_limit_wait_seconds", "Time spent waiting for the local token bucket.")):
+            metric(name, "counter", description,
+                   [({"endpoint": endpoint}, stats[key]) for endpoint, stats in requests.items()])
+
+        samples = []
+        for endpoint, stats in requests.items():
+            for bound, count in stats["latency"]["buckets"].items():
+                samples.append(({"endpoint": endpoint, "le": bound}, count, "_bucket"))
+            samples.append(({"endpoint": endpoint}, stats["latency"]["sum_seconds"], "_sum"))
+            samples.append(({"endpoint": endpoint}, stats["requests"], "_count"))
+        metric("request_duration_seconds", "histogram", "HTTP request latency.", samples)
+
+        for name, key, description in (("bytes_sent_total", "sent_bytes", "Request body bytes sent."),
+                                       ("bytes_received_total", "received_bytes", "Response body bytes received.")):
+            metric(name, "counter", description,
+                   [({"host": host}, transfer[key]) for host, transfer in report["transfer"].items()])
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> List[str]:
+        """返回按端点汇总的请求统计，用于日志"""
+        with self._lock:
+            lines = []
+            for endpoint, stats in sorted(self.endpoints.items()):
+                average = stats.latency_sum / stats.requests * 1000 if stats.requests else 0
+                lines.append(f"{endpoint}: 请求 {stats.requests} 次，平均 {average:.0f} ms，最长 {stats.latency_max * 1000:.0f} ms，"
+                             f"重试 {stats.retries} 次（限流 {stats.throttled} 次），等待令牌 {stats.wait_seconds:.1f} 秒")
+            for host, transfer in sorted(self.transfer.items()):
+                lines.append(f"{host}: 发送 {transfer['sent_bytes']:,} 字节，接收 {transfer['received_bytes']:,} 字节")
+            return lines
+
+    def write(self, json_file: Optional[str] = None, prometheus_file: Optional[str] = None) -> None:
+        """写入JSON报告和Prometheus文本，路径为None时跳过
+
+        Args:
+            json_file: JSON报告路径
+            prometheus_file: Prometheus文本格式文件路径
+        """
+        if json_file:
+            _write_atomic(json_file, json.dumps(self.report(), ensure_ascii=False, indent=2))
+            logger.info(f"运行指标已写入: {json_file}")
+        if prometheus_file:
+            _write_atomic(prometheus_file, self.prometheus())
+            logger.info(f"Prometheus指标已写入: {prometheus_file}")
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """返回进程内共享的指标记录器"""
+    return _metrics
+
+
+def endpoint_label(service: str, endpoint: str) -> str:
+    """将请求路径规范化为端点名称，去掉用户名、条目ID等高基数的部分
+
+    Args:
+        service: 服务名，如bangumi、notion
+        endpoint: 请求路径或API方法名
+
+    Returns:
+        端点名称，如 "bangumi /users/{username}/collections"
+    """
+    for pattern, replacement in MetricsConstants.ENDPOINT_PATTERNS:
+        endpoint = re.sub(pattern, replacement, endpoint)
+    return f"{service} {endpoint}"
+
+
+def _format_bound(bound: float) -> str:
+    """格式化直方图区间上界"""
+    return f"{bound:g}"
+
+
+def _escape(value: Any) -> str:
+    """转义Prometheus标签值"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """先写入临时文件再替换，采集方不会读到写了一半的文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
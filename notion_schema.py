@@ -0,0 +1,97 @@
+"""Notion数据库结构预检模块
+
+同步开始前获取一次数据库结构，与本次同步写入的属性对比：缺少的属性和选择项合并为一次
+databases.update请求创建；属性类型不一致等无法自动修复的问题在任何写入之前报告，
+不会等到每个创建页面的请求逐个失败。
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Tuple
+
+# 属性名 -> (属性类型, 需要存在的选项)，选项只对select和multi_select有意义
+ExpectedSchema = Dict[str, Tuple[str, List[str]]]
+
+
+def _options(prop: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """返回select或multi_select属性现有的选项"""
+    return (prop.get(prop.get("type")) or {}).get("options") or []
+
+
+def schema_hash(expected: ExpectedSchema, properties: Dict[str, Any]) -> str:
+    """计算需要检查的数据库结构的哈希
+
+    包含同步写入的属性和数据库中这些属性的实际类型和选项名，数据库中其他属性的变化不影响哈希。
+    属性或选项在Notion中被重命名、删除时哈希随之变化，不会跳过对比。
+
+    Args:
+        expected: 本次同步写入的属性
+        properties: 获取到的数据库结构中的properties
+
+    Returns:
+        哈希字符串，同步的属性或数据库中对应的结构变化时改变
+    """
+    normalized = {name: [kind, sorted(options)] for name, (kind, options) in expected.items()}
+    actual = {}
+    for name in expected:
+        prop = properties.get(name)
+        if prop is not None:
+            actual[name] = [prop.get("type"), sorted(option.get("name") for option in _options(prop))]
+    encoded = json.dumps({"expected": normalized, "actual": actual}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def plan_changes(expected: ExpectedSchema, properties: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """对比数据库结构，生成需要创建的属性和选项
+
+    Args:
+        expected: 本次同步写入的属性
+        properties: 数据库结构中的properties
+
+    Returns:
+        (databases.update的properties参数, 无法自动修复的问题)，两者都为空表示结构兼容
+    """
+    changes = {}
+    errors = []
+    for name, (kind, options) in expected.items():
+        prop = properties.get(name)
+        if prop is None:
+            if kind == "title":
+                # 每个数据库有且只有一个标题属性，不能新建，只能由用户重命名
+                current = next((key for key, value in properties.items() if value.get("type") == "title"), None)
+                errors.append(f"缺少标题属性「{name}」" + (f"，请将「{current}」重命名为「{name}」" if current else ""))
+                continue
+            changes[name] = {kind: {"options": [{"name": option} for option in options]} if options else {}}
+        elif prop.get("type") != kind:
+            errors.append(f"属性「{name}」的类型为{prop.get('type')}，需要为{kind}")
+        elif options:
+            existing = _options(prop)
+            names = {option.get("name") for option in existing}
+            missing = [option for option in options if option not in names]
+            if missing:
+                # 更新选项时需要带上现有选项，否则未列出的选项会被删除
+                changes[name] = {kind: {"options": [{key: option[key] for key in ("id", "name", "color") if key in option}
+                                                    for option in existing] +
+                                                   [{"name": option} for option in missing]}}
+    return changes, errors
+
+
+def describe_changes(changes: Dict[str, Any], properties: Dict[str, Any]) -> List[str]:
+    """生成变更的可读描述，用于日志
+
+    Args:
+        changes: plan_changes生成的变更
+        properties: 变更前的数据库结构
+
+    Returns:
+        每个属性一项的描述
+    """
+    descriptions = []
+    for name, change in changes.items():
+        kind = next(iter(change))
+        if name not in properties:
+            descriptions.append(f"新建属性「{name}」({kind})")
+        else:
+            existing = {option.get("name") for option in _options(properties[name])}
+            added = [option["name"] for option in change[kind]["options"] if option["name"] not in existing]
+            descriptions.append(f"属性「{name}」新增选项: {', '.join(added)}")
+    return descriptions
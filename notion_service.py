@@ -1,32 +1,365 @@
-from notion_client import Client
+from notion_client import AsyncClient, Client
+from notion_client.errors import RequestTimeoutError
+import copy
+import hashlib
+import httpx
 import logging
 import re
-from typing import Dict, List, Optional, Any
-from exceptions import NotionAPIError
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
+import fingerprint
+from exceptions import NotionAPIError, SyncCancelledError
+from constants import NotionConstants, FingerprintConstants, HttpPoolConstants
+from fingerprint import Fingerprint
+from http_pool import PoolStats, create_httpx_client
+from metrics import endpoint_label
+from rate_limiter import RetryPolicy, async_call_with_retry, call_with_retry, get_token_bucket
 
 logger = logging.getLogger(__name__)
 
 
-class NotionService:
-    """Notion API服务"""
-    
-    def __init__(self, token: str, database_id: str):
+class NotionRecord:
+    """Notion页面的紧凑记录
+
+    只保留对比和写入需要的页面ID、subject_id和同步字段，代替原始页面JSON常驻内存。
+    来自本地状态缓存的记录没有字段值，只有上次同步时保存的指纹。
+    """
+
+    __slots__ = ("page_id", "subject_id", "title", "score", "status", "air_status", "ep_status",
+                 "total_episodes", "air_date", "end_date", "bangumi_url", "cover",
+                 "enriched", "stored_digest", "fingerprint")
+
+    def __init__(self, page_id: str, subject_id: int, title: Optional[str] = None,
+                 fields: Optional[Dict[str, Any]] = None, stored_digest: Optional[str] = None,
+                 fingerprint: Optional[Fingerprint] = None):
+        """初始化页面记录
+
+        Args:
+            page_id: Notion页面ID
+            subject_id: Bangumi条目ID
+            title: 页面标题，fields中包含标题时可省略
+            fields: fingerprint.notion_fields解析出的同步字段
+            stored_digest: 页面隐藏属性中保存的指纹
+            fingerprint: 本地状态缓存中保存的指纹，来自Notion页面的记录为None
+        """
+        self.page_id = page_id
+        self.subject_id = subject_id
+        fields = fields or {}
+        for name in FingerprintConstants.FIELDS:
+            setattr(self, name, fields.get(name))
+        # 条目详情补充、剧集同步和条目类型的字段只有页面返回了对应属性时才存在
+        optional = FingerprintConstants.ENRICHED_FIELDS + FingerprintConstants.EPISODE_FIELDS + \
+            (FingerprintConstants.TYPE_FIELD,)
+        self.enriched = {name: fields[name] for name in optional if name in fields} or None
+        if title is not None:
+            self.title = title
+        self.stored_digest = stored_digest
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_page(cls, page: Dict[str, Any], subject_id: int,
+                  fingerprint_property: Optional[str] = None) -> "NotionRecord":
+        """解析Notion原始页面
+
+        Args:
+            page: Notion页面原始数据
+            subject_id: 从Bangumi链接中提取的条目ID
+            fingerprint_property: 保存同步指纹的rich_text属性名
+
+        Returns:
+            页面记录
+        """
+        return cls(page.get("id"), subject_id,
+                   fields=fingerprint.notion_fields(page),
+                   stored_digest=fingerprint.notion_stored_digest(page, fingerprint_property))
+
+    def fields(self) -> Dict[str, Any]:
+        """返回同步字段字典，与fingerprint.notion_fields的结果一致"""
+        fields = {name: getattr(self, name) for name in FingerprintConstants.FIELDS}
+        if self.enriched:
+            fields.update(self.enriched)
+        return fields
+
+    def __repr__(self) -> str:
+        return f"NotionRecord({self.subject_id}, {self.page_id}, {self.title})"
+
+
+class PageIndex:
+    """按subject_id索引的页面记录
+
+    同一subject_id对应多个页面时（例如上次同步在创建页面后中途退出），保留创建时间最早的页面，
+    创建时间相同时保留页面ID较小的，与页面返回顺序无关；其余页面记入duplicates。
+    """
+
+    def __init__(self, fingerprint_property: Optional[str] = None):
+        """初始化空索引
+
+        Args:
+            fingerprint_property: 保存同步指纹的rich_text属性名
+        """
+        self.fingerprint_property = fingerprint_property
+        self.records: Dict[int, NotionRecord] = {}
+        self.duplicates: Dict[int, List[NotionRecord]] = {}
+        # 保留页面的(创建时间, 页面ID)，只在建立索引期间使用
+        self._keys: Dict[int, Tuple[str, str]] = {}
+
+    def add(self, page: Dict[str, Any], subject_id: int) -> None:
+        """解析页面并加入索引
+
+        Args:
+            page: Notion页面原始数据
+            subject_id: 从Bangumi链接中提取的条目ID
+        """
+        record = NotionRecord.from_page(page, subject_id, self.fingerprint_property)
+        key = (page.get("created_time") or "", record.page_id or "")
+        current = self._keys.get(subject_id)
+        if current is not None:
+            if key > current:
+                self.duplicates.setdefault(subject_id, []).append(record)
+                return
+            self.duplicates.setdefault(subject_id, []).append(self.records[subject_id])
+        self.records[subject_id] = record
+        self._keys[subject_id] = key
+
+    def duplicate_count(self) -> int:
+        """多余页面的总数"""
+        return sum(len(records) for records in self.duplicates.values())
+
+
+class BaseNotionService:
+    """Notion API服务的公共部分：配置、限速、重试策略、查询条件构造和页面解析
+
+    NotionService和AsyncNotionService都继承此类，各自只实现发送请求的方法。
+    """
+
+    def __init__(self, token: str, database_id: str,
+                 requests_per_second: float = NotionConstants.DEFAULT_REQUESTS_PER_SECOND,
+                 retry_count: int = NotionConstants.DEFAULT_RETRY_COUNT,
+                 retry_delay: int = NotionConstants.DEFAULT_RETRY_DELAY,
+                 fingerprint_property: Optional[str] = None,
+                 pool_size: int = NotionConstants.DEFAULT_MAX_WORKERS,
+                 http2: bool = True,
+                 keepalive_expiry: float = HttpPoolConstants.DEFAULT_KEEPALIVE_EXPIRY):
         """初始化客户端
-        
+
         Args:
             token: Notion API密钥
             database_id: 目标数据库ID
+            requests_per_second: 每秒最多发起的请求数，0表示不限制
+            retry_count: 请求失败重试次数
+            retry_delay: 初始重试延迟（秒）
+            fingerprint_property: 保存同步指纹的rich_text属性名，未配置时为None
+            pool_size: 连接池大小，应不小于并发写入数
+            http2: 安装了h2时是否使用HTTP/2
+            keepalive_expiry: 空闲长连接的保持时间（秒）
         """
         self.token = token
         self.database_id = database_id
-        
+        self.fingerprint_property = fingerprint_property
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.keepalive_expiry = keepalive_expiry
+        self._pool_stats = PoolStats()
+        self._property_ids: Optional[Dict[str, str]] = None
+        # Notion按集成（令牌）限速，同一令牌的所有数据库共享一个令牌桶
+        token_key = hashlib.sha1(token.encode("utf-8")).hexdigest()[:12]
+        self.bucket = get_token_bucket(f"{NotionConstants.API_HOST}/{token_key}", requests_per_second,
+                                       NotionConstants.DEFAULT_BURST)
+        self.retry_policy = RetryPolicy(
+            retry_count,
+            retry_delay,
+            retryable_exceptions=(httpx.TransportError, RequestTimeoutError),
+            unsent_exceptions=(httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+        )
+
         try:
-            self.client = Client(auth=token)
+            self.client = self._create_client(token)
             logger.info(f"Notion客户端初始化成功")
         except Exception as e:
             logger.error(f"Notion客户端初始化失败: {e}")
             raise NotionAPIError(f"Notion客户端初始化失败", e) from e
-    
+
+    def _create_client(self, token: str) -> Any:
+        """创建notion_client客户端，由子类实现"""
+        raise NotImplementedError
+
+    def pool_stats(self) -> PoolStats:
+        """返回连接池统计，同一令牌的所有数据库共享"""
+        return self._pool_stats
+
+    def with_database(self, database_id: str, fingerprint_property: Optional[str] = None) -> "BaseNotionService":
+        """创建操作另一个数据库的服务，与当前服务共享HTTP连接池、令牌桶和重试策略
+
+        Args:
+            database_id: 目标数据库ID
+            fingerprint_property: 保存同步指纹的rich_text属性名
+
+        Returns:
+            与当前服务类型相同的新实例
+        """
+        service = copy.copy(self)
+        service.database_id = database_id
+        service.fingerprint_property = fingerprint_property
+        service._property_ids = None
+        return service
+
+    def _retry_options(self, description: str, recover: Optional[Callable[[], Any]]) -> Dict[str, Any]:
+        """call_with_retry和async_call_with_retry共用的限速和重试参数
+
+        Args:
+            description: 日志中使用的请求描述
+            recover: 非幂等请求结果不确定时查询请求是否已经生效，为None表示请求是幂等的
+        """
+        return {
+            "bucket": self.bucket,
+            "policy": self.retry_policy,
+            "description": description,
+            "endpoint": endpoint_label("notion", description),
+            "idempotent": recover is None,
+            "recover": recover
+        }
+
+    def _check_cancelled(self, cancel: Optional[threading.Event]) -> None:
+        """取消信号已设置时中止查询"""
+        if cancel is not None and cancel.is_set():
+            raise SyncCancelledError(f"Notion数据库查询已取消: {self.database_id}")
+
+    def _build_query(self,
+                     filter: Optional[Dict[str, Any]],
+                     filter_properties: Optional[List[str]],
+                     page_size: int) -> Dict[str, Any]:
+        """构造databases.query的请求参数"""
+        logger.debug(f"查询数据库: {self.database_id}, 过滤器: {filter}, 属性: {filter_properties}")
+        query = {
+            "database_id": self.database_id,
+            "page_size": page_size
+        }
+        if filter:
+            query["filter"] = filter
+        if filter_properties:
+            query["filter_properties"] = filter_properties
+        return query
+
+    @staticmethod
+    def _next_query(query: Dict[str, Any], response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """根据上一页响应构造下一页的查询参数，没有更多分页时返回None"""
+        if not response.get("has_more"):
+            return None
+        logger.debug(f"查询下一页数据: {response.get('next_cursor')}")
+        return {**query, "start_cursor": response.get("next_cursor")}
+
+    def _cache_property_ids(self, database: Dict[str, Any]) -> Dict[str, Any]:
+        """缓存数据库属性名到属性ID的映射
+
+        Returns:
+            数据库结构中的properties
+        """
+        properties = database.get("properties", {})
+        self._property_ids = {name: prop.get("id") for name, prop in properties.items()}
+        return properties
+
+    def _select_property_ids(self, property_names: List[str]) -> List[str]:
+        """从缓存中查找属性ID，忽略数据库中不存在的属性"""
+        missing = [name for name in property_names
+                   if name not in self._property_ids and name not in NotionConstants.OPTIONAL_INDEX_PROPERTIES]
+        if missing:
+            logger.warning(f"数据库中不存在以下属性: {', '.join(missing)}")
+        return [self._property_ids[name] for name in property_names if name in self._property_ids]
+
+    @staticmethod
+    def _created_page_filter(page_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """构造按页面数据中的Bangumi链接查询的条件，没有链接时返回None"""
+        url = (page_data.get("properties", {}).get("Bangumi链接") or {}).get("url")
+        return {"property": "Bangumi链接", "url": {"equals": url}} if url else None
+
+    @staticmethod
+    def _page_title(page_data: Dict[str, Any]) -> str:
+        """返回页面数据中的标题，用于日志"""
+        return page_data.get('properties', {}).get('标题', {}).get('title', [{}])[0].get('text', {}).get('content', 'Unknown')
+
+    @staticmethod
+    def _collect_duplicates(index: PageIndex, duplicates: Optional[Dict[int, List[NotionRecord]]]) -> None:
+        """记录索引中发现的重复页面"""
+        if not index.duplicates:
+            return
+        logger.warning(f"发现 {len(index.duplicates)} 个条目存在重复页面，共 {index.duplicate_count()} 个多余页面")
+        if duplicates is not None:
+            duplicates.update(index.duplicates)
+
+    @staticmethod
+    def _status_filter(status: Optional[str]) -> Optional[Dict[str, Any]]:
+        """构造按观看状态过滤的查询条件"""
+        return {"property": "观看状态", "select": {"equals": status}} if status else None
+
+    @staticmethod
+    def _subject_filters(subject_ids: List[int]) -> Iterator[Dict[str, Any]]:
+        """按Bangumi链接构造查询条件，每个条件最多包含MAX_FILTER_CONDITIONS个条目"""
+        for start in range(0, len(subject_ids), NotionConstants.MAX_FILTER_CONDITIONS):
+            chunk = subject_ids[start:start + NotionConstants.MAX_FILTER_CONDITIONS]
+            yield {"or": [
+                {"property": "Bangumi链接", "url": {"equals": f"{NotionConstants.BANGUMI_SUBJECT_URL}{subject_id}"}}
+                for subject_id in chunk
+            ]}
+
+    def _index_pages(self, pages: Iterable[Dict[str, Any]]) -> PageIndex:
+        """将页面解析为紧凑记录并按subject_id索引，原始页面数据解析后即丢弃"""
+        index = PageIndex(self.fingerprint_property)
+        for page in pages:
+            self._index_page(index, page)
+        return index
+
+    def _index_page(self, index: PageIndex, page: Dict[str, Any]) -> None:
+        """解析单个页面并加入索引"""
+        # 从Bangumi链接中提取subject_id
+        bangumi_url = (page.get("properties", {}).get("Bangumi链接") or {}).get("url") or ""
+        subject_id = self._extract_subject_id(bangumi_url)
+
+        if subject_id:
+            index.add(page, subject_id)
+        else:
+            logger.warning(f"无法从链接中提取subject_id: {bangumi_url}")
+
+    def _extract_subject_id(self, bangumi_url: str) -> Optional[int]:
+        """从Bangumi链接中提取subject_id
+
+        Args:
+            bangumi_url: Bangumi详情页URL
+
+        Returns:
+            subject_id，如果无法提取则返回None
+        """
+        match = re.search(r"subject/(\d+)", bangumi_url)
+        if match:
+            try:
+                return int(match.group(1))
+            except ValueError:
+                logger.warning(f"无效的subject_id格式: {match.group(1)}")
+        return None
+
+
+class NotionService(BaseNotionService):
+    """Notion API服务"""
+
+    def _create_client(self, token: str) -> Client:
+        """创建notion_client客户端，使用与并发数匹配的连接池"""
+        return Client(auth=token, client=create_httpx_client(self.pool_size, self._pool_stats, http2=self.http2,
+                                                             keepalive_expiry=self.keepalive_expiry))
+
+    def _call(self, func: Callable[..., Any], description: str,
+              recover: Optional[Callable[[], Any]] = None, **kwargs: Any) -> Any:
+        """在限速和重试保护下调用Notion API
+
+        Args:
+            func: notion_client的端点方法
+            description: 日志中使用的请求描述
+            recover: 非幂等请求结果不确定时查询请求是否已经生效，为None表示请求是幂等的
+            **kwargs: 请求参数
+
+        Returns:
+            API响应
+        """
+        return call_with_retry(func, **self._retry_options(description, recover), **kwargs)
+
     def get_database(self) -> Dict[str, Any]:
         """获取数据库信息
 
@@ -35,46 +368,97 @@ class NotionService:
         """
         try:
             logger.debug(f"获取数据库信息: {self.database_id}")
-            return self.client.databases.retrieve(database_id=self.database_id)
+            return self._call(self.client.databases.retrieve, "databases.retrieve", database_id=self.database_id)
         except Exception as e:
             logger.error(f"获取数据库信息失败: {e}")
             raise NotionAPIError(f"获取Notion数据库信息失败: {self.database_id}", e) from e
-    
-    def query_database(self, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+
+    def get_schema(self) -> Dict[str, Any]:
+        """获取数据库结构，同时缓存属性ID，之后加载索引时不再重复获取
+
+        Returns:
+            数据库结构中的properties，key为属性名
+        """
+        return self._cache_property_ids(self.get_database())
+
+    def update_schema(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """在一次请求中添加或修改数据库属性
+
+        Args:
+            properties: databases.update的properties参数
+
+        Returns:
+            更新后的数据库结构中的properties
+        """
+        try:
+            logger.debug(f"更新数据库结构: {self.database_id}, 属性: {', '.join(properties)}")
+            database = self._call(self.client.databases.update, "databases.update",
+                                  database_id=self.database_id, properties=properties)
+        except Exception as e:
+            logger.error(f"更新数据库结构失败: {e}")
+            raise NotionAPIError(f"更新Notion数据库结构失败: {self.database_id}", e) from e
+        return self._cache_property_ids(database)
+
+    def query_database(self,
+                       filter: Optional[Dict[str, Any]] = None,
+                       filter_properties: Optional[List[str]] = None,
+                       page_size: int = NotionConstants.MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
         """查询数据库内容
 
         Args:
             filter: 查询过滤器
+            filter_properties: 只返回这些属性ID对应的属性值，为None时返回全部属性
+            page_size: 每次请求返回的记录数
 
         Returns:
             数据库中的页面列表
         """
+        pages = list(self.iter_database(filter, filter_properties, page_size))
+        logger.info(f"成功查询到 {len(pages)} 条记录")
+        return pages
+
+    def iter_database(self,
+                      filter: Optional[Dict[str, Any]] = None,
+                      filter_properties: Optional[List[str]] = None,
+                      page_size: int = NotionConstants.MAX_PAGE_SIZE,
+                      cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """逐条迭代数据库内容，每次只在内存中保留一页响应
+
+        Args:
+            filter: 查询过滤器
+            filter_properties: 只返回这些属性ID对应的属性值，为None时返回全部属性
+            page_size: 每次请求返回的记录数
+            cancel: 取消信号，设置后不再请求后续分页
+
+        Yields:
+            数据库中的页面
+        """
         try:
-            logger.debug(f"查询数据库: {self.database_id}, 过滤器: {filter}")
-            response = self.client.databases.query(
-                database_id=self.database_id,
-                filter=filter
-            )
-            pages = response.get("results", [])
-            
-            # 处理分页
-            page = 0
-            while response.get("has_more"):
-                page += 1
-                logger.debug(f"查询第 {page} 页数据")
-                response = self.client.databases.query(
-                    database_id=self.database_id,
-                    filter=filter,
-                    start_cursor=response.get("next_cursor")
-                )
-                pages.extend(response.get("results", []))
-            
-            logger.info(f"成功查询到 {len(pages)} 条记录")
-            return pages
+            query = self._build_query(filter, filter_properties, page_size)
+            while query is not None:
+                self._check_cancelled(cancel)
+                response = self._call(self.client.databases.query, "databases.query", **query)
+                yield from response.get("results", [])
+                query = self._next_query(query, response)
+        except SyncCancelledError:
+            raise
         except Exception as e:
             logger.error(f"查询数据库失败: {e}")
             raise NotionAPIError(f"查询Notion数据库失败: {self.database_id}", e) from e
-    
+
+    def get_property_ids(self, property_names: List[str]) -> List[str]:
+        """将属性名解析为属性ID，用于filter_properties
+
+        Args:
+            property_names: 属性名列表
+
+        Returns:
+            数据库中存在的属性对应的ID列表
+        """
+        if self._property_ids is None:
+            self._cache_property_ids(self.get_database())
+        return self._select_property_ids(property_names)
+
     def create_page(self, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """创建新页面
 
@@ -85,13 +469,28 @@ class NotionService:
             创建的页面信息
         """
         try:
-            title = page_data.get('properties', {}).get('标题', {}).get('title', [{}])[0].get('text', {}).get('content', 'Unknown')
-            logger.debug(f"创建新页面: {title}")
-            return self.client.pages.create(parent={"database_id": self.database_id}, **page_data)
+            logger.debug(f"创建新页面: {self._page_title(page_data)}")
+            # 创建页面不是幂等的：5xx或超时后先按Bangumi链接确认页面是否已创建，再决定是否重试
+            return self._call(self.client.pages.create, "pages.create",
+                              recover=lambda: self._find_created_page(page_data),
+                              parent={"database_id": self.database_id}, **page_data)
         except Exception as e:
             logger.error(f"创建页面失败: {e}")
             raise NotionAPIError(f"创建Notion页面失败", e) from e
-    
+
+    def _find_created_page(self, page_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """按Bangumi链接查找结果不确定的创建请求是否已经创建了页面
+
+        Returns:
+            已创建的页面，不存在时返回None
+        """
+        url_filter = self._created_page_filter(page_data)
+        if url_filter is None:
+            return None
+        for page in self.iter_database(filter=url_filter, page_size=1):
+            return page
+        return None
+
     def update_page(self, page_id: str, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """更新页面
 
@@ -104,47 +503,204 @@ class NotionService:
         """
         try:
             logger.debug(f"更新页面: {page_id}")
-            return self.client.pages.update(page_id=page_id, **page_data)
+            return self._call(self.client.pages.update, "pages.update", page_id=page_id, **page_data)
         except Exception as e:
             logger.error(f"更新页面失败: {e}")
             raise NotionAPIError(f"更新Notion页面失败: {page_id}", e) from e
-    
-    def get_existing_items(self) -> Dict[int, Dict[str, Any]]:
+
+    def get_existing_items(self,
+                           properties: Optional[List[str]] = None,
+                           status: Optional[str] = None,
+                           cancel: Optional[threading.Event] = None,
+                           duplicates: Optional[Dict[int, List[NotionRecord]]] = None) -> Dict[int, NotionRecord]:
         """获取现有番剧记录
 
+        Args:
+            properties: 只获取这些属性（属性名），为None时获取全部属性
+            status: 只获取观看状态为该值的记录（Notion中的选项名），在服务端过滤
+            cancel: 取消信号，设置后不再请求后续分页
+            duplicates: 重复页面，会写入未被保留的页面，key为subject_id
+
         Returns:
-            现有番剧记录字典，key为subject_id，value为页面信息
+            现有番剧记录字典，key为subject_id，value为解析后的页面记录；
+            同一subject_id有多个页面时只保留一个，见PageIndex
         """
         logger.info("获取现有番剧记录")
-        pages = self.query_database()
-        existing_items = {}
-        
-        for page in pages:
-            # 从Bangumi链接中提取subject_id
-            bangumi_url = page.get("properties", {}).get("Bangumi链接", {}).get("url", "")
-            subject_id = self._extract_subject_id(bangumi_url)
-            
-            if subject_id:
-                existing_items[subject_id] = page
-            else:
-                logger.warning(f"无法从链接中提取subject_id: {bangumi_url}")
-        
-        logger.info(f"获取到 {len(existing_items)} 条现有番剧记录")
-        return existing_items
-    
-    def _extract_subject_id(self, bangumi_url: str) -> Optional[int]:
-        """从Bangumi链接中提取subject_id
-        
+        filter_properties = self.get_property_ids(properties) if properties else None
+        pages = self.iter_database(filter=self._status_filter(status), filter_properties=filter_properties,
+                                   cancel=cancel)
+
+        index = self._index_pages(pages)
+        logger.info(f"获取到 {len(index.records)} 条现有番剧记录")
+        self._collect_duplicates(index, duplicates)
+        return index.records
+
+    def find_pages_by_subject_ids(self,
+                                  subject_ids: List[int],
+                                  properties: Optional[List[str]] = None,
+                                  duplicates: Optional[Dict[int, List[NotionRecord]]] = None) -> Dict[int, NotionRecord]:
+        """按subject_id查找页面
+
         Args:
-            bangumi_url: Bangumi详情页URL
-            
+            subject_ids: 要查找的Bangumi条目ID
+            properties: 只获取这些属性（属性名），为None时获取全部属性
+            duplicates: 重复页面，会写入未被保留的页面，key为subject_id
+
         Returns:
-            subject_id，如果无法提取则返回None
+            找到的页面字典，key为subject_id
         """
-        match = re.search(r"subject/(\d+)", bangumi_url)
-        if match:
-            try:
-                return int(match.group(1))
-            except ValueError:
-                logger.warning(f"无效的subject_id格式: {match.group(1)}")
+        filter_properties = self.get_property_ids(properties) if properties else None
+        index = PageIndex(self.fingerprint_property)
+        for url_filter in self._subject_filters(subject_ids):
+            for page in self.iter_database(filter=url_filter, filter_properties=filter_properties):
+                self._index_page(index, page)
+        self._collect_duplicates(index, duplicates)
+        return index.records
+
+
+class AsyncNotionService(BaseNotionService):
+    """基于notion_client.AsyncClient的异步Notion API服务
+
+    公开方法与NotionService相同，只是发送请求的方法为协程；令牌桶与同步服务共享。
+    """
+
+    def _create_client(self, token: str) -> AsyncClient:
+        """创建notion_client异步客户端，使用与并发数匹配的连接池"""
+        return AsyncClient(auth=token, client=create_httpx_client(self.pool_size, self._pool_stats, asynchronous=True,
+                                                                  http2=self.http2,
+                                                                  keepalive_expiry=self.keepalive_expiry))
+
+    async def __aenter__(self) -> "AsyncNotionService":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭HTTP连接池"""
+        await self.client.aclose()
+
+    async def _call(self, func: Callable[..., Any], description: str,
+                    recover: Optional[Callable[[], Any]] = None, **kwargs: Any) -> Any:
+        """在限速和重试保护下调用Notion API"""
+        return await async_call_with_retry(func, **self._retry_options(description, recover), **kwargs)
+
+    async def get_database(self) -> Dict[str, Any]:
+        """获取数据库信息"""
+        try:
+            logger.debug(f"获取数据库信息: {self.database_id}")
+            return await self._call(self.client.databases.retrieve, "databases.retrieve",
+                                    database_id=self.database_id)
+        except Exception as e:
+            logger.error(f"获取数据库信息失败: {e}")
+            raise NotionAPIError(f"获取Notion数据库信息失败: {self.database_id}", e) from e
+
+    async def get_schema(self) -> Dict[str, Any]:
+        """获取数据库结构，同时缓存属性ID"""
+        return self._cache_property_ids(await self.get_database())
+
+    async def update_schema(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """在一次请求中添加或修改数据库属性"""
+        try:
+            logger.debug(f"更新数据库结构: {self.database_id}, 属性: {', '.join(properties)}")
+            database = await self._call(self.client.databases.update, "databases.update",
+                                        database_id=self.database_id, properties=properties)
+        except Exception as e:
+            logger.error(f"更新数据库结构失败: {e}")
+            raise NotionAPIError(f"更新Notion数据库结构失败: {self.database_id}", e) from e
+        return self._cache_property_ids(database)
+
+    async def query_database(self,
+                             filter: Optional[Dict[str, Any]] = None,
+                             filter_properties: Optional[List[str]] = None,
+                             page_size: int = NotionConstants.MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """查询数据库内容"""
+        pages = [page async for page in self.iter_database(filter, filter_properties, page_size)]
+        logger.info(f"成功查询到 {len(pages)} 条记录")
+        return pages
+
+    async def iter_database(self,
+                            filter: Optional[Dict[str, Any]] = None,
+                            filter_properties: Optional[List[str]] = None,
+                            page_size: int = NotionConstants.MAX_PAGE_SIZE,
+                            cancel: Optional[threading.Event] = None) -> AsyncIterator[Dict[str, Any]]:
+        """逐条迭代数据库内容，每次只在内存中保留一页响应"""
+        try:
+            query = self._build_query(filter, filter_properties, page_size)
+            while query is not None:
+                self._check_cancelled(cancel)
+                response = await self._call(self.client.databases.query, "databases.query", **query)
+                for page in response.get("results", []):
+                    yield page
+                query = self._next_query(query, response)
+        except SyncCancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"查询数据库失败: {e}")
+            raise NotionAPIError(f"查询Notion数据库失败: {self.database_id}", e) from e
+
+    async def get_property_ids(self, property_names: List[str]) -> List[str]:
+        """将属性名解析为属性ID，用于filter_properties"""
+        if self._property_ids is None:
+            self._cache_property_ids(await self.get_database())
+        return self._select_property_ids(property_names)
+
+    async def create_page(self, page_data: Dict[str, Any]) -> Dict[str, Any]:
+        """创建新页面"""
+        try:
+            logger.debug(f"创建新页面: {self._page_title(page_data)}")
+            return await self._call(self.client.pages.create, "pages.create",
+                                    recover=lambda: self._find_created_page(page_data),
+                                    parent={"database_id": self.database_id}, **page_data)
+        except Exception as e:
+            logger.error(f"创建页面失败: {e}")
+            raise NotionAPIError(f"创建Notion页面失败", e) from e
+
+    async def _find_created_page(self, page_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """按Bangumi链接查找结果不确定的创建请求是否已经创建了页面"""
+        url_filter = self._created_page_filter(page_data)
+        if url_filter is None:
+            return None
+        async for page in self.iter_database(filter=url_filter, page_size=1):
+            return page
         return None
+
+    async def update_page(self, page_id: str, page_data: Dict[str, Any]) -> Dict[str, Any]:
+        """更新页面"""
+        try:
+            logger.debug(f"更新页面: {page_id}")
+            return await self._call(self.client.pages.update, "pages.update", page_id=page_id, **page_data)
+        except Exception as e:
+            logger.error(f"更新页面失败: {e}")
+            raise NotionAPIError(f"更新Notion页面失败: {page_id}", e) from e
+
+    async def get_existing_items(self,
+                                 properties: Optional[List[str]] = None,
+                                 status: Optional[str] = None,
+                                 cancel: Optional[threading.Event] = None,
+                                 duplicates: Optional[Dict[int, List[NotionRecord]]] = None) -> Dict[int, NotionRecord]:
+        """获取现有番剧记录，行为与NotionService.get_existing_items一致"""
+        logger.info("获取现有番剧记录")
+        filter_properties = await self.get_property_ids(properties) if properties else None
+
+        index = PageIndex(self.fingerprint_property)
+        async for page in self.iter_database(filter=self._status_filter(status), filter_properties=filter_properties,
+                                             cancel=cancel):
+            self._index_page(index, page)
+        logger.info(f"获取到 {len(index.records)} 条现有番剧记录")
+        self._collect_duplicates(index, duplicates)
+        return index.records
+
+    async def find_pages_by_subject_ids(self,
+                                        subject_ids: List[int],
+                                        properties: Optional[List[str]] = None,
+                                        duplicates: Optional[Dict[int, List[NotionRecord]]] = None
+                                        ) -> Dict[int, NotionRecord]:
+        """按subject_id查找页面"""
+        filter_properties = await self.get_property_ids(properties) if properties else None
+        index = PageIndex(self.fingerprint_property)
+        for url_filter in self._subject_filters(subject_ids):
+            async for page in self.iter_database(filter=url_filter, filter_properties=filter_properties):
+                self._index_page(index, page)
+        self._collect_duplicates(index, duplicates)
+        return index.records
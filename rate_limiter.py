@@ -0,0 +1,336 @@
+"""统一限速与重试模块"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from constants import RateLimitConstants
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    采用预约方式分配令牌：每次调用都会预约下一个可用的发送时间，
+    因此并发调用者按到达顺序依次放行，不会出现某个线程长期抢不到令牌的情况。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，0表示不限速
+            capacity: 令牌桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约一个令牌
+
+        Returns:
+            调用者在发送请求前需要等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return max(wait, 0.0)
+
+    def acquire(self) -> float:
+        """获取一个令牌，必要时阻塞等待
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌，用于响应服务端的Retry-After
+
+        Args:
+            seconds: 暂停时长（秒）
+        """
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._updated:
+                self._tokens = min(self._tokens, 0)
+                self._updated = until
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_token_bucket(key: str, rate: float, capacity: float = 1) -> TokenBucket:
+    """获取共享的令牌桶，同一个key（通常为主机名）在进程内只会创建一个
+
+    Args:
+        key: 令牌桶标识
+        rate: 每秒补充的令牌数
+        capacity: 令牌桶容量
+
+    Returns:
+        令牌桶实例
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            _buckets[key] = bucket
+        return bucket
+
+
+class RetryPolicy:
+    """重试策略"""
+
+    def __init__(self,
+                 retry_count: int,
+                 retry_delay: float,
+                 max_delay: float = RateLimitConstants.MAX_RETRY_DELAY,
+                 retryable_exceptions: Tuple[Type[BaseException], ...] = (),
+                 unsent_exceptions: Tuple[Type[BaseException], ...] = ()):
+        """初始化重试策略
+
+        Args:
+            retry_count: 最大尝试次数
+            retry_delay: 初始退避时间（秒）
+            max_delay: 单次退避时间上限（秒）
+            retryable_exceptions: 没有HTTP状态码时视为可重试的异常类型（连接错误、超时等）
+            unsent_exceptions: 请求发出前就失败的异常类型（建立连接失败、等待连接超时），
+                非幂等请求遇到这些异常时可以直接重试
+        """
+        self.retry_count = max(retry_count, 1)
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.retryable_exceptions = retryable_exceptions
+        self.unsent_exceptions = unsent_exceptions
+
+    def backoff(self, attempt: int) -> float:
+        """计算第attempt次失败后的退避时间，带随机抖动"""
+        delay = min(self.max_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+
+def _extract_response_info(error: BaseException) -> Tuple[Optional[int], Any]:
+    """从异常中提取HTTP状态码和响应头
+
+    兼容requests的HTTPError（error.response）和notion_client的HTTPResponseError（error.status）。
+    """
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return response.status_code, getattr(response, "headers", None)
+
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status, getattr(error, "headers", None)
+
+    return None, None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头
+
+    Args:
+        value: 响应头的值，可以是秒数或HTTP日期
+
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def classify_error(error: BaseException, policy: RetryPolicy, idempotent: bool = True) -> Tuple[bool, Optional[float]]:
+    """判断错误是否可重试
+
+    非幂等请求（如创建页面）遇到5xx或超时时服务端可能已经处理了请求，直接重试会重复执行，
+    因此只在429限流或请求发出前的连接错误时视为可重试。
+
+    Args:
+        error: 捕获的异常，项目自定义异常会取其original_exception判断
+        policy: 重试策略
+        idempotent: 请求是否可以安全地重复发送
+
+    Returns:
+        (是否可重试, 服务端要求的等待秒数)
+    """
+    error = getattr(error, "original_exception", None) or error
+
+    status, headers = _extract_response_info(error)
+    if status is not None:
+        if status not in RateLimitConstants.RETRYABLE_STATUS_CODES:
+            return False, None
+        if not idempotent and status not in RateLimitConstants.UNPROCESSED_STATUS_CODES:
+            return False, None
+        retry_after = parse_retry_after(headers.get("Retry-After")) if headers is not None else None
+        return True, retry_after
+
+    if not idempotent:
+        # 超时等异常可能被客户端库包装，请求是否已发出由原始异常决定
+        return isinstance(error, policy.unsent_exceptions) or \
+            isinstance(error.__context__, policy.unsent_exceptions), None
+    return isinstance(error, policy.retryable_exceptions), None
+
+
+def call_with_retry(func: Callable[..., Any],
+                    *args: Any,
+                    bucket: TokenBucket,
+                    policy: RetryPolicy,
+                    description: str = "",
+                    endpoint: Optional[str] = None,
+                    idempotent: bool = True,
+                    recover: Optional[Callable[[], Any]] = None,
+                    **kwargs: Any) -> Any:
+    """在限速和重试保护下调用函数
+
+    每次尝试前先从令牌桶获取令牌；可重试错误按Retry-After或指数退避等待，
+    致命错误（如4xx）立即抛出，不做无意义的重试。每次尝试的耗时、等待令牌的时间
+    和重试次数按端点记录到运行指标中。
+
+    非幂等请求只在服务端确定没有处理请求时直接重试；其余可重试错误（5xx、超时）
+    先调用recover确认请求是否已经生效，已生效时返回recover的结果，否则再重试。
+
+    Args:
+        func: 实际发送请求的函数
+        *args: 传给func的位置参数
+        bucket: 目标主机的令牌桶
+        policy: 重试策略
+        description: 日志中使用的请求描述
+        endpoint: 运行指标中的端点名称，默认使用description
+        idempotent: 请求是否可以安全地重复发送
+        recover: 非幂等请求结果不确定时查询请求是否已经生效，返回None表示未生效；
+            为None时结果不确定的错误不重试
+        **kwargs: 传给func的关键字参数
+
+    Returns:
+        func的返回值，或非幂等请求已生效时recover的返回值
+    """
+    endpoint = endpoint or description
+    attempt = 0
+    while True:
+        attempt += 1
+        wait = bucket.acquire()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            get_metrics().record_request(endpoint, time.monotonic() - started, wait, error=True)
+            delay = _retry_delay(e, attempt, bucket, policy, description, endpoint, idempotent, recover)
+            if _uncertain(e, policy, idempotent):
+                recovered = recover()
+                if recovered is not None:
+                    logger.info(f"请求 {description} 在失败前已经生效，不再重试")
+                    return recovered
+            time.sleep(delay)
+        else:
+            get_metrics().record_request(endpoint, time.monotonic() - started, wait)
+            return result
+
+
+async def async_call_with_retry(func: Callable[..., Any],
+                                *args: Any,
+                                bucket: TokenBucket,
+                                policy: RetryPolicy,
+                                description: str = "",
+                                endpoint: Optional[str] = None,
+                                idempotent: bool = True,
+                                recover: Optional[Callable[[], Any]] = None,
+                                **kwargs: Any) -> Any:
+    """call_with_retry的异步版本，等待令牌和退避时不阻塞事件循环
+
+    Args:
+        func: 实际发送请求的协程函数
+        *args: 传给func的位置参数
+        bucket: 目标主机的令牌桶，与同步版本共用
+        policy: 重试策略
+        description: 日志中使用的请求描述
+        endpoint: 运行指标中的端点名称，默认使用description
+        idempotent: 请求是否可以安全地重复发送
+        recover: 非幂等请求结果不确定时查询请求是否已经生效的协程函数，返回None表示未生效
+        **kwargs: 传给func的关键字参数
+
+    Returns:
+        func的返回值，或非幂等请求已生效时recover的返回值
+    """
+    endpoint = endpoint or description
+    attempt = 0
+    while True:
+        attempt += 1
+        wait = bucket.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        started = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            get_metrics().record_request(endpoint, time.monotonic() - started, wait, error=True)
+            delay = _retry_delay(e, attempt, bucket, policy, description, endpoint, idempotent, recover)
+            if _uncertain(e, policy, idempotent):
+                recovered = await recover()
+                if recovered is not None:
+                    logger.info(f"请求 {description} 在失败前已经生效，不再重试")
+                    return recovered
+            await asyncio.sleep(delay)
+        else:
+            get_metrics().record_request(endpoint, time.monotonic() - started, wait)
+            return result
+
+
+def _uncertain(error: Exception, policy: RetryPolicy, idempotent: bool) -> bool:
+    """非幂等请求失败时服务端是否可能已经处理了请求"""
+    return not idempotent and not classify_error(error, policy, idempotent=False)[0]
+
+
+def _retry_delay(error: Exception, attempt: int, bucket: TokenBucket, policy: RetryPolicy, description: str,
+                 endpoint: str, idempotent: bool = True, recover: Optional[Callable[[], Any]] = None) -> float:
+    """处理一次失败的请求，返回重试前需要等待的秒数；不可重试时重新抛出异常
+
+    非幂等请求提供了recover时，结果不确定的错误也可以在确认请求未生效后重试。
+    """
+    retryable, retry_after = classify_error(error, policy, idempotent or recover is not None)
+    if not retryable or attempt >= policy.retry_count:
+        raise error
+
+    status, _ = _extract_response_info(getattr(error, "original_exception", None) or error)
+    get_metrics().record_retry(endpoint, throttled=status == 429 or retry_after is not None)
+    if retry_after is not None:
+        # 暂停整个主机的令牌发放，其他线程也会一起等待
+        bucket.pause(retry_after)
+        logger.warning(f"请求被限流 {description}，服务端要求 {retry_after:.1f} 秒后重试 ({attempt}/{policy.retry_count})")
+        return 0.0
+
+    delay = policy.backoff(attempt)
+    logger.warning(f"请求失败 {description}，将在 {delay:.1f} 秒后重试 ({attempt}/{policy.retry_count}): {error}")
+    return delay
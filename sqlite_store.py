@@ -0,0 +1,96 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Sequence, Type
+from exceptions import BaseError, CacheError
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteStore:
+    """基于SQLite的本地存储的公共部分
+
+    负责创建目录、打开可跨线程使用的连接、建表、加锁访问和关闭连接，
+    并把sqlite3的错误转换为ERROR。子类只需定义表结构和行与对象之间的转换。
+    """
+
+    # 建表语句，打开数据库时执行
+    SCHEMA = ""
+    # 日志和错误信息中使用的存储名称
+    DESCRIPTION = "本地存储"
+    # 数据库操作失败时抛出的异常类型
+    ERROR: Type[BaseError] = CacheError
+
+    def __init__(self, path: str):
+        """打开数据库并建表
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(self.SCHEMA)
+            self._prepare()
+            logger.debug(f"{self.DESCRIPTION}已打开: {path}")
+        except sqlite3.Error as e:
+            raise self.ERROR(f"打开{self.DESCRIPTION}失败: {path}", e) from e
+
+    def _prepare(self) -> None:
+        """建表后执行的初始化，如升级表结构、清理过期数据"""
+
+    def __enter__(self) -> "SqliteStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """持有锁读取数据库"""
+        try:
+            with self._lock:
+                yield self._conn
+        except sqlite3.Error as e:
+            raise self.ERROR(f"读取{self.DESCRIPTION}失败: {self.path}", e) from e
+
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """持有锁在一个事务中写入数据库，出错时回滚"""
+        try:
+            with self._lock, self._conn:
+                yield self._conn
+        except sqlite3.Error as e:
+            raise self.ERROR(f"写入{self.DESCRIPTION}失败: {self.path}", e) from e
+
+    def _select_in(self, sql: str, keys: Sequence[Any], params: Sequence[Any] = (),
+                   batch_size: int = 500) -> List[tuple]:
+        """分批执行带IN条件的查询，避免超过SQLite的参数数量上限
+
+        Args:
+            sql: 查询语句，IN条件的占位符写作{placeholders}
+            keys: IN条件中的值
+            params: 位于IN条件之前的其他参数
+            batch_size: 每次查询的最大值数量
+
+        Returns:
+            全部批次的查询结果
+        """
+        rows = []
+        with self._reading() as conn:
+            for start in range(0, len(keys), batch_size):
+                batch = list(keys[start:start + batch_size])
+                placeholders = ", ".join("?" * len(batch))
+                rows.extend(conn.execute(sql.format(placeholders=placeholders), [*params, *batch]).fetchall())
+        return rows
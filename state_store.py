@@ -0,0 +1,173 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from constants import StateConstants
+from exceptions import StateError
+from sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+class StateEntry:
+    """单条同步状态记录"""
+
+    __slots__ = ("subject_id", "content_hash", "page_id", "title", "synced_at", "field_hashes")
+
+    def __init__(self, subject_id: int, content_hash: Optional[str], page_id: str,
+                 title: str = "", synced_at: Optional[str] = None,
+                 field_hashes: Optional[Dict[str, str]] = None):
+        """初始化状态记录
+
+        Args:
+            subject_id: Bangumi条目ID
+            content_hash: 上次成功同步内容的哈希，None表示内容未知需要重新同步
+            page_id: 对应的Notion页面ID
+            title: 记录标题
+            synced_at: 上次同步时间（ISO格式）
+            field_hashes: 上次成功同步时各字段的哈希，用于找出变化的字段
+        """
+        self.subject_id = subject_id
+        self.content_hash = content_hash
+        self.page_id = page_id
+        self.title = title
+        self.synced_at = synced_at or datetime.now().isoformat()
+        self.field_hashes = field_hashes
+
+    def __repr__(self) -> str:
+        return f"StateEntry({self.subject_id}, {self.page_id}, {self.content_hash})"
+
+
+class StateStore(SqliteStore):
+    """本地同步状态存储
+
+    使用SQLite按subject_id记录上次同步的内容哈希、Notion页面ID和同步时间，
+    另有一张meta表保存上次全量同步时间等运行信息。
+    首次加载后在内存中保留一份状态记录，之后的加载不再读取数据库，
+    写入时只提交与内存中不同的记录，常驻运行时每个周期的状态读写只与变化量有关。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            subject_id INTEGER PRIMARY KEY,
+            content_hash TEXT,
+            page_id TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            synced_at TEXT NOT NULL,
+            field_hashes TEXT
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    DESCRIPTION = "状态存储"
+    ERROR = StateError
+
+    def __init__(self, path: str):
+        """初始化状态存储
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        # 内存中的状态记录，key为subject_id，value为数据库中的一行
+        self._rows: Optional[Dict[int, tuple]] = None
+        super().__init__(path)
+
+    def _prepare(self) -> None:
+        """升级旧版本的状态表结构"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+        if "field_hashes" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE items ADD COLUMN field_hashes TEXT")
+                # 旧版本的内容哈希与当前指纹规则不兼容，下次运行时全量扫描Notion重建状态
+                self._conn.execute("DELETE FROM meta WHERE key = ?", (StateConstants.META_LAST_FULL_SYNC,))
+            logger.info("状态存储已升级，下次同步将全量扫描Notion")
+
+    def load(self) -> Dict[int, StateEntry]:
+        """加载全部状态记录
+
+        Returns:
+            状态记录字典，key为subject_id
+        """
+        with self._reading():
+            rows = self._load_rows()
+        return {
+            row[0]: StateEntry(*row[:5], field_hashes=json.loads(row[5]) if row[5] else None)
+            for row in rows.values()
+        }
+
+    def _load_rows(self) -> Dict[int, tuple]:
+        """返回内存中的状态记录，首次调用时从数据库读取，调用方需在_reading或_writing中调用"""
+        if self._rows is None:
+            rows = self._conn.execute(
+                "SELECT subject_id, content_hash, page_id, title, synced_at, field_hashes FROM items"
+            ).fetchall()
+            self._rows = {row[0]: row for row in rows}
+        return self._rows
+
+    def replace_all(self, entries: Iterable[StateEntry]) -> None:
+        """用给定记录整体替换状态表，只写入新增、变化和删除的记录
+
+        Args:
+            entries: 新的状态记录
+        """
+        rows = {
+            e.subject_id: (e.subject_id, e.content_hash, e.page_id, e.title, e.synced_at,
+                           json.dumps(e.field_hashes, sort_keys=True) if e.field_hashes else None)
+            for e in entries
+        }
+        try:
+            with self._writing() as conn:
+                current = self._load_rows()
+                removed = [(subject_id,) for subject_id in current if subject_id not in rows]
+                changed = [row for subject_id, row in rows.items() if current.get(subject_id) != row]
+                conn.executemany("DELETE FROM items WHERE subject_id = ?", removed)
+                conn.executemany(
+                    "INSERT INTO items (subject_id, content_hash, page_id, title, synced_at, field_hashes) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(subject_id) DO UPDATE SET content_hash = excluded.content_hash, "
+                    "page_id = excluded.page_id, title = excluded.title, synced_at = excluded.synced_at, "
+                    "field_hashes = excluded.field_hashes",
+                    changed
+                )
+                self._rows = rows
+        except StateError:
+            # 提交失败时内存中的记录可能与数据库不一致，下次重新读取
+            self._rows = None
+            raise
+        logger.debug(f"状态存储已更新: 共 {len(rows)} 条记录，写入 {len(changed)} 条，删除 {len(removed)} 条")
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """读取运行信息"""
+        with self._reading() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Optional[str]) -> None:
+        """写入运行信息，value为None时删除该项"""
+        with self._writing() as conn:
+            if value is None:
+                conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, value)
+                )
+
+    def detect_drift(self, notion_pages: Dict[int, str]) -> Tuple[list, list, list]:
+        """对比状态记录与Notion实际页面，检测漂移
+
+        Args:
+            notion_pages: Notion中的页面，key为subject_id，value为页面ID
+
+        Returns:
+            (Notion中已不存在的subject_id, 状态中缺失的subject_id, 页面ID不一致的subject_id)
+        """
+        entries = self.load()
+        missing_in_notion = sorted(sid for sid in entries if sid not in notion_pages)
+        missing_in_state = sorted(sid for sid in notion_pages if sid not in entries)
+        page_mismatch = sorted(sid for sid, entry in entries.items()
+                               if sid in notion_pages and notion_pages[sid] != entry.page_id)
+        return missing_in_notion, missing_in_state, page_mismatch
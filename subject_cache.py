@@ -0,0 +1,87 @@
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from constants import SubjectCacheConstants
+from sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+class SubjectCache(SqliteStore):
+    """本地条目详情缓存
+
+    使用SQLite按subject_id保存从条目详情中提取的补充字段和过期时间。
+    已完结条目的详情很少变化，缓存时间较长；连载中和未播出的条目较快过期，
+    稳定状态下每次同步只需请求少量过期条目的详情。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS subjects (
+            subject_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+    DESCRIPTION = "条目详情缓存"
+
+    def __init__(self, path: str,
+                 finished_ttl_days: int = SubjectCacheConstants.DEFAULT_FINISHED_TTL_DAYS,
+                 airing_ttl_hours: int = SubjectCacheConstants.DEFAULT_AIRING_TTL_HOURS):
+        """初始化条目详情缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            finished_ttl_days: 已完结条目的缓存天数
+            airing_ttl_hours: 其余条目的缓存小时数
+        """
+        self.finished_ttl = finished_ttl_days * 86400
+        self.airing_ttl = airing_ttl_hours * 3600
+        super().__init__(path)
+
+    def ttl(self, finished: bool) -> int:
+        """返回条目的缓存秒数
+
+        Args:
+            finished: 条目是否已完结
+
+        Returns:
+            缓存秒数
+        """
+        return self.finished_ttl if finished else self.airing_ttl
+
+    def get_many(self, subject_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """读取未过期的缓存
+
+        Args:
+            subject_ids: 条目ID
+
+        Returns:
+            未过期的补充字段，key为subject_id；过期或不存在的条目不包含在内
+        """
+        rows = self._select_in(
+            "SELECT subject_id, data FROM subjects WHERE expires_at > ? AND subject_id IN ({placeholders})",
+            list(subject_ids), [time.time()], batch_size=SubjectCacheConstants.QUERY_BATCH_SIZE
+        )
+        return {subject_id: json.loads(data) for subject_id, data in rows}
+
+    def put_many(self, entries: List[Tuple[int, Dict[str, Any], bool]]) -> None:
+        """写入缓存
+
+        Args:
+            entries: (subject_id, 补充字段, 是否已完结)列表
+        """
+        now = time.time()
+        rows = [
+            (subject_id, json.dumps(data, ensure_ascii=False, sort_keys=True), now, now + self.ttl(finished))
+            for subject_id, data, finished in entries
+        ]
+        with self._writing() as conn:
+            conn.executemany(
+                "INSERT INTO subjects (subject_id, data, fetched_at, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(subject_id) DO UPDATE SET data = excluded.data, "
+                "fetched_at = excluded.fetched_at, expires_at = excluded.expires_at",
+                rows
+            )
+        logger.debug(f"条目详情缓存已更新: {len(rows)} 条记录")
@@ -0,0 +1,198 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from constants import JournalConstants
+from exceptions import StateError
+from sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+class JournalOperation:
+    """同步计划中的一项写入操作"""
+
+    __slots__ = ("seq", "action", "subject_id", "title", "page_id", "page_data", "status", "result_page_id", "error")
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, seq: int, action: str, subject_id: int, title: str,
+                 page_id: Optional[str], page_data: Dict[str, Any],
+                 status: str = PENDING, result_page_id: Optional[str] = None, error: Optional[str] = None):
+        """初始化计划操作
+
+        Args:
+            seq: 操作序号（从1开始），即执行顺序
+            action: 操作类型，add、update或delete
+            subject_id: 对应的Bangumi条目ID
+            title: 记录标题
+            page_id: 更新或删除的页面ID，添加操作为None
+            page_data: 发送给Notion的页面数据
+            status: pending、done或failed
+            result_page_id: 操作完成后对应的页面ID
+            error: 最近一次失败的错误信息
+        """
+        self.seq = seq
+        self.action = action
+        self.subject_id = subject_id
+        self.title = title
+        self.page_id = page_id
+        self.page_data = page_data
+        self.status = status
+        self.result_page_id = result_page_id
+        self.error = error
+
+    @property
+    def done(self) -> bool:
+        """操作是否已成功完成"""
+        return self.status == self.DONE
+
+    def __repr__(self) -> str:
+        return f"JournalOperation({self.seq}, {self.action}, {self.subject_id}, {self.status})"
+
+
+class SyncJournal(SqliteStore):
+    """同步计划日志
+
+    使用SQLite保存一次同步对比得到的操作计划，以及提交本地状态所需的指纹和页面索引。
+    每项操作完成后立即记录结果，进程中途退出时，下次可以只执行未完成的操作，
+    而不必重新获取Bangumi数据、扫描Notion和对比。同步完整结束后清空计划。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS operations (
+            seq INTEGER PRIMARY KEY,
+            action TEXT NOT NULL,
+            subject_id INTEGER NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            page_id TEXT,
+            page_data TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result_page_id TEXT,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            subject_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            field_hashes TEXT,
+            title TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS pages (
+            subject_id INTEGER PRIMARY KEY,
+            page_id TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    DESCRIPTION = "同步计划日志"
+    ERROR = StateError
+
+    def begin(self,
+              meta: Dict[str, Optional[str]],
+              operations: List[JournalOperation],
+              items: Iterable[Tuple[int, str, Optional[Dict[str, str]], str]],
+              pages: Iterable[Tuple[int, str, str]]) -> None:
+        """写入新的同步计划，覆盖之前的计划
+
+        Args:
+            meta: 计划信息，如目标数据库ID、索引是否来自全量扫描、水位线
+            operations: 按执行顺序排列的操作
+            items: 本次同步的记录，(subject_id, 内容哈希, 字段哈希, 标题)
+            pages: 对比使用的Notion索引，(subject_id, 页面ID, 标题)
+        """
+        meta = {**meta, JournalConstants.META_CREATED_AT: datetime.now().isoformat()}
+        with self._writing() as conn:
+            for table in ("operations", "items", "pages", "meta"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                "INSERT INTO operations (seq, action, subject_id, title, page_id, page_data, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(op.seq, op.action, op.subject_id, op.title, op.page_id,
+                  json.dumps(op.page_data, ensure_ascii=False), op.status) for op in operations]
+            )
+            conn.executemany(
+                "INSERT INTO items (subject_id, content_hash, field_hashes, title) VALUES (?, ?, ?, ?)",
+                [(subject_id, content_hash, json.dumps(field_hashes, sort_keys=True) if field_hashes else None, title)
+                 for subject_id, content_hash, field_hashes, title in items]
+            )
+            conn.executemany("INSERT INTO pages (subject_id, page_id, title) VALUES (?, ?, ?)", pages)
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                             [(key, value) for key, value in meta.items() if value is not None])
+        logger.info(f"同步计划已记录: {len(operations)} 项操作")
+
+    def has_plan(self) -> bool:
+        """是否存在尚未清空的同步计划（上次同步中途退出或存在失败操作）"""
+        return self.get_meta(JournalConstants.META_CREATED_AT) is not None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取计划信息"""
+        with self._reading() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def operations(self) -> List[JournalOperation]:
+        """按执行顺序读取计划中的全部操作"""
+        with self._reading() as conn:
+            rows = conn.execute(
+                "SELECT seq, action, subject_id, title, page_id, page_data, status, result_page_id, error "
+                "FROM operations ORDER BY seq"
+            ).fetchall()
+        return [JournalOperation(*row[:5], json.loads(row[5]), *row[6:]) for row in rows]
+
+    def items(self) -> Dict[int, Tuple[str, Optional[Dict[str, str]], str]]:
+        """读取计划中本次同步的记录
+
+        Returns:
+            key为subject_id，value为(内容哈希, 字段哈希, 标题)
+        """
+        with self._reading() as conn:
+            rows = conn.execute("SELECT subject_id, content_hash, field_hashes, title FROM items").fetchall()
+        return {row[0]: (row[1], json.loads(row[2]) if row[2] else None, row[3]) for row in rows}
+
+    def pages(self) -> Dict[int, Tuple[str, str]]:
+        """读取计划中的Notion索引
+
+        Returns:
+            key为subject_id，value为(页面ID, 标题)
+        """
+        with self._reading() as conn:
+            rows = conn.execute("SELECT subject_id, page_id, title FROM pages").fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def complete(self, seq: int, page_id: Optional[str]) -> None:
+        """记录操作成功完成
+
+        Args:
+            seq: 操作序号
+            page_id: 操作对应的页面ID
+        """
+        self._set_status(seq, JournalOperation.DONE, page_id, None)
+
+    def fail(self, seq: int, error: str) -> None:
+        """记录操作失败，下次继续同步时重试
+
+        Args:
+            seq: 操作序号
+            error: 错误信息
+        """
+        self._set_status(seq, JournalOperation.FAILED, None, error)
+
+    def _set_status(self, seq: int, status: str, page_id: Optional[str], error: Optional[str]) -> None:
+        """更新操作状态"""
+        with self._writing() as conn:
+            conn.execute(
+                "UPDATE operations SET status = ?, result_page_id = ?, error = ? WHERE seq = ?",
+                (status, page_id, error, seq)
+            )
+
+    def clear(self) -> None:
+        """同步完整结束后清空计划"""
+        with self._writing() as conn:
+            for table in ("operations", "items", "pages", "meta"):
+                conn.execute(f"DELETE FROM {table}")
+        logger.debug("同步计划已清空")
@@ -1,8 +1,22 @@
+import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional
-from exceptions import SyncError
-from constants import NotionConstants
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Any, Optional, Set, Tuple
+from exceptions import SchemaError, SyncCancelledError, SyncError
+import fingerprint
+import notion_schema
+from constants import NotionConstants, StateConstants, FingerprintConstants, JournalConstants, EpisodeConstants
+from fingerprint import Fingerprint
+from bangumi_client import episode_progress, parse_collection_data, parse_episodes, parse_subject_detail, parse_timestamp
+from episode_cache import EpisodeCache
+from notion_service import NotionRecord
+from state_store import StateEntry, StateStore
+from subject_cache import SubjectCache
+from sync_journal import JournalOperation, SyncJournal
+from write_executor import AsyncWriteExecutor, WriteExecutor, OperationResult
 
 logger = logging.getLogger(__name__)
 
@@ -10,102 +24,1280 @@ logger = logging.getLogger(__name__)
 class SyncManager:
     """同步管理器"""
 
-    def __init__(self, bangumi_client, notion_client, config):
+    def __init__(self, bangumi_client, notion_client, config, state_store: Optional[StateStore] = None,
+                 subject_cache: Optional[SubjectCache] = None, journal: Optional[SyncJournal] = None,
+                 episode_cache: Optional[EpisodeCache] = None):
         """初始化同步管理器
 
         Args:
             bangumi_client: BangumiClient实例
             notion_client: NotionService实例
             config: Config实例
+            state_store: 本地同步状态存储，为None时每次都全量扫描Notion
+            subject_cache: 条目详情缓存，启用详情补充时使用
+            journal: 同步计划日志，为None时中途退出的同步无法继续
+            episode_cache: 剧集列表缓存，启用剧集同步时使用
         """
         self.bangumi_client = bangumi_client
         self.notion_client = notion_client
         self.config = config
+        self.state_store = state_store
+        self.subject_cache = subject_cache
+        self.journal = journal
+        self.episode_cache = episode_cache
+        # 加载Notion索引时发现的重复页面中未被保留的页面，key为subject_id
+        self.duplicates: Dict[int, List[NotionRecord]] = {}
+        # 本次同步中分页数据不一致的条目类型，获取结果可能缺少记录，不能据此删除页面
+        self.inconsistent_types: Set[str] = set()
 
         logger.info("同步管理器初始化成功")
         logger.debug(f"同步配置: {config}")
     
-    def sync(self, dry_run: bool = False) -> Dict[str, int]:
+    def sync(self, dry_run: bool = False, stream: bool = False, full_resync: bool = False,
+             resume: bool = False) -> Dict[str, Any]:
         """执行同步流程
 
         Args:
             dry_run: 是否为模拟运行，不实际修改Notion数据库
+            stream: 是否使用流式同步，边下载Bangumi分页边写入Notion
+            full_resync: 是否忽略本地状态缓存，强制全量扫描Notion
+            resume: 存在上次未完成的同步计划时，只执行其中未完成的操作
 
         Returns:
-            同步结果统计
+            同步结果统计，timings中为各阶段耗时（秒）
         """
         logger.info("开始同步Bangumi追番记录到Notion...")
         
+        if resume:
+            if self._resumable():
+                return self.resume(dry_run)
+            logger.info("没有可以继续的同步计划，执行完整同步")
+        
+        if stream:
+            return self.sync_streaming(dry_run, full_resync)
+        
+        started = time.monotonic()
+        timings = {}
+        self.inconsistent_types = set()
         try:
-            # 1. 获取Bangumi数据
-            bangumi_data = self.get_bangumi_data()
+            self._settle_journal(dry_run)
+            use_state = self._use_state(full_resync)
+            since = self._incremental_since() if use_state else None
             
-            # 2. 获取Notion数据
-            notion_data = self.get_notion_data()
+            # 1. 同时获取Bangumi数据（有水位线时只获取此后更新的记录）
+            #    和Notion数据（有可用的本地状态时直接使用状态缓存）
+            bangumi_data, notion_data = self._load_concurrently(since, use_state, timings, dry_run)
             
-            # 3. 对比数据，生成操作列表
-            operations = self.compare_data(bangumi_data, notion_data)
+            # 2. 对比数据，生成操作列表（每条Bangumi记录只计算一次指纹）
+            phase_started = time.monotonic()
+            fingerprints = {subject_id: self._bangumi_fingerprint(item) for subject_id, item in bangumi_data.items()}
+            operations = self.compare_data(bangumi_data, notion_data, partial=since is not None,
+                                           fingerprints=fingerprints)
+            self._resolve_adds(operations, fingerprints, notion_data)
+            timings["compare"] = round(time.monotonic() - phase_started, 3)
             
-            # 4. 执行同步操作
+            # 3. 执行同步操作
+            phase_started = time.monotonic()
+            results = []
+            self._report_duplicates()
             if dry_run:
                 logger.info("模拟运行模式，不会实际修改Notion数据库")
                 self._log_operations(operations)
             else:
-                self.execute_sync(operations)
+                # 先记录操作计划，中途退出时可以用--resume只执行未完成的操作
+                synced_items = {sid: (fingerprints[sid], self._bangumi_title(item)) for sid, item in bangumi_data.items()}
+                updated_ats = [item.get("updated_at") for item in bangumi_data.values()]
+                plan = self._plan_operations(operations)
+                self._begin_journal(plan, synced_items, notion_data, not use_state, updated_ats)
+                results = self._execute_plan(plan, self.journal)
+                archive_results = self._archive_duplicates()
+                self._commit_state(synced_items, notion_data, not use_state, results + archive_results)
+                self._commit_high_water_mark(updated_ats)
+                self._finish_journal(results)
+                results += archive_results
+            failed = [result for result in results if not result.success]
+            timings["write"] = round(time.monotonic() - phase_started, 3)
+            timings["total"] = round(time.monotonic() - started, 3)
             
-            logger.info("同步完成")
+            logger.info(f"同步完成，耗时: {self._format_timings(timings)}")
             return {
                 "total_bangumi_items": len(bangumi_data),
                 "total_notion_items": len(notion_data),
                 "add_count": len(operations.get("add", [])),
                 "update_count": len(operations.get("update", [])),
-                "delete_count": len(operations.get("delete", []))
+                "delete_count": len(operations.get("delete", [])),
+                "duplicate_count": self._duplicate_count(),
+                "failed_count": len(failed),
+                "failed_operations": failed,
+                "timings": timings
             }
         except Exception as e:
             logger.error(f"同步过程中发生错误: {e}")
             raise SyncError(f"同步过程中发生错误", e) from e
     
-    def get_bangumi_data(self) -> Dict[int, Dict[str, Any]]:
+    def resume(self, dry_run: bool = False) -> Dict[str, Any]:
+        """继续执行上次未完成的同步计划
+
+        不重新获取Bangumi数据和扫描Notion，只执行计划中未完成或失败的操作。
+        上次已发出但未记录结果的添加操作先按Bangumi链接确认页面是否已创建，避免重复创建。
+
+        Args:
+            dry_run: 是否为模拟运行，只列出剩余操作
+
+        Returns:
+            同步结果统计，计数为整个计划的操作数
+        """
+        started = time.monotonic()
+        timings = {}
+        try:
+            plan = self.journal.operations()
+            remaining = [operation for operation in plan if not operation.done]
+            logger.info(f"继续上次的同步计划（记录于 {self.journal.get_meta(JournalConstants.META_CREATED_AT)}）: "
+                        f"共 {len(plan)} 项操作，剩余 {len(remaining)} 项")
+            
+            if dry_run:
+                logger.info("模拟运行模式，不会实际修改Notion数据库")
+                for operation in remaining:
+                    logger.info(f"剩余操作: [{operation.seq}] {operation.action} {operation.title} (ID: {operation.subject_id})")
+            else:
+                phase_started = time.monotonic()
+                self.preflight()
+                self._skip_created_pages(remaining)
+                self._execute_plan([operation for operation in remaining if not operation.done], self.journal)
+                timings["write"] = round(time.monotonic() - phase_started, 3)
+                
+                plan = self.journal.operations()
+                results = [self._journal_result(operation) for operation in plan]
+                items = self.journal.items()
+                self._commit_state(
+                    {sid: (Fingerprint(digest, field_hashes), title) for sid, (digest, field_hashes, title) in items.items()},
+                    {sid: NotionRecord(page_id, sid, title) for sid, (page_id, title) in self.journal.pages().items()},
+                    self.journal.get_meta(JournalConstants.META_FULL_SCAN) is not None, results,
+                    self.journal.get_meta(JournalConstants.META_SUBJECT_TYPES)
+                )
+                self._commit_high_water_mark([self.journal.get_meta(JournalConstants.META_HIGH_WATER_MARK)])
+                self._finish_journal(results)
+            timings["total"] = round(time.monotonic() - started, 3)
+            
+            failed = [operation for operation in plan if not operation.done] if not dry_run else []
+            logger.info(f"同步计划执行结束，耗时: {self._format_timings(timings)}")
+            return {
+                "total_bangumi_items": len(self.journal.items()) if not dry_run else 0,
+                "total_notion_items": len(self.journal.pages()) if not dry_run else 0,
+                "add_count": sum(1 for operation in plan if operation.action == "add"),
+                "update_count": sum(1 for operation in plan if operation.action == "update"),
+                "delete_count": sum(1 for operation in plan if operation.action == "delete"),
+                "duplicate_count": 0,
+                "failed_count": len(failed),
+                "failed_operations": [self._journal_result(operation) for operation in failed],
+                "timings": timings
+            }
+        except Exception as e:
+            logger.error(f"继续同步计划时发生错误: {e}")
+            raise SyncError(f"继续同步计划时发生错误", e) from e
+    
+    def _resumable(self) -> bool:
+        """是否存在可以继续的同步计划"""
+        if self.journal is None or not self.journal.has_plan():
+            return False
+        database_id = self.journal.get_meta(JournalConstants.META_DATABASE_ID)
+        if database_id != self.config.notion_database_id:
+            logger.warning(f"同步计划属于其他数据库（{database_id}），忽略该计划")
+            return False
+        return True
+    
+    def _skip_created_pages(self, operations: List[JournalOperation]) -> None:
+        """将上次已在Notion中创建成功、但未记录结果的添加操作标记为完成"""
+        adds = {operation.subject_id: operation for operation in operations if operation.action == "add"}
+        if adds:
+            self._mark_created_pages(adds, self.notion_client.find_pages_by_subject_ids(list(adds),
+                                                                                        self._index_properties()))
+    
+    def _mark_created_pages(self, adds: Dict[int, JournalOperation], found: Dict[int, NotionRecord]) -> None:
+        """将已按Bangumi链接找到页面的添加操作标记为完成"""
+        for subject_id, record in found.items():
+            operation = adds[subject_id]
+            operation.status = JournalOperation.DONE
+            operation.result_page_id = record.page_id
+            self.journal.complete(operation.seq, record.page_id)
+        if found:
+            logger.info(f"{len(found)} 条待添加记录已在上次同步中创建，跳过")
+    
+    def _settle_journal(self, dry_run: bool) -> None:
+        """不使用--resume时放弃上次未完成的同步计划，见_unsettled_adds"""
+        adds = self._unsettled_adds(dry_run)
+        if adds is None:
+            return
+        if adds:
+            self._mark_created_pages(adds, self.notion_client.find_pages_by_subject_ids(list(adds),
+                                                                                        self._index_properties()))
+        self._discard_journal()
+    
+    async def _settle_journal_async(self, dry_run: bool) -> None:
+        """_settle_journal的异步版本"""
+        adds = self._unsettled_adds(dry_run)
+        if adds is None:
+            return
+        if adds:
+            self._mark_created_pages(adds, await self.notion_client.find_pages_by_subject_ids(list(adds),
+                                                                                              self._index_properties()))
+        self._discard_journal()
+    
+    def _unsettled_adds(self, dry_run: bool) -> Optional[Dict[int, JournalOperation]]:
+        """找出上次未完成的同步计划中结果未知的添加操作
+
+        上次已经生效的操作可能还没有记录到本地状态，直接放弃计划会重复创建页面。
+        因此只按Bangumi链接确认结果未知的添加操作，再把已生效的操作记入本地状态，
+        而不是全量扫描Notion；其余操作由本次同步重新对比得出。
+
+        Returns:
+            需要确认的添加操作，key为subject_id；没有需要处理的计划时返回None
+        """
+        if not self._resumable():
+            return None
+        if dry_run:
+            logger.warning("存在未完成的同步计划，模拟运行不处理该计划，列出的操作可能包含上次已经执行的操作")
+            return None
+        logger.warning("存在未完成的同步计划但未使用--resume，将把计划中已生效的操作记入本地状态后放弃该计划")
+        return {operation.subject_id: operation for operation in self.journal.operations()
+                if operation.action == "add" and not operation.done}
+    
+    def _discard_journal(self) -> None:
+        """把同步计划中已完成的操作记入本地状态，然后清空计划"""
+        if self.state_store is not None:
+            entries = self.state_store.load()
+            items = self.journal.items()
+            for operation in self.journal.operations():
+                if not operation.done:
+                    continue
+                if operation.action == "delete":
+                    entries.pop(operation.subject_id, None)
+                    continue
+                digest, field_hashes, title = items[operation.subject_id]
+                page_id = operation.result_page_id or operation.page_id
+                entries[operation.subject_id] = StateEntry(operation.subject_id, digest, page_id, title,
+                                                           field_hashes=field_hashes)
+            self.state_store.replace_all(entries.values())
+        self.journal.clear()
+    
+    @staticmethod
+    def _journal_result(operation: JournalOperation) -> OperationResult:
+        """由计划中的操作构造执行结果，用于更新本地状态和结果统计"""
+        result = OperationResult(operation.seq, operation.action, operation.title, operation.subject_id)
+        result.success = operation.done
+        result.response = {"id": operation.result_page_id}
+        if not operation.done:
+            result.error = SyncError(operation.error or "操作尚未执行")
+        return result
+    
+    def _begin_journal(self,
+                       plan: List[JournalOperation],
+                       synced_items: Dict[int, Tuple[Fingerprint, str]],
+                       notion_data: Dict[int, NotionRecord],
+                       full_scan: bool,
+                       updated_ats: List[Optional[str]]) -> None:
+        """执行写入前记录操作计划和提交本地状态所需的数据"""
+        if self.journal is None:
+            return
+        if not plan:
+            self.journal.clear()
+            return
+        
+        self.journal.begin(
+            {
+                JournalConstants.META_DATABASE_ID: self.config.notion_database_id,
+                JournalConstants.META_FULL_SCAN: "1" if full_scan else None,
+                JournalConstants.META_HIGH_WATER_MARK: self._latest_updated_at(updated_ats),
+                JournalConstants.META_SUBJECT_TYPES: self._subject_types_key()
+            },
+            plan,
+            ((sid, item_fingerprint.digest, item_fingerprint.field_hashes, title)
+             for sid, (item_fingerprint, title) in synced_items.items()),
+            ((sid, item.page_id, self._notion_title(item)) for sid, item in notion_data.items())
+        )
+    
+    def _finish_journal(self, results: List[OperationResult]) -> None:
+        """所有操作都成功时清空同步计划，否则保留以便重试失败的操作"""
+        if self.journal is None:
+            return
+        failed = sum(1 for result in results if not result.success)
+        if failed:
+            logger.warning(f"{failed} 项操作失败，已保留同步计划，可以使用--resume重试")
+        else:
+            self.journal.clear()
+    
+    def _load_concurrently(self,
+                           since: Optional[str],
+                           use_state: bool,
+                           timings: Dict[str, float],
+                           dry_run: bool = False) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, NotionRecord]]:
+        """同时获取Bangumi数据和加载Notion索引
+
+        两个阶段共享一个取消信号：任一阶段失败时另一阶段不再发送新的请求，尽快结束。
+        Notion数据库结构预检不通过时，Bangumi数据的获取也随之取消。
+
+        Args:
+            since: 增量获取的时间水位线
+            use_state: 是否使用本地状态缓存代替Notion全量扫描
+            timings: 阶段耗时，会写入bangumi_fetch、schema和notion_index
+            dry_run: 是否为模拟运行，预检时不修改数据库结构
+
+        Returns:
+            (Bangumi数据, Notion索引)
+        """
+        cancel = threading.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="sync-load") as pool:
+                bangumi_future = pool.submit(self._load_bangumi, since, cancel, timings)
+                notion_future = pool.submit(self._load_notion, use_state, cancel, timings, dry_run)
+                wait([bangumi_future, notion_future])
+        except BaseException:
+            cancel.set()
+            raise
+        
+        # 优先抛出最先失败的阶段的异常，而不是另一阶段因此产生的取消异常
+        errors = [future.exception() for future in (bangumi_future, notion_future) if future.exception()]
+        if errors:
+            raise next((e for e in errors if not isinstance(e, SyncCancelledError)), errors[0])
+        return bangumi_future.result(), notion_future.result()
+    
+    def _load_bangumi(self, since: Optional[str], cancel: threading.Event,
+                      timings: Dict[str, float]) -> Dict[int, Dict[str, Any]]:
+        """获取Bangumi数据，启用详情补充和剧集同步时接着补充条目详情和剧集"""
+        bangumi_data = self._run_phase(timings, "bangumi_fetch", cancel, self.get_bangumi_data, since, cancel)
+        if self._enrich_enabled():
+            self._run_phase(timings, "enrich", cancel, self.enrich, list(bangumi_data.values()), cancel)
+        if self._episodes_enabled():
+            self._run_phase(timings, "episodes", cancel, self.sync_episodes, list(bangumi_data.values()), cancel)
+        return bangumi_data
+    
+    def _load_notion(self, use_state: bool, cancel: threading.Event, timings: Dict[str, float],
+                     dry_run: bool) -> Dict[int, NotionRecord]:
+        """检查Notion数据库结构后加载Notion索引"""
+        self._run_phase(timings, "schema", cancel, self.preflight, dry_run)
+        return self._run_phase(timings, "notion_index", cancel, self.load_index, use_state, cancel)
+    
+    @staticmethod
+    def _run_phase(timings: Dict[str, float], name: str, cancel: threading.Event,
+                   func: Callable[..., Any], *args: Any) -> Any:
+        """执行一个同步阶段并记录耗时，失败时设置取消信号"""
+        started = time.monotonic()
+        try:
+            return func(*args)
+        except BaseException:
+            cancel.set()
+            raise
+        finally:
+            timings[name] = round(time.monotonic() - started, 3)
+    
+    @staticmethod
+    def _format_timings(timings: Dict[str, float]) -> str:
+        """格式化阶段耗时，用于日志"""
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    
+    def sync_streaming(self, dry_run: bool = False, full_resync: bool = False) -> Dict[str, Any]:
+        """流式执行同步流程
+
+        先加载Notion索引，然后逐页获取Bangumi数据，每页对比完成后立即提交写入操作，
+        后续分页仍在下载时写入已经开始。删除操作在所有分页处理完后统一对账执行。
+
+        Args:
+            dry_run: 是否为模拟运行，不实际修改Notion数据库
+            full_resync: 是否忽略本地状态缓存，强制全量扫描Notion
+
+        Returns:
+            同步结果统计
+        """
+        logger.info("使用流式同步模式")
+        
+        started = time.monotonic()
+        timings = {}
+        self.inconsistent_types = set()
+        try:
+            # 流式同步不记录同步计划，先处理上次非流式同步留下的计划
+            self._settle_journal(dry_run)
+            use_state = self._use_state(full_resync)
+            since = self._incremental_since() if use_state else None
+            notion_data = self._load_notion(use_state, threading.Event(), timings, dry_run)
+            
+            operations = {"add": [], "update": [], "delete": []}
+            synced_items = {}
+            updated_ats = []
+            results = []
+            
+            phase_started = time.monotonic()
+            with WriteExecutor(max_workers=self.config.notion_max_workers) as executor:
+                for page in self._iter_collection_pages(since):
+                    if self._enrich_enabled():
+                        self.enrich([item for item in page if self._should_sync(item)])
+                    if self._episodes_enabled():
+                        self.sync_episodes([item for item in page if self._should_sync(item)])
+                    page_operations, page_fingerprints = self._diff_page(page, notion_data, synced_items, updated_ats)
+                    self._resolve_adds(page_operations, page_fingerprints, notion_data)
+                    self._submit_page_operations(executor, page_operations, operations, dry_run)
+                
+                # 所有分页处理完后再对账删除，避免误删尚未下载到的记录
+                operations["delete"] = self._pipeline_deletes(since, synced_items, notion_data)
+                self._report_duplicates()
+                if not dry_run:
+                    self._execute_delete_operations(executor, operations["delete"])
+                    self._submit_duplicate_archives(executor)
+                    results = executor.wait()
+            timings["pipeline"] = round(time.monotonic() - phase_started, 3)
+            
+            return self._pipeline_result(dry_run, operations, synced_items, updated_ats,
+                                         notion_data, use_state, results, timings, started)
+        except Exception as e:
+            logger.error(f"同步过程中发生错误: {e}")
+            raise SyncError(f"同步过程中发生错误", e) from e
+    
+    async def sync_async(self, dry_run: bool = False, full_resync: bool = False) -> Dict[str, Any]:
+        """在事件循环中执行同步流程，需要AsyncBangumiClient和AsyncNotionService
+
+        Bangumi分页获取、Notion索引加载和Notion写入在同一个事件循环中重叠进行：
+        分页获取与索引加载同时开始，索引就绪后每页对比完成即提交写入，删除操作最后统一对账。
+
+        Args:
+            dry_run: 是否为模拟运行，不实际修改Notion数据库
+            full_resync: 是否忽略本地状态缓存，强制全量扫描Notion
+
+        Returns:
+            同步结果统计
+        """
+        logger.info("开始同步Bangumi追番记录到Notion（异步引擎）...")
+        
+        started = time.monotonic()
+        timings = {}
+        self.inconsistent_types = set()
+        producer = index_loader = executor = None
+        try:
+            # 异步引擎不记录同步计划，先处理上次非流式同步留下的计划
+            await self._settle_journal_async(dry_run)
+            use_state = self._use_state(full_resync)
+            since = self._incremental_since() if use_state else None
+            
+            pages: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.ensure_future(self._produce_pages(pages, since, timings))
+            index_loader = asyncio.ensure_future(self._load_index_async(use_state, timings, dry_run))
+            # 分页获取在索引加载完成前失败时立即结束，不再等待索引
+            await asyncio.wait({producer, index_loader}, return_when=asyncio.FIRST_EXCEPTION)
+            if producer.done() and producer.exception() is not None:
+                await producer
+            notion_data = await index_loader
+            
+            operations = {"add": [], "update": [], "delete": []}
+            synced_items = {}
+            updated_ats = []
+            results = []
+            
+            executor = AsyncWriteExecutor(max_workers=self.config.notion_max_workers)
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                if self._enrich_enabled():
+                    await self.enrich_async([item for item in page if self._should_sync(item)])
+                if self._episodes_enabled():
+                    await self.sync_episodes_async([item for item in page if self._should_sync(item)])
+                page_operations, page_fingerprints = self._diff_page(page, notion_data, synced_items, updated_ats)
+                await self._resolve_adds_async(page_operations, page_fingerprints, notion_data)
+                self._submit_page_operations(executor, page_operations, operations, dry_run)
+            # 分页获取失败时在这里抛出异常
+            await producer
+            
+            operations["delete"] = self._pipeline_deletes(since, synced_items, notion_data)
+            self._report_duplicates()
+            if not dry_run:
+                self._execute_delete_operations(executor, operations["delete"])
+                self._submit_duplicate_archives(executor)
+                results = await executor.wait()
+            
+            return self._pipeline_result(dry_run, operations, synced_items, updated_ats,
+                                         notion_data, use_state, results, timings, started)
+        except Exception as e:
+            logger.error(f"同步过程中发生错误: {e}")
+            raise SyncError(f"同步过程中发生错误", e) from e
+        finally:
+            # 任一环节失败时取消其余仍在进行的任务
+            for task in (producer, index_loader):
+                if task is not None and not task.done():
+                    task.cancel()
+            if executor is not None:
+                executor.cancel()
+    
+    async def _produce_pages(self, pages: asyncio.Queue, since: Optional[str], timings: Dict[str, float]) -> None:
+        """逐页获取Bangumi数据放入队列，结束或失败时放入None
+
+        同步多种条目类型时各类型同时获取，分页按到达顺序放入同一个队列。
+        """
+        started = time.monotonic()
+        producers = [asyncio.ensure_future(self._produce_type_pages(pages, since, subject_type))
+                     for subject_type in self.config.subject_types]
+        try:
+            await asyncio.gather(*producers)
+        finally:
+            # 任一类型失败时取消其余类型的获取
+            for producer in producers:
+                producer.cancel()
+            timings["bangumi_fetch"] = round(time.monotonic() - started, 3)
+            pages.put_nowait(None)
+    
+    async def _produce_type_pages(self, pages: asyncio.Queue, since: Optional[str], subject_type: str) -> None:
+        """逐页获取一种条目类型的Bangumi数据放入队列"""
+        async for page in self.bangumi_client.iter_collection_pages(self.config.bangumi_username, since,
+                                                                    subject_type=subject_type,
+                                                                    inconsistent=self.inconsistent_types):
+            self._tag_subject_type(page, subject_type)
+            await pages.put(page)
+    
+    async def _load_index_async(self, use_state: bool, timings: Dict[str, float],
+                                dry_run: bool = False) -> Dict[int, NotionRecord]:
+        """检查Notion数据库结构后加载Notion索引，_load_notion的异步版本"""
+        started = time.monotonic()
+        try:
+            await self.preflight_async(dry_run)
+        finally:
+            timings["schema"] = round(time.monotonic() - started, 3)
+        
+        started = time.monotonic()
+        try:
+            if use_state:
+                logger.info("使用本地状态缓存，跳过Notion全量扫描")
+                return self.get_state_data()
+            
+            self.duplicates = {}
+            notion_data = await self.notion_client.get_existing_items(properties=self._index_properties(),
+                                                                      status=self._sync_status_label(),
+                                                                      duplicates=self.duplicates)
+            if self.state_store is not None:
+                self._report_drift(notion_data)
+            return notion_data
+        finally:
+            timings["notion_index"] = round(time.monotonic() - started, 3)
+    
+    async def _resolve_adds_async(self,
+                                  operations: Dict[str, List[Any]],
+                                  fingerprints: Dict[int, Fingerprint],
+                                  notion_data: Dict[int, NotionRecord]) -> None:
+        """_resolve_adds的异步版本"""
+        if self._sync_status_label() is None or not operations["add"]:
+            return
+        
+        subject_ids = [item["subject_id"] for item in operations["add"]]
+        found = await self.notion_client.find_pages_by_subject_ids(subject_ids, self._index_properties(),
+                                                                   duplicates=self.duplicates)
+        self._apply_found_pages(operations, fingerprints, notion_data, found)
+    
+    def _diff_page(self,
+                   page: List[Dict[str, Any]],
+                   notion_data: Dict[int, NotionRecord],
+                   synced_items: Dict[int, Tuple[Fingerprint, str]],
+                   updated_ats: List[Optional[str]]) -> Tuple[Dict[str, List[Any]], Dict[int, Fingerprint]]:
+        """对比一页Bangumi记录
+
+        Args:
+            page: 解析后的一页Bangumi记录
+            notion_data: Notion索引
+            synced_items: 本次同步的记录，会追加本页需要同步的记录
+            updated_ats: 本次同步记录的updated_at，会追加本页的值
+
+        Returns:
+            (本页的操作列表, 本页记录的指纹)
+        """
+        page_operations = {"add": [], "update": [], "delete": []}
+        page_fingerprints = {}
+        for bangumi_item in page:
+            if bangumi_item.get("subject_id") in synced_items:
+                # 同一条目在本次同步中只写入一次
+                logger.debug(f"跳过重复的记录: {self._bangumi_title(bangumi_item)} (ID: {bangumi_item['subject_id']})")
+                continue
+            if self._should_sync(bangumi_item):
+                bangumi_fingerprint = self._bangumi_fingerprint(bangumi_item)
+                page_fingerprints[bangumi_item["subject_id"]] = bangumi_fingerprint
+                synced_items[bangumi_item["subject_id"]] = (bangumi_fingerprint, self._bangumi_title(bangumi_item))
+                updated_ats.append(bangumi_item.get("updated_at"))
+                self._diff_item(bangumi_item, bangumi_fingerprint, notion_data, page_operations)
+        return page_operations, page_fingerprints
+    
+    def _submit_page_operations(self, executor, page_operations: Dict[str, List[Any]],
+                                operations: Dict[str, List[Any]], dry_run: bool) -> None:
+        """提交一页的添加和更新操作，并汇总到总操作列表"""
+        if not dry_run:
+            self._execute_add_operations(executor, page_operations["add"])
+            self._execute_update_operations(executor, page_operations["update"])
+        operations["add"].extend(page_operations["add"])
+        operations["update"].extend(page_operations["update"])
+    
+    def _pipeline_deletes(self,
+                          since: Optional[str],
+                          synced_items: Dict[int, Tuple[Fingerprint, str]],
+                          notion_data: Dict[int, NotionRecord]) -> List[Dict[str, Any]]:
+        """所有分页处理完后找出需要删除的记录"""
+        reason = self._skip_deletes_reason(since is not None)
+        if reason is not None:
+            logger.info(f"{reason}，跳过删除逻辑")
+            return []
+        return self._find_deletes(synced_items, notion_data)
+    
+    def _skip_deletes_reason(self, partial: bool) -> Optional[str]:
+        """判断本次同步能否根据Bangumi数据判断删除
+
+        Args:
+            partial: Bangumi数据是否只包含部分记录（增量获取）
+
+        Returns:
+            不能判断删除的原因，可以判断时返回None
+        """
+        if partial:
+            return "增量获取模式无法发现已移除的记录"
+        if not self.config.enable_delete:
+            return "已禁用删除操作"
+        if self.inconsistent_types:
+            logger.warning(f"条目类型 {', '.join(sorted(self.inconsistent_types))} 的Bangumi分页数据在获取期间发生变化，"
+                           "结果可能缺少记录，下次同步将全量重新同步")
+            return "Bangumi分页数据不一致"
+        return None
+    
+    def _pipeline_result(self,
+                         dry_run: bool,
+                         operations: Dict[str, List[Any]],
+                         synced_items: Dict[int, Tuple[Fingerprint, str]],
+                         updated_ats: List[Optional[str]],
+                         notion_data: Dict[int, NotionRecord],
+                         use_state: bool,
+                         results: List[OperationResult],
+                         timings: Dict[str, float],
+                         started: float) -> Dict[str, Any]:
+        """流式同步结束后更新本地状态并生成结果统计"""
+        if dry_run:
+            logger.info("模拟运行模式，不会实际修改Notion数据库")
+            self._log_operations(operations)
+        else:
+            self._commit_state(synced_items, notion_data, not use_state, results)
+            self._commit_high_water_mark(updated_ats)
+        failed = [result for result in results if not result.success]
+        timings["total"] = round(time.monotonic() - started, 3)
+        
+        logger.info(f"同步完成: 添加 {len(operations['add'])} 条记录，更新 {len(operations['update'])} 条记录，删除 {len(operations['delete'])} 条记录，失败 {len(failed)} 项")
+        logger.info(f"各阶段耗时: {self._format_timings(timings)}")
+        return {
+            "total_bangumi_items": len(synced_items),
+            "total_notion_items": len(notion_data),
+            "add_count": len(operations["add"]),
+            "update_count": len(operations["update"]),
+            "delete_count": len(operations["delete"]),
+            "duplicate_count": self._duplicate_count(),
+            "failed_count": len(failed),
+            "failed_operations": failed,
+            "timings": timings
+        }
+    
+    def get_bangumi_data(self, since: Optional[str] = None,
+                         cancel: Optional[threading.Event] = None) -> Dict[int, Dict[str, Any]]:
         """获取Bangumi数据
 
+        Args:
+            since: 增量获取的时间水位线，为None时获取全部记录
+            cancel: 取消信号，设置后不再请求后续分页
+
         Returns:
             解析后的Bangumi追番记录字典，key为subject_id
         """
-        logger.info(f"获取 {self.config.bangumi_username} 的Bangumi追番记录")
-        collections = self.bangumi_client.get_user_collections(self.config.bangumi_username)
+        logger.info(f"获取 {self.config.bangumi_username} 的Bangumi收藏，条目类型: {', '.join(self.config.subject_types)}")
+        collections = self._fetch_collections(since, cancel)
         
         bangumi_data = {}
-        for collection in collections:
-            parsed_data = self.bangumi_client.parse_collection_data(collection)
-            subject_id = parsed_data.get("subject_id")
-            
-            # 根据sync_status过滤记录
-            if subject_id:
-                status = parsed_data.get("status")
-                if self.config.sync_status == 'all' or self.config.sync_status == status:
-                    bangumi_data[subject_id] = parsed_data
-                else:
-                    logger.debug(f"跳过记录: {parsed_data.get('title_cn') or parsed_data.get('title')} (状态: {status})")
+        for subject_type, type_collections in collections.items():
+            parsed_items = [parse_collection_data(collection) for collection in type_collections]
+            self._tag_subject_type(parsed_items, subject_type)
+            for parsed_data in parsed_items:
+                if self._should_sync(parsed_data):
+                    bangumi_data[parsed_data["subject_id"]] = parsed_data
         
         logger.info(f"成功解析 {len(bangumi_data)} 条Bangumi追番记录，过滤条件: {self.config.sync_status}")
         return bangumi_data
     
-    def get_notion_data(self) -> Dict[int, Dict[str, Any]]:
+    def _fetch_collections(self, since: Optional[str],
+                           cancel: Optional[threading.Event]) -> Dict[str, List[Dict[str, Any]]]:
+        """获取每种条目类型的原始收藏，多种类型时同时获取
+
+        各类型共享一个取消信号：任一类型失败时其余类型不再请求后续分页。
+
+        Args:
+            since: 增量获取的时间水位线
+            cancel: 取消信号
+
+        Returns:
+            按配置顺序排列的原始收藏，key为条目类型
+        """
+        username = self.config.bangumi_username
+        subject_types = self.config.subject_types
+        if len(subject_types) == 1:
+            return {subject_types[0]: self.bangumi_client.get_user_collections(
+                username, since, cancel=cancel, subject_type=subject_types[0], inconsistent=self.inconsistent_types)}
+        
+        cancel = cancel or threading.Event()
+        
+        def fetch(subject_type: str) -> List[Dict[str, Any]]:
+            try:
+                return self.bangumi_client.get_user_collections(username, since, cancel=cancel,
+                                                                subject_type=subject_type,
+                                                                inconsistent=self.inconsistent_types)
+            except BaseException:
+                cancel.set()
+                raise
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(subject_types), thread_name_prefix="bangumi-type") as pool:
+                futures = {subject_type: pool.submit(fetch, subject_type) for subject_type in subject_types}
+                wait(futures.values())
+        except BaseException:
+            cancel.set()
+            raise
+        
+        errors = [future.exception() for future in futures.values() if future.exception()]
+        if errors:
+            raise next((e for e in errors if not isinstance(e, SyncCancelledError)), errors[0])
+        return {subject_type: future.result() for subject_type, future in futures.items()}
+    
+    def _iter_collection_pages(self, since: Optional[str]) -> Iterator[List[Dict[str, Any]]]:
+        """逐页获取Bangumi数据，多种条目类型时依次获取每种类型"""
+        for subject_type in self.config.subject_types:
+            for page in self.bangumi_client.iter_collection_pages(self.config.bangumi_username, since,
+                                                                  subject_type=subject_type,
+                                                                  inconsistent=self.inconsistent_types):
+                self._tag_subject_type(page, subject_type)
+                yield page
+    
+    def _types_enabled(self) -> bool:
+        """是否同步多种条目类型，此时记录带有条目类型并写入类型属性"""
+        return len(self.config.subject_types) > 1
+    
+    def _tag_subject_type(self, bangumi_items: List[Dict[str, Any]], subject_type: str) -> None:
+        """同步多种条目类型时为记录标记条目类型"""
+        if self._types_enabled():
+            for item in bangumi_items:
+                item[FingerprintConstants.TYPE_FIELD] = subject_type
+    
+    def _subject_types_key(self) -> str:
+        """返回本次同步的条目类型集合，保存在状态中用于发现类型变化"""
+        return ",".join(sorted(set(self.config.subject_types)))
+    
+    def _enrich_enabled(self) -> bool:
+        """是否启用条目详情补充"""
+        return self.subject_cache is not None and self.config.enable_enrich
+    
+    def enrich(self, bangumi_items: List[Dict[str, Any]], cancel: Optional[threading.Event] = None) -> None:
+        """用条目详情补充Bangumi记录的标签、制作公司、评分人数和简介
+
+        优先使用本地缓存，只请求缓存中不存在或已过期的条目，获取后写回缓存。
+        获取失败的条目不补充，本次同步中这些字段不参与对比。
+
+        Args:
+            bangumi_items: 解析后的Bangumi追番记录，会被原地补充
+            cancel: 取消信号，设置后不再请求新的条目详情
+        """
+        missing = self._apply_cached_details(bangumi_items)
+        if missing:
+            details = self.bangumi_client.get_subject_details([item["subject_id"] for item in missing], cancel)
+            self._apply_fetched_details(missing, details)
+    
+    async def enrich_async(self, bangumi_items: List[Dict[str, Any]]) -> None:
+        """enrich的异步版本"""
+        missing = self._apply_cached_details(bangumi_items)
+        if missing:
+            details = await self.bangumi_client.get_subject_details([item["subject_id"] for item in missing])
+            self._apply_fetched_details(missing, details)
+    
+    def _apply_cached_details(self, bangumi_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """用缓存补充记录，返回缓存未命中的记录"""
+        items = [item for item in bangumi_items if item.get("subject_id")]
+        cached = self.subject_cache.get_many(item["subject_id"] for item in items)
+        missing = []
+        for item in items:
+            if item["subject_id"] in cached:
+                item.update(cached[item["subject_id"]])
+            else:
+                missing.append(item)
+        logger.info(f"条目详情缓存命中 {len(items) - len(missing)} 条，需要获取 {len(missing)} 条")
+        return missing
+    
+    def _apply_fetched_details(self, bangumi_items: List[Dict[str, Any]], details: Dict[int, Dict[str, Any]]) -> None:
+        """用新获取的条目详情补充记录并写入缓存"""
+        entries = []
+        for item in bangumi_items:
+            detail = details.get(item["subject_id"])
+            if detail is None:
+                continue
+            enriched = parse_subject_detail(detail)
+            item.update(enriched)
+            entries.append((item["subject_id"], enriched, item.get("air_status") == "finished"))
+        if entries:
+            self.subject_cache.put_many(entries)
+    
+    def _episodes_enabled(self) -> bool:
+        """是否启用剧集同步"""
+        return self.episode_cache is not None and self.config.enable_episodes
+    
+    def sync_episodes(self, bangumi_items: List[Dict[str, Any]], cancel: Optional[threading.Event] = None) -> None:
+        """用剧集列表补充Bangumi记录的每集观看状态和下一集播出日期
+
+        只请求缓存中没有、或总集数和已观看集数自上次获取后发生变化的条目，已完结条目缓存后不再请求。
+        获取失败的条目不补充，本次同步中这些字段不参与对比。
+
+        Args:
+            bangumi_items: 解析后的Bangumi追番记录，会被原地补充
+            cancel: 取消信号，设置后不再请求新的剧集列表
+        """
+        missing = self._apply_cached_episodes(bangumi_items)
+        if missing:
+            episodes = self.bangumi_client.get_episodes([item["subject_id"] for item in missing], cancel)
+            self._apply_fetched_episodes(missing, episodes)
+    
+    async def sync_episodes_async(self, bangumi_items: List[Dict[str, Any]]) -> None:
+        """sync_episodes的异步版本"""
+        missing = self._apply_cached_episodes(bangumi_items)
+        if missing:
+            episodes = await self.bangumi_client.get_episodes([item["subject_id"] for item in missing])
+            self._apply_fetched_episodes(missing, episodes)
+    
+    def _has_episodes(self, bangumi_item: Dict[str, Any]) -> bool:
+        """记录的条目类型是否有剧集列表，书籍、音乐和游戏不请求剧集"""
+        subject_type = bangumi_item.get(FingerprintConstants.TYPE_FIELD) or self.config.subject_types[0]
+        return subject_type in EpisodeConstants.SUBJECT_TYPES
+    
+    @staticmethod
+    def _episode_key(bangumi_item: Dict[str, Any]) -> Tuple[Optional[int], int]:
+        """返回判断剧集缓存是否有效的(总集数, 已观看集数)"""
+        return bangumi_item.get("total_episodes"), bangumi_item.get("ep_status") or 0
+    
+    def _apply_cached_episodes(self, bangumi_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """用缓存的剧集列表补充记录，返回需要重新获取的记录"""
+        items = [item for item in bangumi_items if item.get("subject_id") and self._has_episodes(item)]
+        cached = self.episode_cache.get_many({item["subject_id"]: self._episode_key(item) for item in items})
+        missing = []
+        for item in items:
+            episodes = cached.get(item["subject_id"])
+            if episodes is not None:
+                item.update(episode_progress(episodes, item.get("ep_status")))
+            else:
+                missing.append(item)
+        logger.info(f"剧集列表缓存命中 {len(items) - len(missing)} 条，需要获取 {len(missing)} 条")
+        return missing
+    
+    def _apply_fetched_episodes(self, bangumi_items: List[Dict[str, Any]],
+                                episodes: Dict[int, List[Dict[str, Any]]]) -> None:
+        """用新获取的剧集列表补充记录并写入缓存"""
+        entries = []
+        for item in bangumi_items:
+            raw = episodes.get(item["subject_id"])
+            if raw is None:
+                continue
+            parsed = parse_episodes(raw)
+            item.update(episode_progress(parsed, item.get("ep_status")))
+            entries.append((item["subject_id"], parsed, *self._episode_key(item), item.get("air_status") == "finished"))
+        if entries:
+            self.episode_cache.put_many(entries)
+    
+    def _should_sync(self, parsed_data: Dict[str, Any]) -> bool:
+        """根据sync_status判断记录是否需要同步
+
+        Args:
+            parsed_data: 解析后的追番记录
+
+        Returns:
+            是否需要同步
+        """
+        if not parsed_data.get("subject_id"):
+            return False
+        
+        status = parsed_data.get("status")
+        if self.config.sync_status == 'all' or self.config.sync_status == status:
+            return True
+        
+        logger.debug(f"跳过记录: {parsed_data.get('title_cn') or parsed_data.get('title')} (状态: {status})")
+        return False
+    
+    def get_notion_data(self, cancel: Optional[threading.Event] = None) -> Dict[int, NotionRecord]:
         """获取Notion数据
 
+        只获取对比需要的属性；sync_status不为all时在服务端按观看状态过滤。
+
+        Args:
+            cancel: 取消信号，设置后不再请求后续分页
+
         Returns:
             现有番剧记录字典，key为subject_id
         """
-        return self.notion_client.get_existing_items()
+        self.duplicates = {}
+        return self.notion_client.get_existing_items(properties=self._index_properties(),
+                                                     status=self._sync_status_label(), cancel=cancel,
+                                                     duplicates=self.duplicates)
+    
+    def preflight(self, dry_run: bool = False) -> None:
+        """检查Notion数据库结构，在获取和对比数据、批量写入之前发现缺少的属性和选项
+
+        每次同步获取一次数据库结构，同时提供加载索引时filter_properties需要的属性ID：
+        缺少的属性和选项合并为一次请求创建，属性类型不一致等无法自动修复的问题抛出SchemaError。
+        通过预检的结构哈希保存在本地状态中，结构未变化时跳过对比。
+
+        Args:
+            dry_run: 是否为模拟运行，只列出需要的变更而不修改数据库
+        """
+        if not self.config.enable_schema_check:
+            return
+        expected = self._expected_schema()
+        changes = self._plan_schema(expected, self.notion_client.get_schema(), dry_run)
+        if changes:
+            self._save_schema_hash(expected, self.notion_client.update_schema(changes))
+    
+    async def preflight_async(self, dry_run: bool = False) -> None:
+        """preflight的异步版本"""
+        if not self.config.enable_schema_check:
+            return
+        expected = self._expected_schema()
+        changes = self._plan_schema(expected, await self.notion_client.get_schema(), dry_run)
+        if changes:
+            self._save_schema_hash(expected, await self.notion_client.update_schema(changes))
+    
+    def _expected_schema(self) -> notion_schema.ExpectedSchema:
+        """返回本次同步写入的属性及其类型和需要存在的选项"""
+        names = list(NotionConstants.INDEX_PROPERTIES) + ["最后更新时间"]
+        if self._enrich_enabled():
+            names.extend(NotionConstants.ENRICHED_PROPERTIES.values())
+        if self._episodes_enabled():
+            names.extend(NotionConstants.EPISODE_PROPERTIES.values())
+        expected = {name: (NotionConstants.PROPERTY_TYPES[name], []) for name in names}
+        expected["观看状态"] = ("select", list(NotionConstants.WATCHING_STATUS_MAP.values()))
+        expected["播出状态"] = ("select", list(NotionConstants.AIR_STATUS_MAP.values()))
+        if self._types_enabled():
+            expected[NotionConstants.TYPE_PROPERTY] = (
+                "select", [NotionConstants.SUBJECT_TYPE_MAP[subject_type] for subject_type in self.config.subject_types])
+        if self.config.notion_fingerprint_property:
+            expected[self.config.notion_fingerprint_property] = ("rich_text", [])
+        return expected
+    
+    def _plan_schema(self, expected: notion_schema.ExpectedSchema, properties: Dict[str, Any],
+                     dry_run: bool) -> Dict[str, Any]:
+        """对比数据库结构，返回需要执行的变更
+
+        Args:
+            expected: 本次同步写入的属性
+            properties: 数据库结构中的properties
+            dry_run: 是否为模拟运行，模拟运行时只记录需要的变更
+
+        Returns:
+            databases.update的properties参数，不需要修改时为空字典
+        """
+        digest = notion_schema.schema_hash(expected, properties)
+        if self.state_store is not None and self.state_store.get_meta(StateConstants.META_SCHEMA_HASH) == digest:
+            logger.info("Notion数据库结构与上次预检时一致")
+            return {}
+        
+        changes, errors = notion_schema.plan_changes(expected, properties)
+        if errors:
+            raise SchemaError(f"Notion数据库结构与同步的属性不兼容: {'; '.join(errors)}")
+        if not changes:
+            logger.info("Notion数据库结构预检通过")
+            self._save_schema_hash(expected, properties)
+            return {}
+        
+        descriptions = '; '.join(notion_schema.describe_changes(changes, properties))
+        if dry_run:
+            logger.warning(f"Notion数据库需要以下变更（模拟运行，不会修改）: {descriptions}")
+            return {}
+        logger.info(f"更新Notion数据库结构: {descriptions}")
+        return changes
+    
+    def _save_schema_hash(self, expected: notion_schema.ExpectedSchema, properties: Dict[str, Any]) -> None:
+        """记录通过预检的数据库结构哈希"""
+        if self.state_store is not None:
+            self.state_store.set_meta(StateConstants.META_SCHEMA_HASH, notion_schema.schema_hash(expected, properties))
+    
+    def _index_properties(self) -> List[str]:
+        """返回加载Notion索引时需要获取的属性"""
+        properties = list(NotionConstants.INDEX_PROPERTIES)
+        if self._enrich_enabled():
+            properties.extend(NotionConstants.ENRICHED_PROPERTIES.values())
+        if self._episodes_enabled():
+            properties.extend(NotionConstants.EPISODE_PROPERTIES.values())
+        # 类型属性存在时总是加载，只同步一种类型时也据此排除其他类型的页面
+        properties.append(NotionConstants.TYPE_PROPERTY)
+        if self.config.notion_fingerprint_property:
+            properties.append(self.config.notion_fingerprint_property)
+        return properties
+    
+    def _sync_status_label(self) -> Optional[str]:
+        """返回sync_status对应的Notion观看状态选项名，sync_status为all时返回None"""
+        if self.config.sync_status == 'all':
+            return None
+        return NotionConstants.WATCHING_STATUS_MAP.get(self.config.sync_status)
+    
+    def _resolve_adds(self,
+                      operations: Dict[str, List[Any]],
+                      fingerprints: Dict[int, Fingerprint],
+                      notion_data: Dict[int, NotionRecord]) -> None:
+        """确认待添加记录在Notion中确实不存在
+
+        按观看状态过滤时，Notion索引中没有其他状态的页面，Bangumi中状态刚变化的记录
+        会被误判为需要添加。这里按Bangumi链接查询这些记录，已存在的改为更新操作，避免重复创建页面。
+
+        Args:
+            operations: 操作列表，会被原地修改
+            fingerprints: 待添加记录的指纹，key为subject_id
+            notion_data: Notion索引，查到的页面会加入其中
+        """
+        if self._sync_status_label() is None or not operations["add"]:
+            return
+        
+        subject_ids = [item["subject_id"] for item in operations["add"]]
+        found = self.notion_client.find_pages_by_subject_ids(subject_ids, self._index_properties(),
+                                                             duplicates=self.duplicates)
+        self._apply_found_pages(operations, fingerprints, notion_data, found)
+    
+    def _apply_found_pages(self,
+                           operations: Dict[str, List[Any]],
+                           fingerprints: Dict[int, Fingerprint],
+                           notion_data: Dict[int, NotionRecord],
+                           found: Dict[int, NotionRecord]) -> None:
+        """将已存在于Notion中的待添加记录改为与查到的页面对比"""
+        if not found:
+            return
+        
+        logger.info(f"{len(found)} 条待添加记录已存在于Notion中（观看状态已变化），改为更新")
+        notion_data.update(found)
+        add_items = operations["add"]
+        operations["add"] = []
+        for bangumi_item in add_items:
+            subject_id = bangumi_item["subject_id"]
+            if subject_id in found:
+                self._diff_item(bangumi_item, fingerprints[subject_id], notion_data, operations)
+            else:
+                operations["add"].append(bangumi_item)
+    
+    def get_state_data(self) -> Dict[int, NotionRecord]:
+        """从本地状态缓存构建Notion索引
+
+        Returns:
+            现有番剧记录字典，key为subject_id，value只包含页面ID、标题和保存的指纹
+        """
+        entries = self.state_store.load()
+        logger.info(f"从本地状态缓存加载 {len(entries)} 条记录")
+        return {
+            subject_id: NotionRecord(entry.page_id, subject_id, entry.title,
+                                     fingerprint=Fingerprint(entry.content_hash, entry.field_hashes))
+            for subject_id, entry in entries.items()
+        }
+    
+    def load_index(self, use_state: bool, cancel: Optional[threading.Event] = None) -> Dict[int, NotionRecord]:
+        """加载用于对比的Notion索引
+
+        Args:
+            use_state: 是否直接使用本地状态缓存，跳过Notion全量扫描
+            cancel: 取消信号，设置后不再请求后续分页
+
+        Returns:
+            现有番剧记录字典，key为subject_id
+        """
+        if use_state:
+            logger.info("使用本地状态缓存，跳过Notion全量扫描")
+            return self.get_state_data()
+        
+        notion_data = self.get_notion_data(cancel)
+        if self.state_store is not None:
+            self._report_drift(notion_data)
+        return notion_data
+    
+    def _use_state(self, full_resync: bool) -> bool:
+        """判断本次同步能否使用本地状态缓存代替Notion全量扫描
+
+        Args:
+            full_resync: 是否强制全量扫描Notion
+
+        Returns:
+            是否使用本地状态缓存
+        """
+        if self.state_store is None:
+            return False
+        
+        reason = self._full_resync_reason(full_resync)
+        if reason is not None:
+            logger.info(f"执行Notion全量扫描: {reason}")
+            return False
+        return True
+    
+    def _incremental_since(self) -> Optional[str]:
+        """返回增量获取使用的时间水位线，未启用或没有水位线时返回None"""
+        if not self.config.incremental_fetch:
+            return None
+        return self.state_store.get_meta(StateConstants.META_HIGH_WATER_MARK)
+    
+    def _commit_high_water_mark(self, updated_ats) -> None:
+        """保存本次同步到的最新更新时间，作为下次增量获取的水位线
+
+        Args:
+            updated_ats: 本次同步记录的updated_at
+        """
+        if self.state_store is None:
+            return
+        
+        mark = self._latest_updated_at([self.state_store.get_meta(StateConstants.META_HIGH_WATER_MARK), *updated_ats])
+        if mark:
+            self.state_store.set_meta(StateConstants.META_HIGH_WATER_MARK, mark)
+            logger.debug(f"增量获取水位线: {mark}")
+    
+    @staticmethod
+    def _latest_updated_at(updated_ats) -> Optional[str]:
+        """返回最新的更新时间，没有有效时间时返回None"""
+        latest = mark = None
+        for updated_at in updated_ats:
+            parsed = parse_timestamp(updated_at)
+            if parsed is not None and (latest is None or parsed > latest):
+                latest, mark = parsed, updated_at
+        return mark
+    
+    def _full_resync_reason(self, full_resync: bool) -> Optional[str]:
+        """判断是否需要全量扫描Notion
+
+        Returns:
+            需要全量扫描的原因，不需要时返回None
+        """
+        if full_resync:
+            return "指定了--full-resync"
+        
+        last_full_sync = self.state_store.get_meta(StateConstants.META_LAST_FULL_SYNC)
+        if not last_full_sync:
+            return "本地状态缓存为空"
+        
+        if self.state_store.get_meta(StateConstants.META_NEEDS_FULL_RESYNC):
+            return "上次同步存在失败操作或Bangumi分页数据不一致，本地状态可能已与Notion不一致"
+        
+        subject_types = self.state_store.get_meta(StateConstants.META_SUBJECT_TYPES)
+        if subject_types != self._subject_types_key():
+            # 新增类型的旧记录早于水位线，减少的类型的页面在状态中无法区分
+            return f"同步的条目类型由 {subject_types or '未知'} 变为 {self._subject_types_key()}"
+        
+        if datetime.now() - datetime.fromisoformat(last_full_sync) > timedelta(days=self.config.state_resync_days):
+            return f"距上次全量同步已超过 {self.config.state_resync_days} 天"
+        
+        return None
+    
+    def _report_drift(self, notion_data: Dict[int, NotionRecord]) -> None:
+        """对比本地状态与Notion实际页面，报告漂移"""
+        notion_pages = {subject_id: item.page_id for subject_id, item in notion_data.items()}
+        missing_in_notion, missing_in_state, page_mismatch = self.state_store.detect_drift(notion_pages)
+        
+        if missing_in_notion or missing_in_state or page_mismatch:
+            logger.warning(f"检测到本地状态与Notion不一致: Notion中已不存在 {len(missing_in_notion)} 条，"
+                           f"状态中缺失 {len(missing_in_state)} 条，页面ID不一致 {len(page_mismatch)} 条，将以Notion为准重建状态")
+            logger.debug(f"Notion中已不存在: {missing_in_notion}")
+            logger.debug(f"状态中缺失: {missing_in_state}")
+            logger.debug(f"页面ID不一致: {page_mismatch}")
+    
+    def _commit_state(self,
+                      synced_items: Dict[int, Tuple[Fingerprint, str]],
+                      notion_data: Dict[int, NotionRecord],
+                      full_scan: bool,
+                      results: List[OperationResult],
+                      subject_types: Optional[str] = None) -> None:
+        """根据本次同步结果更新本地状态
+
+        Args:
+            synced_items: 本次同步的记录，key为subject_id，value为(指纹, 标题)
+            notion_data: 本次对比使用的Notion索引
+            full_scan: 索引是否来自Notion全量扫描
+            results: 写入操作结果
+            subject_types: 全量扫描对应的条目类型集合，默认为本次配置的类型
+        """
+        if self.state_store is None:
+            return
+        
+        if full_scan:
+            # 保留页面的类型，之后使用状态同步时范围外的页面仍不会被删除
+            entries = {
+                subject_id: StateEntry(subject_id, None, item.page_id, self._notion_title(item),
+                                       field_hashes=self._type_hashes(item))
+                for subject_id, item in notion_data.items()
+            }
+        else:
+            entries = self.state_store.load()
+        
+        # 没有写入操作的记录说明已与Notion一致，归档重复页面不影响保留的页面
+        written = {result.subject_id for result in results if result.action != "archive"}
+        for subject_id, (item_fingerprint, title) in synced_items.items():
+            entry = entries.get(subject_id)
+            if entry is None and subject_id in notion_data:
+                # 索引之外按Bangumi链接查到的页面
+                entry = StateEntry(subject_id, None, notion_data[subject_id].page_id, title)
+                entries[subject_id] = entry
+            if entry is not None and subject_id not in written:
+                entry.content_hash = item_fingerprint.digest
+                entry.field_hashes = item_fingerprint.field_hashes
+                entry.title = title
+        
+        failed = False
+        for result in results:
+            subject_id = result.subject_id
+            if not result.success:
+                failed = True
+                if result.action == "update" and subject_id in entries:
+                    entries[subject_id].content_hash = None
+                    entries[subject_id].field_hashes = None
+                continue
+            
+            if result.action == "archive":
+                continue
+            if result.action == "delete":
+                entries.pop(subject_id, None)
+                continue
+            
+            item_fingerprint, title = synced_items[subject_id]
+            if result.action == "add":
+                page_id = (result.response or {}).get("id")
+            else:
+                page_id = entries[subject_id].page_id
+            entries[subject_id] = StateEntry(subject_id, item_fingerprint.digest, page_id, title,
+                                             field_hashes=item_fingerprint.field_hashes)
+        
+        self.state_store.replace_all(entries.values())
+        if full_scan:
+            self.state_store.set_meta(StateConstants.META_LAST_FULL_SYNC, datetime.now().isoformat())
+            self.state_store.set_meta(StateConstants.META_SUBJECT_TYPES, subject_types or self._subject_types_key())
+        # 分页数据不一致时本次没有处理删除，下次同步需要完整获取Bangumi数据后对账
+        self.state_store.set_meta(StateConstants.META_NEEDS_FULL_RESYNC,
+                                  "1" if failed or self.inconsistent_types else None)
+        logger.info(f"本地状态已更新，共 {len(entries)} 条记录")
+    
+    @staticmethod
+    def _type_hashes(notion_item: NotionRecord) -> Optional[Dict[str, str]]:
+        """返回只包含页面条目类型的字段哈希，页面没有类型时返回None"""
+        label = (notion_item.enriched or {}).get(FingerprintConstants.TYPE_FIELD)
+        if label is None:
+            return None
+        return {FingerprintConstants.TYPE_FIELD: fingerprint.field_hash(label)}
+    
+    @staticmethod
+    def _bangumi_title(bangumi_item: Dict[str, Any]) -> str:
+        """返回同步到Notion的标题，优先使用中文标题"""
+        return bangumi_item.get("title_cn") or bangumi_item.get("title")
+    
+    @staticmethod
+    def _notion_title(notion_item: NotionRecord) -> str:
+        """返回Notion记录的标题"""
+        return notion_item.title or "未知标题"
     
     def compare_data(self,
                     bangumi_data: Dict[int, Dict[str, Any]],
-                    notion_data: Dict[int, Dict[str, Any]]) -> Dict[str, List[Any]]:
+                    notion_data: Dict[int, NotionRecord],
+                    partial: bool = False,
+                    fingerprints: Optional[Dict[int, Fingerprint]] = None) -> Dict[str, List[Any]]:
         """对比数据，生成操作列表
 
         Args:
             bangumi_data: Bangumi追番记录字典
             notion_data: Notion现有记录字典
+            partial: bangumi_data是否只包含部分记录（增量获取），此时无法判断删除
+            fingerprints: 预先计算的Bangumi记录指纹，key为subject_id
 
         Returns:
             操作列表，包含add、update、delete三个字段
@@ -119,241 +1311,438 @@ class SyncManager:
             "delete": []    # Notion有但Bangumi没有的记录
         }
         
-        # 找出需要添加的记录
+        # 找出需要添加和更新的记录
+        if fingerprints is None:
+            fingerprints = {subject_id: self._bangumi_fingerprint(item) for subject_id, item in bangumi_data.items()}
         for subject_id, bangumi_item in bangumi_data.items():
-            if subject_id not in notion_data:
-                operations["add"].append(bangumi_item)
-                title = bangumi_item.get("title_cn") or bangumi_item.get("title")
-                logger.debug(f"需要添加: {title} (ID: {subject_id})")
+            self._diff_item(bangumi_item, fingerprints[subject_id], notion_data, operations)
         
-        # 找出需要更新的记录
-        for subject_id, bangumi_item in bangumi_data.items():
-            if subject_id in notion_data:
-                notion_item = notion_data[subject_id]
-                if self._need_update(bangumi_item, notion_item):
-                    operations["update"].append({
-                        "bangumi_item": bangumi_item,
-                        "notion_item": notion_item
-                    })
-                    title = bangumi_item.get("title_cn") or bangumi_item.get("title")
-                    logger.debug(f"需要更新: {title} (ID: {subject_id})")
-        
-        # 找出需要删除的记录（仅当enable_delete为True时）
-        if self.config.enable_delete:
-            for subject_id, notion_item in notion_data.items():
-                if subject_id not in bangumi_data:
-                    operations["delete"].append(notion_item)
-                    notion_props = notion_item.get("properties", {})
-                    title = notion_props.get("标题", {}).get("title", [{}])[0].get("text", {}).get("content", "未知标题")
-                    logger.debug(f"需要删除: {title} (ID: {subject_id})")
+        # 找出需要删除的记录（仅当enable_delete为True且Bangumi数据完整时）
+        reason = self._skip_deletes_reason(partial)
+        if reason is None:
+            operations["delete"] = self._find_deletes(bangumi_data.keys(), notion_data)
         else:
-            logger.info("已禁用删除操作，跳过删除逻辑")
+            logger.info(f"{reason}，跳过删除逻辑")
         
         logger.info(f"数据对比完成: 需要添加 {len(operations['add'])} 条记录，更新 {len(operations['update'])} 条记录，删除 {len(operations['delete'])} 条记录")
         return operations
     
-    def _need_update(self, bangumi_item: Dict[str, Any], notion_item: Dict[str, Any]) -> bool:
-        """判断记录是否需要更新
+    def _diff_item(self,
+                   bangumi_item: Dict[str, Any],
+                   bangumi_fingerprint: Fingerprint,
+                   notion_data: Dict[int, NotionRecord],
+                   operations: Dict[str, List[Any]]) -> None:
+        """对比单条Bangumi记录，将需要的添加或更新操作追加到操作列表
 
         Args:
             bangumi_item: Bangumi追番记录
-            notion_item: Notion现有记录
+            bangumi_fingerprint: Bangumi记录的指纹
+            notion_data: Notion现有记录字典
+            operations: 操作列表
+        """
+        subject_id = bangumi_item.get("subject_id")
+        title = bangumi_item.get("title_cn") or bangumi_item.get("title")
+        notion_item = notion_data.get(subject_id)
+        
+        if notion_item is None:
+            operations["add"].append(bangumi_item)
+            logger.debug(f"需要添加: {title} (ID: {subject_id})")
+            return
+        
+        changed_fields = self._changed_fields(bangumi_fingerprint, notion_item)
+        if changed_fields:
+            operations["update"].append({
+                "bangumi_item": bangumi_item,
+                "notion_item": notion_item,
+                "changed_fields": changed_fields
+            })
+            logger.debug(f"需要更新: {title} (ID: {subject_id})，变化字段: {', '.join(changed_fields)}")
+    
+    def _find_deletes(self, synced_ids, notion_data: Dict[int, NotionRecord]) -> List[Dict[str, Any]]:
+        """找出Notion中存在但Bangumi中已不存在的记录
+
+        Args:
+            synced_ids: 本次同步的Bangumi subject_id集合
+            notion_data: Notion现有记录字典
 
         Returns:
-            是否需要更新
-        """
-        notion_props = notion_item.get("properties", {})
-
-        return (self._title_changed(bangumi_item, notion_props) or
-                self._score_changed(bangumi_item, notion_props) or
-                self._status_changed(bangumi_item, notion_props) or
-                self._air_status_changed(bangumi_item, notion_props) or
-                self._ep_status_changed(bangumi_item, notion_props) or
-                self._total_episodes_changed(bangumi_item, notion_props) or
-                self._cover_changed(bangumi_item, notion_item))
-
-    def _title_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查标题是否变化"""
-        notion_title = notion_props.get("标题", {}).get("title", [{}])[0].get("text", {}).get("content", "")
-        if bangumi_item.get("title_cn") != notion_title and bangumi_item.get("title") != notion_title:
-            logger.debug(f"标题变更: Bangumi='{bangumi_item.get('title_cn') or bangumi_item.get('title')}', Notion='{notion_title}'")
+            需要删除的记录列表，每项包含subject_id和notion_item
+        """
+        delete_items = []
+        for subject_id, notion_item in notion_data.items():
+            if subject_id not in synced_ids and self._matches_sync_status(notion_item) \
+                    and self._matches_subject_type(notion_item):
+                delete_items.append({
+                    "subject_id": subject_id,
+                    "notion_item": notion_item
+                })
+                logger.debug(f"需要删除: {self._notion_title(notion_item)} (ID: {subject_id})")
+        return delete_items
+    
+    def _matches_sync_status(self, notion_item: NotionRecord) -> bool:
+        """判断Notion记录的观看状态是否在本次同步范围内，范围外的记录不做删除"""
+        label = self._sync_status_label()
+        if label is None:
             return True
-        return False
-
-    def _score_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查评分是否变化"""
-        notion_score = notion_props.get("评分", {}).get("number", 0)
-        if bangumi_item.get("score") != notion_score:
-            logger.debug(f"评分变更: Bangumi={bangumi_item.get('score')}, Notion={notion_score}")
+        if notion_item.fingerprint is None:
+            return notion_item.status == label
+        field_hashes = notion_item.fingerprint.field_hashes
+        if not field_hashes or "status" not in field_hashes:
             return True
-        return False
+        return field_hashes["status"] == fingerprint.field_hash(label)
+    
+    def _matches_subject_type(self, notion_item: NotionRecord) -> bool:
+        """判断Notion记录的条目类型是否在本次同步范围内，范围外的记录不做删除
 
-    def _status_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查观看状态是否变化"""
-        notion_status = notion_props.get("观看状态", {}).get("select", {}).get("name", "")
-        mapped_status = NotionConstants.WATCHING_STATUS_MAP.get(bangumi_item.get("status"), "未知")
-        if mapped_status != notion_status:
-            logger.debug(f"观看状态变更: Bangumi='{mapped_status}', Notion='{notion_status}'")
+        页面没有类型时视为在范围内，只同步一种类型时同样按类型判断。
+        """
+        labels = [NotionConstants.SUBJECT_TYPE_MAP[subject_type] for subject_type in self.config.subject_types]
+        if notion_item.fingerprint is None:
+            label = (notion_item.enriched or {}).get(FingerprintConstants.TYPE_FIELD)
+            return label is None or label in labels
+        field_hashes = notion_item.fingerprint.field_hashes or {}
+        if FingerprintConstants.TYPE_FIELD not in field_hashes:
             return True
-        return False
+        return field_hashes[FingerprintConstants.TYPE_FIELD] in {fingerprint.field_hash(label) for label in labels}
+    
+    def _changed_fields(self, bangumi_fingerprint: Fingerprint, notion_item: NotionRecord) -> List[str]:
+        """找出Bangumi记录相对Notion记录变化的字段
 
-    def _air_status_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查播出状态是否变化"""
-        notion_air_status = notion_props.get("播出状态", {}).get("select", {}).get("name", "")
-        mapped_air_status = NotionConstants.AIR_STATUS_MAP.get(bangumi_item.get("air_status"), "未知")
-        if mapped_air_status != notion_air_status:
-            logger.debug(f"播出状态变更: Bangumi='{mapped_air_status}', Notion='{notion_air_status}'")
-            return True
-        return False
+        先比较整体指纹，一致时直接返回；不一致时再按字段哈希找出变化的字段。
 
-    def _ep_status_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查已观看集数是否变化"""
-        notion_ep_status = notion_props.get("已观看集数", {}).get("number", 0)
-        if bangumi_item.get("ep_status") != notion_ep_status:
-            logger.debug(f"已观看集数变更: Bangumi={bangumi_item.get('ep_status')}, Notion={notion_ep_status}")
-            return True
-        return False
+        Args:
+            bangumi_fingerprint: Bangumi记录的指纹
+            notion_item: Notion现有记录
 
-    def _total_episodes_changed(self, bangumi_item: Dict[str, Any], notion_props: Dict[str, Any]) -> bool:
-        """检查总集数是否变化"""
-        notion_total_episodes = notion_props.get("总集数", {}).get("number", 0)
-        if bangumi_item.get("total_episodes") != notion_total_episodes:
-            logger.debug(f"总集数变更: Bangumi={bangumi_item.get('total_episodes')}, Notion={notion_total_episodes}")
-            return True
-        return False
+        Returns:
+            变化的字段名列表，为空表示无需更新
+        """
+        notion_fingerprint = self._notion_fingerprint(notion_item)
+        changed = fingerprint.changed_fields(bangumi_fingerprint, notion_fingerprint)
+        
+        if changed and notion_fingerprint.field_hashes is None:
+            # Notion隐藏属性中的指纹不一致，按页面实际字段确定变化
+            page_fingerprint = fingerprint.compute(notion_item.fields())
+            changed = fingerprint.changed_fields(bangumi_fingerprint, page_fingerprint)
+            if not changed:
+                changed = [FingerprintConstants.FINGERPRINT_FIELD]
+        
+        if changed:
+            logger.debug(f"字段变更: {', '.join(changed)}")
+        return changed
+    
+    def _notion_fingerprint(self, notion_item: NotionRecord) -> Fingerprint:
+        """计算Notion记录的指纹
 
-    def _cover_changed(self, bangumi_item: Dict[str, Any], notion_item: Dict[str, Any]) -> bool:
-        """检查封面是否变化"""
-        notion_cover = notion_item.get("cover", {}).get("external", {}).get("url", "")
-        if bangumi_item.get("cover") != notion_cover:
-            logger.debug(f"封面变更: Bangumi='{bangumi_item.get('cover')}', Notion='{notion_cover}'")
-            return True
-        return False
+        本地状态记录直接使用保存的指纹；Notion页面优先使用隐藏属性中的指纹，
+        没有时按页面字段计算。
+        """
+        if notion_item.fingerprint is not None:
+            return notion_item.fingerprint
+        
+        if notion_item.stored_digest:
+            return Fingerprint(notion_item.stored_digest)
+        return fingerprint.compute(notion_item.fields())
     
-    def execute_sync(self, operations: Dict[str, List[Any]]) -> None:
+    def _bangumi_fingerprint(self, bangumi_item: Dict[str, Any]) -> Fingerprint:
+        """计算Bangumi记录的指纹"""
+        return fingerprint.compute(fingerprint.bangumi_fields(bangumi_item))
+    
+    def execute_sync(self, operations: Dict[str, List[Any]]) -> List[OperationResult]:
         """执行同步操作
 
         Args:
             operations: 操作列表
+
+        Returns:
+            按执行顺序排列的每项操作结果
         """
-        add_items = operations.get("add", [])
-        update_items = operations.get("update", [])
-        delete_items = operations.get("delete", [])
+        return self._execute_plan(self._plan_operations(operations))
 
-        total_operations = len(add_items) + len(update_items) + len(delete_items)
-        logger.info(f"开始执行同步操作，共 {total_operations} 项任务")
+    def _plan_operations(self, operations: Dict[str, List[Any]]) -> List[JournalOperation]:
+        """将操作列表转换为按执行顺序编号的写入操作，依次为添加、更新、删除"""
+        plan = [self._add_operation(bangumi_item) for bangumi_item in operations.get("add", [])]
+        plan.extend(self._update_operation(item) for item in operations.get("update", []))
+        plan.extend(self._delete_operation(item) for item in operations.get("delete", []))
+        for seq, operation in enumerate(plan, 1):
+            operation.seq = seq
+        return plan
 
-        self._execute_add_operations(add_items, total_operations)
-        self._execute_update_operations(update_items, add_items, total_operations)
-        self._execute_delete_operations(delete_items, add_items, update_items, total_operations)
+    def _execute_plan(self, plan: List[JournalOperation],
+                      journal: Optional[SyncJournal] = None) -> List[OperationResult]:
+        """并发执行写入操作
 
-        logger.info(f"同步操作完成，共执行 {total_operations} 项任务")
+        Args:
+            plan: 写入操作
+            journal: 同步计划日志，每项操作完成后记录结果
 
-    def _execute_add_operations(self, add_items: List[Dict[str, Any]], total_operations: int) -> None:
-        """执行添加操作"""
-        for i, bangumi_item in enumerate(add_items, 1):
-            title = bangumi_item.get("title_cn") or bangumi_item.get("title")
-            logger.info(f"[{i}/{total_operations}] 添加记录: {title}")
-            page_data = self.map_bangumi_to_notion(bangumi_item)
-            self.notion_client.create_page(page_data)
-
-    def _execute_update_operations(self, update_items: List[Dict[str, Any]],
-                                 add_items: List[Dict[str, Any]], total_operations: int) -> None:
-        """执行更新操作"""
-        for i, item in enumerate(update_items, len(add_items) + 1):
-            bangumi_item = item["bangumi_item"]
-            notion_item = item["notion_item"]
-            title = bangumi_item.get("title_cn") or bangumi_item.get("title")
-            logger.info(f"[{i}/{total_operations}] 更新记录: {title}")
-            page_data = self.map_bangumi_to_notion(bangumi_item)
-            self.notion_client.update_page(notion_item.get("id"), page_data)
-
-    def _execute_delete_operations(self, delete_items: List[Dict[str, Any]],
-                                  add_items: List[Dict[str, Any]],
-                                  update_items: List[Dict[str, Any]], total_operations: int) -> None:
-        """执行删除操作"""
-        for i, notion_item in enumerate(delete_items, len(add_items) + len(update_items) + 1):
-            notion_props = notion_item.get("properties", {})
-            title = notion_props.get("标题", {}).get("title", [{}])[0].get("text", {}).get("content", "未知标题")
-            logger.info(f"[{i}/{total_operations}] 删除记录: {title}")
-            self.notion_client.update_page(notion_item.get("id"), {"archived": True})
-    
-    def map_bangumi_to_notion(self, bangumi_item: Dict[str, Any]) -> Dict[str, Any]:
+        Returns:
+            按执行顺序排列的每项操作结果
+        """
+        total_operations = len(plan)
+        logger.info(f"开始执行同步操作，共 {total_operations} 项任务，并发数: {self.config.notion_max_workers}")
+
+        with WriteExecutor(max_workers=self.config.notion_max_workers, total=total_operations) as executor:
+            for operation in plan:
+                if journal is None:
+                    self._submit_operation(executor, operation)
+                else:
+                    executor.submit(operation.action, operation.title, self._run_journaled, operation, journal,
+                                    subject_id=operation.subject_id)
+            results = executor.wait()
+
+        failed = [result for result in results if not result.success]
+        logger.info(f"同步操作完成，共执行 {total_operations} 项任务，成功 {total_operations - len(failed)} 项，失败 {len(failed)} 项")
+        return results
+
+    def _run_journaled(self, operation: JournalOperation, journal: SyncJournal) -> Dict[str, Any]:
+        """执行单项写入操作并在同步计划日志中记录结果"""
+        try:
+            if operation.action == "add":
+                response = self.notion_client.create_page(operation.page_data)
+            else:
+                response = self.notion_client.update_page(operation.page_id, operation.page_data)
+        except Exception as e:
+            journal.fail(operation.seq, str(e))
+            raise
+        journal.complete(operation.seq, (response or {}).get("id") or operation.page_id)
+        return response
+
+    def _submit_operation(self, executor, operation: JournalOperation) -> None:
+        """提交单项写入操作，executor为WriteExecutor或AsyncWriteExecutor"""
+        if operation.action == "add":
+            executor.submit("add", operation.title, self.notion_client.create_page, operation.page_data,
+                            subject_id=operation.subject_id)
+        else:
+            executor.submit(operation.action, operation.title, self.notion_client.update_page,
+                            operation.page_id, operation.page_data, subject_id=operation.subject_id)
+
+    def _add_operation(self, bangumi_item: Dict[str, Any]) -> JournalOperation:
+        """生成添加操作"""
+        return JournalOperation(0, "add", bangumi_item.get("subject_id"), self._bangumi_title(bangumi_item),
+                                None, self.map_bangumi_to_notion(bangumi_item))
+
+    def _update_operation(self, item: Dict[str, Any]) -> JournalOperation:
+        """生成只包含变化属性的更新操作"""
+        bangumi_item = item["bangumi_item"]
+        return JournalOperation(0, "update", bangumi_item.get("subject_id"), self._bangumi_title(bangumi_item),
+                                item["notion_item"].page_id,
+                                self.map_bangumi_to_notion(bangumi_item, item["changed_fields"]))
+
+    def _delete_operation(self, item: Dict[str, Any]) -> JournalOperation:
+        """生成删除（归档）操作"""
+        notion_item = item["notion_item"]
+        return JournalOperation(0, "delete", item["subject_id"], self._notion_title(notion_item),
+                                notion_item.page_id, {"archived": True})
+
+    def _execute_add_operations(self, executor: WriteExecutor, add_items: List[Dict[str, Any]]) -> None:
+        """提交添加操作"""
+        for bangumi_item in add_items:
+            self._submit_operation(executor, self._add_operation(bangumi_item))
+
+    def _execute_update_operations(self, executor: WriteExecutor, update_items: List[Dict[str, Any]]) -> None:
+        """提交更新操作"""
+        for item in update_items:
+            self._submit_operation(executor, self._update_operation(item))
+
+    def _execute_delete_operations(self, executor: WriteExecutor, delete_items: List[Dict[str, Any]]) -> None:
+        """提交删除（归档）操作"""
+        for item in delete_items:
+            self._submit_operation(executor, self._delete_operation(item))
+
+    def _duplicate_count(self) -> int:
+        """本次同步发现的多余页面数"""
+        return sum(len(records) for records in self.duplicates.values())
+
+    def _report_duplicates(self) -> None:
+        """列出本次同步发现的重复页面"""
+        if not self.duplicates:
+            return
+        logger.warning(f"发现 {len(self.duplicates)} 个条目存在重复页面，共 {self._duplicate_count()} 个多余页面:")
+        for subject_id, records in self.duplicates.items():
+            logger.warning(f"  - {self._notion_title(records[0])} (ID: {subject_id})，"
+                           f"多余页面: {', '.join(record.page_id for record in records)}")
+        if not self.config.archive_duplicates:
+            logger.warning("未启用ARCHIVE_DUPLICATES，多余页面不会被归档，也不会再被同步")
+
+    def _submit_duplicate_archives(self, executor) -> None:
+        """启用ARCHIVE_DUPLICATES时提交多余页面的归档操作，executor为WriteExecutor或AsyncWriteExecutor"""
+        if not self.config.archive_duplicates:
+            return
+        for subject_id, records in self.duplicates.items():
+            for record in records:
+                executor.submit("archive", self._notion_title(record), self.notion_client.update_page,
+                                record.page_id, {"archived": True}, subject_id=subject_id)
+
+    def _archive_duplicates(self) -> List[OperationResult]:
+        """启用ARCHIVE_DUPLICATES时并发归档所有多余页面
+
+        Returns:
+            归档操作的结果，未启用或没有重复页面时为空列表
+        """
+        if not self.config.archive_duplicates or not self.duplicates:
+            return []
+        logger.info(f"开始归档 {self._duplicate_count()} 个多余页面，并发数: {self.config.notion_max_workers}")
+        with WriteExecutor(max_workers=self.config.notion_max_workers, total=self._duplicate_count()) as executor:
+            self._submit_duplicate_archives(executor)
+            return executor.wait()
+
+    def map_bangumi_to_notion(self, bangumi_item: Dict[str, Any],
+                              fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """将Bangumi数据映射为Notion格式
 
         Args:
             bangumi_item: Bangumi追番记录
+            fields: 需要写入的字段，用于生成只包含变化属性的部分更新数据；为None时生成完整页面数据
 
         Returns:
             Notion页面数据
         """
-        # 使用中文标题，如果没有则使用日文标题
-        title = bangumi_item.get("title_cn") or bangumi_item.get("title")
+        properties = self._map_properties(bangumi_item)
+        partial = fields is not None
         
-        # 构建Notion页面数据
-        page_data = {
-            "cover": {
+        page_data = {"properties": {}}
+        for field, (property_name, value) in properties.items():
+            if partial and field not in fields:
+                continue
+            if value is None:
+                # 日期为空时创建页面不写入该属性，部分更新时显式清空
+                if partial:
+                    page_data["properties"][property_name] = {"date": None}
+                continue
+            page_data["properties"][property_name] = value
+        
+        if not partial or "cover" in fields:
+            page_data["cover"] = {
                 "external": {
                     "url": bangumi_item.get("cover", "")
                 }
-            } if bangumi_item.get("cover") else None,
-            "properties": {
-                "标题": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": title
-                            }
+            } if bangumi_item.get("cover") else None
+        
+        # 只有同步字段发生变化时才刷新最后更新时间
+        if not partial or any(field != FingerprintConstants.FINGERPRINT_FIELD for field in fields):
+            page_data["properties"]["最后更新时间"] = {
+                "date": {
+                    "start": datetime.now().isoformat()
+                }
+            }
+        
+        # 写入同步指纹，下次对比时只需比较一次哈希
+        if self.config.notion_fingerprint_property:
+            page_data["properties"][self.config.notion_fingerprint_property] = {
+                "rich_text": [
+                    {
+                        "text": {
+                            "content": self._bangumi_fingerprint(bangumi_item).digest
                         }
-                    ]
-                },
-                "评分": {
-                    "number": bangumi_item.get("score", 0)
-                },
-                "观看状态": {
-                    "select": {
-                        "name": NotionConstants.WATCHING_STATUS_MAP.get(bangumi_item.get("status"), "未知")
                     }
-                },
-                "播出状态": {
-                    "select": {
-                        "name": NotionConstants.AIR_STATUS_MAP.get(bangumi_item.get("air_status"), "未知")
-                    }
-                },
-                "已观看集数": {
-                    "number": bangumi_item.get("ep_status", 0)
-                },
-                "总集数": {
-                    "number": bangumi_item.get("total_episodes", 0)
-                },
-                "Bangumi链接": {
-                    "url": bangumi_item.get("bangumi_url", "")
-                },
-                "最后更新时间": {
-                    "date": {
-                        "start": datetime.now().isoformat()
-                    }
-                }
+                ]
             }
-        }
         
-        # 添加开播日期
-        if bangumi_item.get("air_date"):
-            page_data["properties"]["开播日期"] = {
+        return page_data
+    
+    def _map_properties(self, bangumi_item: Dict[str, Any]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        """构建各同步字段对应的Notion属性
+
+        Args:
+            bangumi_item: Bangumi追番记录
+
+        Returns:
+            key为指纹字段名，value为(Notion属性名, 属性值)，属性值为None表示该日期为空
+        """
+        # 使用中文标题，如果没有则使用日文标题
+        title = bangumi_item.get("title_cn") or bangumi_item.get("title")
+        
+        properties = {
+            "title": ("标题", {
+                "title": [
+                    {
+                        "text": {
+                            "content": title
+                        }
+                    }
+                ]
+            }),
+            "score": ("评分", {
+                "number": bangumi_item.get("score", 0)
+            }),
+            "status": ("观看状态", {
+                "select": {
+                    "name": NotionConstants.WATCHING_STATUS_MAP.get(bangumi_item.get("status"), "未知")
+                }
+            }),
+            "air_status": ("播出状态", {
+                "select": {
+                    "name": NotionConstants.AIR_STATUS_MAP.get(bangumi_item.get("air_status"), "未知")
+                }
+            }),
+            "ep_status": ("已观看集数", {
+                "number": bangumi_item.get("ep_status", 0)
+            }),
+            "total_episodes": ("总集数", {
+                "number": bangumi_item.get("total_episodes", 0)
+            }),
+            "bangumi_url": ("Bangumi链接", {
+                "url": bangumi_item.get("bangumi_url", "")
+            }),
+            "air_date": ("开播日期", {
                 "date": {
                     "start": bangumi_item.get("air_date")
                 }
-            }
-        
-        # 添加完结日期
-        if bangumi_item.get("end_date"):
-            page_data["properties"]["完结日期"] = {
+            } if bangumi_item.get("air_date") else None),
+            "end_date": ("完结日期", {
                 "date": {
                     "start": bangumi_item.get("end_date")
                 }
-            }
-        
-        return page_data
+            } if bangumi_item.get("end_date") else None)
+        }
+        properties.update(self._map_enriched_properties(bangumi_item))
+        properties.update(self._map_episode_properties(bangumi_item))
+        if FingerprintConstants.TYPE_FIELD in bangumi_item:
+            properties[FingerprintConstants.TYPE_FIELD] = (NotionConstants.TYPE_PROPERTY, {
+                "select": {
+                    "name": NotionConstants.SUBJECT_TYPE_MAP.get(bangumi_item[FingerprintConstants.TYPE_FIELD], "未知")
+                }
+            })
+        return properties
+    
+    @staticmethod
+    def _rich_text(value: Optional[str]) -> Dict[str, Any]:
+        """构建rich_text属性值，超过长度上限的部分截断"""
+        if not value:
+            return {"rich_text": []}
+        return {"rich_text": [{"text": {"content": value[:NotionConstants.MAX_TEXT_LENGTH]}}]}
+    
+    def _map_enriched_properties(self, bangumi_item: Dict[str, Any]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        """构建条目详情补充字段对应的Notion属性，记录未经过补充时返回空字典"""
+        names = NotionConstants.ENRICHED_PROPERTIES
+        properties = {}
+        if "tags" in bangumi_item:
+            properties["tags"] = (names["tags"], {
+                "multi_select": [{"name": tag} for tag in bangumi_item["tags"] or []]
+            })
+        if "studio" in bangumi_item:
+            properties["studio"] = (names["studio"], self._rich_text(bangumi_item["studio"]))
+        if "rating_count" in bangumi_item:
+            properties["rating_count"] = (names["rating_count"], {"number": bangumi_item["rating_count"]})
+        if "summary" in bangumi_item:
+            properties["summary"] = (names["summary"], self._rich_text(bangumi_item["summary"]))
+        return properties
+    
+    def _map_episode_properties(self, bangumi_item: Dict[str, Any]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        """构建剧集同步字段对应的Notion属性，记录没有剧集列表时返回空字典"""
+        names = NotionConstants.EPISODE_PROPERTIES
+        properties = {}
+        if "episodes" in bangumi_item:
+            properties["episodes"] = (names["episodes"], self._rich_text(bangumi_item["episodes"]))
+        if "next_episode_date" in bangumi_item:
+            next_episode_date = bangumi_item["next_episode_date"]
+            properties["next_episode_date"] = (names["next_episode_date"], {
+                "date": {
+                    "start": next_episode_date
+                }
+            } if next_episode_date else None)
+        return properties
     
     def _log_operations(self, operations: Dict[str, List[Any]]) -> None:
         """记录操作日志
@@ -374,13 +1763,11 @@ class SyncManager:
         for item in operations.get("update", []):
             bangumi_item = item["bangumi_item"]
             title = bangumi_item.get("title_cn") or bangumi_item.get("title")
-            logger.info(f"  - {title}")
+            logger.info(f"  - {title} ({', '.join(item.get('changed_fields', []))})")
         
         # 日志删除操作
         logger.info(f"\n需要删除 {len(operations.get('delete', []))} 条记录:")
-        for notion_item in operations.get("delete", []):
-            notion_props = notion_item.get("properties", {})
-            title = notion_props.get("标题", {}).get("title", [{}])[0].get("text", {}).get("content", "未知标题")
-            logger.info(f"  - {title}")
+        for item in operations.get("delete", []):
+            logger.info(f"  - {self._notion_title(item['notion_item'])}")
         
         logger.info("\n=== 模拟运行结束 ===")
@@ -0,0 +1,272 @@
+"""多目标同步模块
+
+在同一进程中同步多个 (Bangumi用户, Notion数据库, 令牌) 目标：
+所有目标共享同一个Bangumi客户端，同一令牌的目标共享Notion客户端和令牌桶。
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from bangumi_client import AsyncBangumiClient, BangumiClient
+from config import Config
+from notion_service import AsyncNotionService, NotionService
+from state_store import StateStore
+from subject_cache import SubjectCache
+from episode_cache import EpisodeCache
+from http_cache import HttpCache
+from metrics import get_metrics
+from sync_journal import SyncJournal
+from sync_manager import SyncManager
+
+logger = logging.getLogger(__name__)
+
+
+class TargetResult:
+    """单个目标的同步结果"""
+
+    def __init__(self, name: str):
+        """初始化目标结果
+
+        Args:
+            name: 目标名称
+        """
+        self.name = name
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Exception] = None
+        self.elapsed = 0.0
+
+    @property
+    def success(self) -> bool:
+        """同步是否完成且没有失败操作"""
+        return self.error is None and self.result is not None and not self.result["failed_count"]
+
+    def __repr__(self) -> str:
+        state = "成功" if self.success else f"失败: {self.error or self.result['failed_count']}"
+        return f"TargetResult({self.name}, {state})"
+
+
+class TargetRunner:
+    """多目标同步执行器
+
+    目标按配置顺序进入有界线程池，最多同时同步max_parallel_targets个目标。
+    每个目标的Notion写入并发数固定为notion_max_workers，而令牌桶按请求到达顺序放行，
+    因此共享同一令牌的目标按相同比例获得请求配额，大型数据库不会饿死其他目标。
+    """
+
+    def __init__(self, config: Config, targets: List[Config], persistent: bool = False):
+        """初始化执行器
+
+        Args:
+            config: 全局配置，提供Bangumi客户端和并发相关设置
+            targets: 每个目标的配置
+            persistent: 是否在多次run之间保持各目标的本地状态和同步计划日志打开（常驻同步），
+                需要在结束时调用close
+        """
+        self.config = config
+        self.targets = targets
+        self.persistent = persistent
+        self.bangumi_client = None
+        self.subject_cache: Optional[SubjectCache] = None
+        self.episode_cache: Optional[EpisodeCache] = None
+        self.http_cache: Optional[HttpCache] = None
+        self._notion_services: Dict[str, NotionService] = {}
+        self._stores: Dict[str, Tuple[Optional[StateStore], Optional[SyncJournal]]] = {}
+
+    def _create_bangumi_client(self, client_class: type = BangumiClient) -> BangumiClient:
+        """创建所有目标共享的Bangumi客户端和HTTP响应缓存"""
+        if self.http_cache is None and self.config.enable_http_cache:
+            self.http_cache = HttpCache(self.config.http_cache_file, {
+                "collections": self.config.http_cache_collections_ttl,
+                "subjects": self.config.http_cache_subjects_ttl
+            })
+        # 所有目标共享同一个客户端，连接池按同时同步的目标数和条目类型数放大
+        max_types = max(len(target.subject_types) for target in self.targets)
+        pool_size = self.config.bangumi_pool_size or \
+            self.config.bangumi_max_workers * self.config.max_parallel_targets * max_types
+        return client_class(requests_per_second=self.config.bangumi_rate_limit,
+                            page_size=self.config.bangumi_page_size,
+                            max_workers=self.config.bangumi_max_workers,
+                            http_cache=self.http_cache,
+                            pool_size=pool_size,
+                            http2=self.config.enable_http2,
+                            keepalive_expiry=self.config.http_keepalive_expiry)
+
+    def _open_subject_cache(self) -> Optional[SubjectCache]:
+        """任一目标启用详情补充时打开所有目标共享的条目详情缓存"""
+        if self.subject_cache is None and any(target.enable_enrich for target in self.targets):
+            self.subject_cache = SubjectCache(self.config.subject_cache_file,
+                                              self.config.subject_cache_finished_ttl_days,
+                                              self.config.subject_cache_airing_ttl_hours)
+        return self.subject_cache
+
+    def _open_episode_cache(self) -> Optional[EpisodeCache]:
+        """任一目标启用剧集同步时打开所有目标共享的剧集列表缓存"""
+        if self.episode_cache is None and any(target.enable_episodes for target in self.targets):
+            self.episode_cache = EpisodeCache(self.config.episode_cache_file)
+        return self.episode_cache
+
+    def notion_service(self, target: Config, service_class: type = NotionService) -> NotionService:
+        """返回目标使用的NotionService，同一令牌只创建一个客户端"""
+        base = self._notion_services.get(target.notion_token)
+        if base is None:
+            pool_size = self.config.notion_pool_size or self.config.notion_max_workers * self.config.max_parallel_targets
+            base = service_class(target.notion_token, target.notion_database_id,
+                                 requests_per_second=self.config.notion_rate_limit,
+                                 pool_size=pool_size,
+                                 http2=self.config.enable_http2,
+                                 keepalive_expiry=self.config.http_keepalive_expiry)
+            self._notion_services[target.notion_token] = base
+        return base.with_database(target.notion_database_id, target.notion_fingerprint_property)
+
+    def log_pool_stats(self) -> None:
+        """输出共享客户端的连接池统计"""
+        if self.bangumi_client is not None:
+            logger.info(f"Bangumi连接池: {self.bangumi_client.pool_stats().summary()}")
+        for index, service in enumerate(self._notion_services.values(), 1):
+            logger.info(f"Notion连接池#{index}: {service.pool_stats().summary()}")
+
+    def _open_stores(self, target: Config) -> Tuple[Optional[StateStore], Optional[SyncJournal]]:
+        """打开目标的本地状态和同步计划日志，常驻同步时复用已打开的"""
+        stores = self._stores.get(target.target_name)
+        if stores is None:
+            state_store = journal = None
+            try:
+                state_store = StateStore(target.state_file) if target.enable_state else None
+                journal = SyncJournal(target.journal_file) if target.enable_journal else None
+            except Exception:
+                if state_store is not None:
+                    state_store.close()
+                raise
+            stores = (state_store, journal)
+            if self.persistent:
+                self._stores[target.target_name] = stores
+        return stores
+
+    def _close_stores(self, stores: Tuple[Optional[StateStore], Optional[SyncJournal]]) -> None:
+        """非常驻同步时关闭目标的本地状态和同步计划日志"""
+        if self.persistent:
+            return
+        for store in stores:
+            if store is not None:
+                store.close()
+
+    def close(self) -> None:
+        """关闭常驻同步期间保持打开的本地状态和同步计划日志"""
+        for stores in self._stores.values():
+            for store in stores:
+                if store is not None:
+                    store.close()
+        self._stores = {}
+
+    def run(self, dry_run: bool = False, stream: bool = False, full_resync: bool = False,
+            resume: bool = False) -> List[TargetResult]:
+        """同步所有目标
+
+        Args:
+            dry_run: 是否为模拟运行
+            stream: 是否使用流式同步
+            full_resync: 是否忽略本地状态缓存
+            resume: 是否继续各目标上次未完成的同步计划
+
+        Returns:
+            按配置顺序排列的目标结果，单个目标失败不影响其他目标
+        """
+        if self.config.sync_engine == "async":
+            return asyncio.run(self.run_async(dry_run=dry_run, full_resync=full_resync))
+        
+        if self.bangumi_client is None:
+            self.bangumi_client = self._create_bangumi_client()
+        self._open_subject_cache()
+        self._open_episode_cache()
+        # 在主线程中创建客户端，避免多个线程为同一令牌重复创建
+        services = {target.target_name: self.notion_service(target) for target in self.targets}
+
+        logger.info(f"开始同步 {len(self.targets)} 个目标，最多同时同步 {self.config.max_parallel_targets} 个")
+        with ThreadPoolExecutor(max_workers=self.config.max_parallel_targets, thread_name_prefix="target") as pool:
+            futures = [
+                pool.submit(self._run_target, target, services[target.target_name], dry_run, stream, full_resync, resume)
+                for target in self.targets
+            ]
+            return [future.result() for future in futures]
+
+    def _run_target(self, target: Config, notion_client: NotionService,
+                    dry_run: bool, stream: bool, full_resync: bool, resume: bool) -> TargetResult:
+        """同步单个目标，异常记录到结果中而不向外抛出"""
+        target_result = TargetResult(target.target_name)
+        started = time.monotonic()
+        logger.info(f"[{target.target_name}] 开始同步: {target.bangumi_username} -> {target.notion_database_id}")
+
+        stores = (None, None)
+        try:
+            stores = self._open_stores(target)
+            state_store, journal = stores
+            sync_manager = SyncManager(self.bangumi_client, notion_client, target, state_store, self.subject_cache,
+                                       journal, self.episode_cache)
+            target_result.result = sync_manager.sync(dry_run=dry_run, stream=stream, full_resync=full_resync,
+                                                     resume=resume)
+            get_metrics().record_sync(target.target_name, target_result.result)
+        except Exception as e:
+            target_result.error = e
+            logger.error(f"[{target.target_name}] 同步失败: {e}")
+        finally:
+            self._close_stores(stores)
+
+        target_result.elapsed = time.monotonic() - started
+        logger.info(f"[{target.target_name}] 同步结束，耗时 {target_result.elapsed:.1f} 秒")
+        return target_result
+
+    async def run_async(self, dry_run: bool = False, full_resync: bool = False) -> List[TargetResult]:
+        """在同一个事件循环中同步所有目标，最多同时同步max_parallel_targets个
+
+        Args:
+            dry_run: 是否为模拟运行
+            full_resync: 是否忽略本地状态缓存
+
+        Returns:
+            按配置顺序排列的目标结果
+        """
+        self.bangumi_client = self._create_bangumi_client(AsyncBangumiClient)
+        self._open_subject_cache()
+        self._open_episode_cache()
+        self._notion_services = {}
+        services = {target.target_name: self.notion_service(target, AsyncNotionService) for target in self.targets}
+        semaphore = asyncio.Semaphore(self.config.max_parallel_targets)
+
+        async def run_target(target: Config) -> TargetResult:
+            async with semaphore:
+                return await self._run_target_async(target, services[target.target_name], dry_run, full_resync)
+
+        logger.info(f"开始同步 {len(self.targets)} 个目标（异步引擎），最多同时同步 {self.config.max_parallel_targets} 个")
+        try:
+            return list(await asyncio.gather(*(run_target(target) for target in self.targets)))
+        finally:
+            await self.bangumi_client.aclose()
+            for service in self._notion_services.values():
+                await service.aclose()
+
+    async def _run_target_async(self, target: Config, notion_client: AsyncNotionService,
+                                dry_run: bool, full_resync: bool) -> TargetResult:
+        """_run_target的异步版本"""
+        target_result = TargetResult(target.target_name)
+        started = time.monotonic()
+        logger.info(f"[{target.target_name}] 开始同步: {target.bangumi_username} -> {target.notion_database_id}")
+
+        stores = (None, None)
+        try:
+            stores = self._open_stores(target)
+            state_store, journal = stores
+            sync_manager = SyncManager(self.bangumi_client, notion_client, target, state_store, self.subject_cache,
+                                       journal, self.episode_cache)
+            target_result.result = await sync_manager.sync_async(dry_run=dry_run, full_resync=full_resync)
+            get_metrics().record_sync(target.target_name, target_result.result)
+        except Exception as e:
+            target_result.error = e
+            logger.error(f"[{target.target_name}] 同步失败: {e}")
+        finally:
+            self._close_stores(stores)
+
+        target_result.elapsed = time.monotonic() - started
+        logger.info(f"[{target.target_name}] 同步结束，耗时 {target_result.elapsed:.1f} 秒")
+        return target_result
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from state_store import StateStore
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    """只包含必需项的配置，本地文件都位于临时目录"""
+    monkeypatch.setenv("BANGUMI_USERNAME", "tester")
+    monkeypatch.setenv("NOTION_TOKEN", "test-token")
+    monkeypatch.setenv("NOTION_DATABASE_ID", "test-database")
+    monkeypatch.setenv("STATE_FILE", str(tmp_path / "state.db"))
+    monkeypatch.setenv("JOURNAL_FILE", str(tmp_path / "journal.db"))
+    return Config()
+
+
+@pytest.fixture
+def state_store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
@@ -0,0 +1,75 @@
+from bangumi_client import CollectionStream, report_consistency
+from notion_service import NotionRecord
+from sync_manager import SyncManager
+
+
+def collection(subject_id):
+    return {"subject": {"id": subject_id, "name": f"条目{subject_id}"}, "collection": {"status": 3}}
+
+
+def response(total, *subject_ids):
+    return {"total": total, "data": [collection(subject_id) for subject_id in subject_ids]}
+
+
+def stream_pages(*pages):
+    """按顺序处理分页，返回(产出的subject_id, 是否一致, 其余分页的offset)"""
+    stream = CollectionStream("tester", 2)
+    parsed, requests = stream.start(pages[0])
+    for page in pages[1:]:
+        parsed.extend(stream.accept(page))
+    offsets = [params["offset"] for _, params in requests]
+    return [item["subject_id"] for item in parsed], stream.finish(), offsets
+
+
+def test_consistent_pages():
+    ids, consistent, offsets = stream_pages(response(5, 1, 2), response(5, 3, 4), response(5, 5))
+    assert ids == [1, 2, 3, 4, 5]
+    assert consistent
+    assert offsets == [2, 4]
+
+
+def test_total_change_is_inconsistent():
+    ids, consistent, _ = stream_pages(response(4, 1, 2), response(5, 3, 4))
+    assert ids == [1, 2, 3, 4]
+    assert not consistent
+
+
+def test_moved_record_is_skipped_and_inconsistent():
+    # 新收藏插入到最前面，第一页的最后一条被挤到第二页，第二页的最后一条因此漏掉
+    ids, consistent, _ = stream_pages(response(4, 1, 2), response(4, 2, 3))
+    assert ids == [1, 2, 3]
+    assert not consistent
+
+
+def test_missing_records_are_inconsistent():
+    ids, consistent, _ = stream_pages(response(4, 1, 2), response(4, 3))
+    assert ids == [1, 2, 3]
+    assert not consistent
+
+
+def test_report_consistency():
+    inconsistent = set()
+    report_consistency(True, "anime", inconsistent)
+    assert inconsistent == set()
+    report_consistency(False, "book", inconsistent)
+    assert inconsistent == {"book"}
+    report_consistency(False, "anime", None)
+
+
+def test_inconsistent_pages_skip_deletes(config):
+    manager = SyncManager(None, None, config)
+    assert manager._skip_deletes_reason(partial=False) is None
+    assert manager._skip_deletes_reason(partial=True) is not None
+
+    manager.inconsistent_types.add("anime")
+    assert manager._skip_deletes_reason(partial=False) == "Bangumi分页数据不一致"
+
+
+def test_inconsistent_pages_keep_notion_pages(config):
+    """分页数据不一致时Bangumi结果中缺少的记录不会被删除"""
+    manager = SyncManager(None, None, config)
+    notion_data = {7: NotionRecord("page-7", 7, "条目7")}
+    assert [item["subject_id"] for item in manager.compare_data({}, notion_data)["delete"]] == [7]
+
+    manager.inconsistent_types.add("anime")
+    assert manager.compare_data({}, notion_data)["delete"] == []
@@ -0,0 +1,63 @@
+import fingerprint
+from bangumi_client import parse_collection_data
+from constants import FingerprintConstants
+from sync_manager import SyncManager
+
+
+def collection(subject_id=1, **subject):
+    return {
+        "subject": {"id": subject_id, "name": "Name", "name_cn": "名称", "score": 7.5, "eps": 12,
+                    "air_date": "2024-01-01", "air_status": 2, "images": {"large": "//img/1.jpg"}, **subject},
+        "collection": {"status": 3, "ep_status": 4},
+        "updated_at": "2024-02-01T00:00:00+08:00",
+    }
+
+
+def test_normalize_ignores_empty_values_and_integral_floats():
+    a = fingerprint.compute({"title": "", "score": 8.0, "tags": []})
+    b = fingerprint.compute({"title": None, "score": 8, "tags": None})
+    assert a.digest == b.digest
+
+
+def test_changed_fields():
+    old = fingerprint.compute({"title": "a", "score": 7})
+    new = fingerprint.compute({"title": "a", "score": 8})
+    assert fingerprint.changed_fields(new, old) == ["score"]
+    assert fingerprint.changed_fields(new, new) == []
+    assert sorted(fingerprint.changed_fields(new, None)) == ["score", "title"]
+    assert sorted(fingerprint.changed_fields(new, fingerprint.Fingerprint(old.digest))) == ["score", "title"]
+
+
+def test_field_hash_matches_fingerprint():
+    fields = {"title": "名称", "score": 7.5}
+    assert fingerprint.compute(fields).field_hashes["title"] == fingerprint.field_hash("名称")
+
+
+def test_written_page_has_same_fingerprint(config):
+    """写入Notion的页面数据解析后与Bangumi记录的指纹一致"""
+    manager = SyncManager(None, None, config)
+    item = parse_collection_data(collection())
+    page = manager.map_bangumi_to_notion(item)
+
+    bangumi = fingerprint.compute(fingerprint.bangumi_fields(item))
+    notion = fingerprint.compute(fingerprint.notion_fields(page))
+    assert notion.digest == bangumi.digest
+
+
+def test_written_page_with_subject_type_has_same_fingerprint(config):
+    config.subject_types = ["anime", "book"]
+    manager = SyncManager(None, None, config)
+    item = parse_collection_data(collection())
+    item[FingerprintConstants.TYPE_FIELD] = "book"
+    page = manager.map_bangumi_to_notion(item)
+
+    assert fingerprint.notion_fields(page)[FingerprintConstants.TYPE_FIELD] == "书籍"
+    assert fingerprint.compute(fingerprint.notion_fields(page)).digest == \
+        fingerprint.compute(fingerprint.bangumi_fields(item)).digest
+
+
+def test_stored_digest():
+    page = {"properties": {"指纹": {"rich_text": [{"plain_text": "ab"}, {"text": {"content": "cd"}}]}}}
+    assert fingerprint.notion_stored_digest(page, "指纹") == "abcd"
+    assert fingerprint.notion_stored_digest(page, None) is None
+    assert fingerprint.notion_stored_digest({"properties": {}}, "指纹") is None
@@ -0,0 +1,148 @@
+import pytest
+
+import notion_schema
+from constants import StateConstants
+from exceptions import SchemaError
+from notion_service import NotionService
+from sync_manager import SyncManager
+
+
+def select(*names, prop_id="p"):
+    return {"id": prop_id, "type": "select",
+            "select": {"options": [{"id": f"o{i}", "name": name, "color": "blue"} for i, name in enumerate(names)]}}
+
+
+EXPECTED = {
+    "标题": ("title", []),
+    "评分": ("number", []),
+    "观看状态": ("select", ["想看", "在看"]),
+}
+
+
+class FakeNotion(NotionService):
+    """不发送请求的Notion服务，记录获取和修改数据库结构的次数"""
+
+    def __init__(self, properties):
+        super().__init__("test-token", "test-database")
+        self.properties = properties
+        self.get_calls = 0
+        self.updates = []
+
+    def get_database(self):
+        self.get_calls += 1
+        return {"properties": self.properties}
+
+    def update_schema(self, changes):
+        self.updates.append(changes)
+        for name, change in changes.items():
+            kind = next(iter(change))
+            self.properties[name] = {"id": name, "type": kind, kind: change[kind]}
+        return self._cache_property_ids({"properties": self.properties})
+
+
+def compatible(expected):
+    """与expected完全一致的数据库结构"""
+    return {name: {"id": f"id-{name}", "type": kind, kind: {"options": [{"name": option} for option in options]}}
+            for name, (kind, options) in expected.items()}
+
+
+def test_plan_changes_creates_missing_properties():
+    properties = {"标题": {"type": "title"}}
+    changes, errors = notion_schema.plan_changes(EXPECTED, properties)
+    assert errors == []
+    assert changes == {
+        "评分": {"number": {}},
+        "观看状态": {"select": {"options": [{"name": "想看"}, {"name": "在看"}]}},
+    }
+
+
+def test_plan_changes_keeps_existing_options():
+    properties = {"标题": {"type": "title"}, "评分": {"type": "number"}, "观看状态": select("看过", "想看")}
+    changes, errors = notion_schema.plan_changes(EXPECTED, properties)
+    assert errors == []
+    assert changes == {"观看状态": {"select": {"options": [
+        {"id": "o0", "name": "看过", "color": "blue"},
+        {"id": "o1", "name": "想看", "color": "blue"},
+        {"name": "在看"},
+    ]}}}
+
+
+def test_plan_changes_reports_type_mismatch_and_title():
+    properties = {"名称": {"type": "title"}, "评分": {"type": "rich_text"}, "观看状态": select("想看", "在看")}
+    changes, errors = notion_schema.plan_changes(EXPECTED, properties)
+    assert changes == {}
+    assert errors == ["缺少标题属性「标题」，请将「名称」重命名为「标题」", "属性「评分」的类型为rich_text，需要为number"]
+
+
+def test_describe_changes():
+    properties = {"观看状态": select("想看")}
+    changes = {"评分": {"number": {}},
+               "观看状态": {"select": {"options": [{"id": "o0", "name": "想看"}, {"name": "在看"}]}}}
+    assert notion_schema.describe_changes(changes, properties) == ["新建属性「评分」(number)", "属性「观看状态」新增选项: 在看"]
+
+
+def test_schema_hash_covers_expected_and_actual_schema():
+    properties = {"标题": {"type": "title"}, "评分": {"type": "number"}, "观看状态": select("想看", "在看"),
+                  "备注": {"type": "rich_text"}}
+    digest = notion_schema.schema_hash(EXPECTED, properties)
+    reordered = {"观看状态": ("select", ["在看", "想看"]), "评分": ("number", []), "标题": ("title", [])}
+    assert notion_schema.schema_hash(reordered, properties) == digest
+    # 不同步的属性不影响哈希
+    assert notion_schema.schema_hash(EXPECTED, {**properties, "备注": {"type": "number"}}) == digest
+    # 同步的属性或数据库中的选项变化时哈希改变
+    assert notion_schema.schema_hash({**EXPECTED, "评分": ("rich_text", [])}, properties) != digest
+    assert notion_schema.schema_hash(EXPECTED, {**properties, "观看状态": select("想看")}) != digest
+
+
+def test_plan_schema_raises_on_incompatible_schema(config, state_store):
+    manager = SyncManager(None, FakeNotion({}), config, state_store)
+    with pytest.raises(SchemaError):
+        manager._plan_schema(EXPECTED, {"评分": {"type": "number"}}, dry_run=False)
+    assert state_store.get_meta(StateConstants.META_SCHEMA_HASH) is None
+
+
+def test_plan_schema_dry_run_does_not_change(config, state_store):
+    manager = SyncManager(None, FakeNotion({}), config, state_store)
+    assert manager._plan_schema(EXPECTED, {"标题": {"type": "title"}}, dry_run=True) == {}
+    assert state_store.get_meta(StateConstants.META_SCHEMA_HASH) is None
+
+
+def test_preflight_fetches_schema_once_and_shares_property_ids(config, state_store):
+    notion = FakeNotion({})
+    manager = SyncManager(None, notion, config, state_store)
+    notion.properties = compatible(manager._expected_schema())
+
+    manager.preflight()
+    assert notion.get_property_ids(["标题", "评分"]) == ["id-标题", "id-评分"]
+    assert notion.get_calls == 1
+    assert notion.updates == []
+    assert state_store.get_meta(StateConstants.META_SCHEMA_HASH) is not None
+
+    # 结构未变化时每次同步仍获取结构，只跳过对比
+    manager.preflight()
+    assert notion.get_calls == 2
+    assert notion.updates == []
+
+
+def test_preflight_detects_option_removed_in_notion(config, state_store):
+    notion = FakeNotion({})
+    manager = SyncManager(None, notion, config, state_store)
+    notion.properties = compatible(manager._expected_schema())
+    manager.preflight()
+
+    notion.properties["观看状态"]["select"]["options"] = [
+        option for option in notion.properties["观看状态"]["select"]["options"] if option["name"] != "在看"]
+    manager.preflight()
+    assert [option["name"] for option in notion.updates[0]["观看状态"]["select"]["options"]][-1] == "在看"
+
+
+def test_preflight_rechecks_when_expected_changes(config, state_store):
+    notion = FakeNotion({})
+    manager = SyncManager(None, notion, config, state_store)
+    notion.properties = compatible(manager._expected_schema())
+    manager.preflight()
+
+    config.subject_types = ["anime", "book"]
+    manager.preflight()
+    assert list(notion.updates[0]) == ["类型"]
+    assert notion.properties["类型"]["select"]["options"] == [{"name": "动画"}, {"name": "书籍"}]
@@ -0,0 +1,36 @@
+import itertools
+
+from notion_service import PageIndex
+
+
+def page(page_id, created_time, subject_id=1):
+    return {"id": page_id, "created_time": created_time,
+            "properties": {"Bangumi链接": {"url": f"https://bangumi.tv/subject/{subject_id}"}}}
+
+
+PAGES = [
+    page("c", "2024-01-02T00:00:00.000Z"),
+    page("b", "2024-01-01T00:00:00.000Z"),
+    page("a", "2024-01-03T00:00:00.000Z"),
+    page("d", "2024-01-01T00:00:00.000Z"),
+]
+
+
+def test_keeps_earliest_page_regardless_of_order():
+    for pages in itertools.permutations(PAGES):
+        index = PageIndex()
+        for item in pages:
+            index.add(item, 1)
+        # 创建时间最早的是b和d，相同时保留页面ID较小的b
+        assert index.records[1].page_id == "b"
+        assert sorted(record.page_id for record in index.duplicates[1]) == ["a", "c", "d"]
+        assert index.duplicate_count() == 3
+
+
+def test_unique_pages_have_no_duplicates():
+    index = PageIndex()
+    index.add(page("a", "2024-01-01T00:00:00.000Z", 1), 1)
+    index.add(page("b", "2024-01-01T00:00:00.000Z", 2), 2)
+    assert {subject_id: record.page_id for subject_id, record in index.records.items()} == {1: "a", 2: "b"}
+    assert index.duplicates == {}
+    assert index.duplicate_count() == 0
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from rate_limiter import RetryPolicy, TokenBucket, call_with_retry, classify_error, parse_retry_after
+from write_executor import WriteExecutor
+
+
+class HTTPError(Exception):
+    """带状态码和响应头的请求错误，与notion_client的HTTPResponseError一致"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+class Flaky:
+    """依次抛出errors中的异常，之后返回成功"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+POLICY = RetryPolicy(retry_count=3, retry_delay=0.001, retryable_exceptions=(TimeoutError,),
+                     unsent_exceptions=(ConnectionRefusedError,))
+
+
+def test_token_bucket_spaces_reservations():
+    bucket = TokenBucket(3)
+    waits = [bucket.reserve() for _ in range(7)]
+    assert waits[0] == 0
+    for n, wait in enumerate(waits):
+        assert wait == pytest.approx(n / 3, abs=0.01)
+
+
+def test_token_bucket_without_limit():
+    bucket = TokenBucket(0)
+    assert [bucket.reserve() for _ in range(5)] == [0.0] * 5
+
+
+def test_concurrent_writes_stay_under_rate():
+    """多个写入线程共享令牌桶时总速率不超过限速"""
+    rate, total = 20, 21
+    bucket = TokenBucket(rate)
+    sent = []
+
+    def write():
+        return call_with_retry(lambda: sent.append(time.monotonic()), bucket=bucket, policy=POLICY)
+
+    with WriteExecutor(max_workers=5, total=total) as executor:
+        for n in range(total):
+            executor.submit("add", f"条目{n}", write)
+        results = executor.wait()
+
+    assert all(result.success for result in results)
+    assert len(sent) == total
+    # 第一个请求立即发送，之后每个请求间隔1/rate秒
+    assert sent[-1] - sent[0] >= (total - 1) / rate * 0.95
+
+
+def test_bucket_pause_delays_next_token():
+    bucket = TokenBucket(100)
+    bucket.reserve()
+    bucket.pause(0.5)
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_retries_throttled_request():
+    func = Flaky(HTTPError(429, {"Retry-After": "0"}), HTTPError(503))
+    assert call_with_retry(func, bucket=TokenBucket(0), policy=POLICY) == "ok"
+    assert func.calls == 3
+
+
+def test_fatal_error_is_not_retried():
+    func = Flaky(HTTPError(400))
+    with pytest.raises(HTTPError):
+        call_with_retry(func, bucket=TokenBucket(0), policy=POLICY)
+    assert func.calls == 1
+
+
+def test_gives_up_after_retry_count():
+    func = Flaky(TimeoutError(), TimeoutError(), TimeoutError(), TimeoutError())
+    with pytest.raises(TimeoutError):
+        call_with_retry(func, bucket=TokenBucket(0), policy=POLICY)
+    assert func.calls == 3
+
+
+def test_non_idempotent_request_checks_before_retry():
+    func = Flaky(HTTPError(502))
+    assert call_with_retry(func, bucket=TokenBucket(0), policy=POLICY, idempotent=False,
+                           recover=lambda: "created") == "created"
+    assert func.calls == 1
+
+    func = Flaky(HTTPError(502))
+    assert call_with_retry(func, bucket=TokenBucket(0), policy=POLICY, idempotent=False,
+                           recover=lambda: None) == "ok"
+    assert func.calls == 2
+
+    # 没有recover时结果不确定的错误不重试
+    with pytest.raises(HTTPError):
+        call_with_retry(Flaky(HTTPError(502)), bucket=TokenBucket(0), policy=POLICY, idempotent=False)
+
+
+def test_classify_error():
+    assert classify_error(HTTPError(429, {"Retry-After": "2"}), POLICY) == (True, 2.0)
+    assert classify_error(HTTPError(404), POLICY) == (False, None)
+    assert classify_error(HTTPError(500), POLICY, idempotent=False) == (False, None)
+    assert classify_error(ConnectionRefusedError(), POLICY, idempotent=False) == (True, None)
+    assert classify_error(TimeoutError(), POLICY, idempotent=False) == (False, None)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("1.5") == 1.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
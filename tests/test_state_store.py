@@ -0,0 +1,60 @@
+import pytest
+
+from constants import StateConstants
+from exceptions import StateError
+from state_store import StateEntry, StateStore
+
+
+SYNCED_AT = "2024-01-01T00:00:00"
+
+
+def entries(*subject_ids):
+    return [StateEntry(subject_id, "h", f"page-{subject_id}", f"标题{subject_id}", SYNCED_AT,
+                       field_hashes={"title": "t"}) for subject_id in subject_ids]
+
+
+def test_replace_all_round_trip(tmp_path):
+    path = str(tmp_path / "state.db")
+    with StateStore(path) as store:
+        store.replace_all(entries(1, 2))
+    with StateStore(path) as store:
+        loaded = store.load()
+    assert sorted(loaded) == [1, 2]
+    assert loaded[1].page_id == "page-1"
+    assert loaded[1].field_hashes == {"title": "t"}
+
+
+def test_replace_all_writes_only_changes(state_store):
+    state_store.replace_all(entries(1, 2, 3))
+    before = state_store._conn.total_changes
+
+    state_store.replace_all(entries(1, 2, 3))
+    assert state_store._conn.total_changes == before
+
+    state_store.replace_all(entries(1) + [StateEntry(2, "new", "page-2", "标题2", SYNCED_AT)] + entries(4))
+    # 2更新、3删除、4新增
+    assert state_store._conn.total_changes - before == 3
+    assert sorted(state_store.load()) == [1, 2, 4]
+    assert state_store.load()[2].content_hash == "new"
+
+
+def test_replace_all_reloads_after_failed_commit(state_store):
+    state_store.replace_all(entries(1))
+    state_store._conn.execute("CREATE TRIGGER fail BEFORE INSERT ON items BEGIN SELECT RAISE(ABORT, 'fail'); END")
+    with pytest.raises(StateError):
+        state_store.replace_all(entries(1, 2))
+    assert sorted(state_store.load()) == [1]
+
+
+def test_meta(state_store):
+    state_store.set_meta(StateConstants.META_LAST_FULL_SYNC, "a")
+    assert state_store.get_meta(StateConstants.META_LAST_FULL_SYNC) == "a"
+    state_store.set_meta(StateConstants.META_LAST_FULL_SYNC, None)
+    assert state_store.get_meta(StateConstants.META_LAST_FULL_SYNC) is None
+
+
+def test_detect_drift(state_store):
+    state_store.replace_all(entries(1, 2, 3))
+    missing_in_notion, missing_in_state, page_mismatch = state_store.detect_drift(
+        {1: "page-1", 2: "other", 4: "page-4"})
+    assert (sorted(missing_in_notion), sorted(missing_in_state), sorted(page_mismatch)) == ([3], [4], [2])
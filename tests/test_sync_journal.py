@@ -0,0 +1,88 @@
+from constants import JournalConstants
+from notion_service import NotionRecord
+from sync_journal import JournalOperation, SyncJournal
+from sync_manager import SyncManager
+
+
+def plan(database_id):
+    """已执行一部分的同步计划：1已完成，2已创建但未记录结果，3未执行，4上次失败"""
+    return (
+        {JournalConstants.META_DATABASE_ID: database_id, JournalConstants.META_FULL_SCAN: None},
+        [JournalOperation(1, "add", 1, "条目1", None, {"properties": {"n": 1}}),
+         JournalOperation(2, "add", 2, "条目2", None, {"properties": {"n": 2}}),
+         JournalOperation(3, "add", 3, "条目3", None, {"properties": {"n": 3}}),
+         JournalOperation(4, "update", 4, "条目4", "page-4", {"properties": {"n": 4}})],
+        [(subject_id, f"digest-{subject_id}", {"title": "t"}, f"条目{subject_id}") for subject_id in (1, 2, 3, 4)],
+        [(4, "page-4", "条目4")],
+    )
+
+
+class FakeNotion:
+    """记录写入请求的Notion客户端，subject 2的页面已存在"""
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+
+    def find_pages_by_subject_ids(self, subject_ids, properties):
+        return {subject_id: NotionRecord("page-2", subject_id) for subject_id in subject_ids if subject_id == 2}
+
+    def create_page(self, page_data):
+        self.created.append(page_data["properties"]["n"])
+        return {"id": f"page-{page_data['properties']['n']}"}
+
+    def update_page(self, page_id, page_data):
+        self.updated.append(page_id)
+        return {"id": page_id}
+
+
+def test_journal_keeps_progress_across_reopen(tmp_path):
+    path = str(tmp_path / "journal.db")
+    with SyncJournal(path) as journal:
+        journal.begin(*plan("db"))
+        journal.complete(1, "page-1")
+        journal.fail(4, "timeout")
+
+    with SyncJournal(path) as journal:
+        assert journal.has_plan()
+        assert journal.get_meta(JournalConstants.META_DATABASE_ID) == "db"
+        assert journal.get_meta(JournalConstants.META_FULL_SCAN) is None
+        operations = journal.operations()
+        assert [operation.status for operation in operations] == ["done", "pending", "pending", "failed"]
+        assert operations[0].result_page_id == "page-1"
+        assert operations[2].page_data == {"properties": {"n": 3}}
+        assert operations[3].error == "timeout"
+        assert journal.items()[2] == ("digest-2", {"title": "t"}, "条目2")
+        assert journal.pages() == {4: ("page-4", "条目4")}
+
+        journal.clear()
+        assert not journal.has_plan()
+        assert journal.operations() == []
+
+
+def test_resume_runs_only_remaining_operations(config, state_store, tmp_path):
+    config.enable_schema_check = False
+    journal = SyncJournal(str(tmp_path / "journal.db"))
+    journal.begin(*plan(config.notion_database_id))
+    journal.complete(1, "page-1")
+    journal.fail(4, "timeout")
+    notion = FakeNotion()
+
+    result = SyncManager(None, notion, config, state_store, journal=journal).sync(resume=True)
+
+    assert notion.created == [3]
+    assert notion.updated == ["page-4"]
+    assert result["failed_count"] == 0
+    assert not journal.has_plan()
+    entries = state_store.load()
+    assert {subject_id: entry.page_id for subject_id, entry in entries.items()} == \
+        {1: "page-1", 2: "page-2", 3: "page-3", 4: "page-4"}
+    assert entries[3].content_hash == "digest-3"
+    journal.close()
+
+
+def test_resume_ignores_plan_of_other_database(config, tmp_path):
+    journal = SyncJournal(str(tmp_path / "journal.db"))
+    journal.begin(*plan("other-database"))
+    assert not SyncManager(None, FakeNotion(), config, journal=journal)._resumable()
+    journal.close()
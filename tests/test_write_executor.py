@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+
+from write_executor import AsyncWriteExecutor, WriteExecutor
+
+
+class FakeService:
+    """模拟Notion写入：序号越小耗时越长，failing中的序号抛出异常，记录同时进行的请求数"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def write(self, n, total):
+        self._enter()
+        try:
+            time.sleep(0.002 * (total - n))
+            if n in self.failing:
+                raise RuntimeError(f"写入{n}失败")
+            return {"id": f"page-{n}"}
+        finally:
+            self._leave()
+
+    async def write_async(self, n, total):
+        self._enter()
+        try:
+            await asyncio.sleep(0.002 * (total - n))
+            if n in self.failing:
+                raise RuntimeError(f"写入{n}失败")
+            return {"id": f"page-{n}"}
+        finally:
+            self._leave()
+
+
+def progress_indexes(caplog):
+    return [int(re.match(r"\[(\d+)/", record.getMessage()).group(1))
+            for record in caplog.records if record.name == "write_executor" and record.getMessage().startswith("[")]
+
+
+def check_results(results, service, total):
+    assert [result.index for result in results] == list(range(1, total + 1))
+    assert [result.title for result in results] == [f"条目{n}" for n in range(1, total + 1)]
+    for n, result in enumerate(results, 1):
+        if n in service.failing:
+            assert not result.success
+            assert str(result.error) == f"写入{n}失败"
+            assert result.response is None
+        else:
+            assert result.success
+            assert result.response == {"id": f"page-{n}"}
+            assert result.error is None
+
+
+def test_write_executor_reports_each_operation_in_order(caplog):
+    caplog.set_level(logging.INFO, logger="write_executor")
+    total = 12
+    service = FakeService(failing={3, 8})
+    with WriteExecutor(max_workers=3, total=total) as executor:
+        for n in range(1, total + 1):
+            executor.submit("add", f"条目{n}", service.write, n, total, subject_id=n)
+        results = executor.wait()
+
+    check_results(results, service, total)
+    assert [result.subject_id for result in results] == list(range(1, total + 1))
+    # 后提交的操作先完成，进度日志仍按提交顺序输出
+    assert progress_indexes(caplog) == list(range(1, total + 1))
+    failures = [record.getMessage() for record in caplog.records if record.levelno == logging.ERROR]
+    assert failures == ["[3/12] 添加记录失败: 条目3: 写入3失败", "[8/12] 添加记录失败: 条目8: 写入8失败"]
+
+
+def test_write_executor_bounds_concurrency():
+    total = 20
+    service = FakeService()
+    with WriteExecutor(max_workers=4, total=total) as executor:
+        for n in range(1, total + 1):
+            executor.submit("update", f"条目{n}", service.write, n, total)
+        executor.wait()
+    assert 1 < service.max_active <= 4
+
+
+def test_async_write_executor_reports_each_operation_in_order(caplog):
+    caplog.set_level(logging.INFO, logger="write_executor")
+    total = 12
+    service = FakeService(failing={1, 12})
+
+    async def run():
+        executor = AsyncWriteExecutor(max_workers=3, total=total)
+        for n in range(1, total + 1):
+            executor.submit("delete", f"条目{n}", service.write_async, n, total)
+        return await executor.wait()
+
+    results = asyncio.run(run())
+    check_results(results, service, total)
+    assert 1 < service.max_active <= 3
+    assert progress_indexes(caplog) == list(range(1, total + 1))
+
+
+def test_progress_without_total(caplog):
+    caplog.set_level(logging.INFO, logger="write_executor")
+    with WriteExecutor(max_workers=2) as executor:
+        executor.submit("archive", "重复页面", lambda: None)
+        executor.wait()
+    assert [record.getMessage() for record in caplog.records] == ["[1] 归档重复页面: 重复页面"]
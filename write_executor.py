@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+from constants import NotionConstants
+
+logger = logging.getLogger(__name__)
+
+
+class OperationResult:
+    """单个写入操作的执行结果"""
+
+    def __init__(self, index: int, action: str, title: str, subject_id: Optional[int] = None):
+        """初始化执行结果
+
+        Args:
+            index: 操作序号（从1开始）
+            action: 操作类型，add、update、delete或archive
+            title: 记录标题
+            subject_id: 对应的Bangumi条目ID
+        """
+        self.index = index
+        self.action = action
+        self.title = title
+        self.subject_id = subject_id
+        self.success = False
+        self.response: Optional[Any] = None
+        self.error: Optional[Exception] = None
+
+    def __repr__(self) -> str:
+        state = "成功" if self.success else f"失败: {self.error}"
+        return f"OperationResult({self.index}, {self.action}, {self.title}, {state})"
+
+
+class _OrderedProgress:
+    """按提交顺序输出 [i/total] 进度日志的公共逻辑"""
+
+    ACTION_LABELS = {
+        "add": "添加记录",
+        "update": "更新记录",
+        "delete": "删除记录",
+        "archive": "归档重复页面"
+    }
+
+    def __init__(self, max_workers: int, total: Optional[int]):
+        """初始化进度记录
+
+        Args:
+            max_workers: 最大并发写入数
+            total: 操作总数，用于进度日志，未知时为None
+        """
+        self.max_workers = max_workers
+        self.total = total
+
+        self._lock = threading.Lock()
+        self._futures: List[Any] = []
+        self._results: List[OperationResult] = []
+        self._logged = 0
+
+    def _new_result(self, action: str, title: str, subject_id: Optional[int]) -> OperationResult:
+        """创建并登记下一个操作的结果对象，调用方需持有_lock"""
+        result = OperationResult(len(self._results) + 1, action, title, subject_id)
+        self._results.append(result)
+        return result
+
+    def _log_progress(self) -> None:
+        """按提交顺序输出已完成操作的进度日志"""
+        with self._lock:
+            while self._logged < len(self._futures) and self._futures[self._logged].done():
+                result = self._results[self._logged]
+                self._logged += 1
+                progress = f"{result.index}/{self.total}" if self.total else f"{result.index}"
+                label = self.ACTION_LABELS.get(result.action, result.action)
+                if result.success:
+                    logger.info(f"[{progress}] {label}: {result.title}")
+                else:
+                    logger.error(f"[{progress}] {label}失败: {result.title}: {result.error}")
+
+
+class WriteExecutor(_OrderedProgress):
+    """Notion写入并发执行器
+
+    使用有界线程池并发执行写入操作，并按提交顺序输出 [i/total] 进度日志。
+    请求速率由NotionService内部的令牌桶统一控制。
+    """
+
+    def __init__(self,
+                 max_workers: int = NotionConstants.DEFAULT_MAX_WORKERS,
+                 total: Optional[int] = None):
+        """初始化执行器
+
+        Args:
+            max_workers: 最大并发写入数
+            total: 操作总数，用于进度日志，未知时为None
+        """
+        super().__init__(max_workers, total)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notion-writer")
+
+    def __enter__(self) -> "WriteExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+
+    def submit(self, action: str, title: str, func: Callable[..., Any], *args: Any,
+               subject_id: Optional[int] = None) -> OperationResult:
+        """提交写入操作
+
+        Args:
+            action: 操作类型，add、update、delete或archive
+            title: 记录标题
+            func: 实际执行写入的函数
+            *args: 传给func的参数
+            subject_id: 对应的Bangumi条目ID
+
+        Returns:
+            该操作的执行结果对象，操作完成后被填充
+        """
+        with self._lock:
+            result = self._new_result(action, title, subject_id)
+            future = self._pool.submit(self._run, result, func, *args)
+            self._futures.append(future)
+        future.add_done_callback(lambda _: self._log_progress())
+        return result
+
+    def wait(self) -> List[OperationResult]:
+        """等待所有已提交的操作完成
+
+        Returns:
+            按提交顺序排列的执行结果列表
+        """
+        for future in list(self._futures):
+            future.result()
+        self._log_progress()
+        return list(self._results)
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        self._pool.shutdown(wait=True)
+
+    def _run(self, result: OperationResult, func: Callable[..., Any], *args: Any) -> None:
+        """在工作线程中执行单个操作，异常记录到结果中而不向外抛出"""
+        try:
+            result.response = func(*args)
+            result.success = True
+        except Exception as e:
+            result.error = e
+
+
+class AsyncWriteExecutor(_OrderedProgress):
+    """WriteExecutor的异步版本
+
+    在事件循环中以任务执行写入协程，用信号量限制并发数，进度日志与WriteExecutor一致。
+    """
+
+    def __init__(self,
+                 max_workers: int = NotionConstants.DEFAULT_MAX_WORKERS,
+                 total: Optional[int] = None):
+        """初始化执行器
+
+        Args:
+            max_workers: 最大并发写入数
+            total: 操作总数，用于进度日志，未知时为None
+        """
+        super().__init__(max_workers, total)
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    def submit(self, action: str, title: str, func: Callable[..., Awaitable[Any]], *args: Any,
+               subject_id: Optional[int] = None) -> OperationResult:
+        """提交写入操作，需在事件循环中调用
+
+        Args:
+            action: 操作类型，add、update、delete或archive
+            title: 记录标题
+            func: 实际执行写入的协程函数
+            *args: 传给func的参数
+            subject_id: 对应的Bangumi条目ID
+
+        Returns:
+            该操作的执行结果对象，操作完成后被填充
+        """
+        with self._lock:
+            result = self._new_result(action, title, subject_id)
+            task = asyncio.ensure_future(self._run(result, func, *args))
+            self._futures.append(task)
+        task.add_done_callback(lambda _: self._log_progress())
+        return result
+
+    async def wait(self) -> List[OperationResult]:
+        """等待所有已提交的操作完成
+
+        Returns:
+            按提交顺序排列的执行结果列表
+        """
+        await asyncio.gather(*self._futures)
+        self._log_progress()
+        return list(self._results)
+
+    def cancel(self) -> None:
+        """取消尚未完成的操作"""
+        for task in self._futures:
+            if not task.done():
+                task.cancel()
+
+    async def _run(self, result: OperationResult, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """执行单个操作，异常记录到结果中而不向外抛出"""
+        async with self._semaphore:
+            try:
+                result.response = await func(*args)
+                result.success = True
+            except Exception as e:
+                result.error = e